@@ -1,17 +1,145 @@
+import os
 import re
 
-from json import loads
+from json import dumps, loads
 from pathlib import Path
 from urllib import request
 from http.client import HTTPResponse
 from textwrap import wrap
 from datetime import date
+from typing import Any, Dict, Optional, Tuple
 
 # the cookiecutter configuration
 config = loads('''{{cookiecutter|jsonify}}''')
 
 # url to the json data of spdx
 spdx_licenses_json = "https://raw.githubusercontent.com/spdx/license-list-data/master/json/licenses.json"
+# url to the json data (including the license text) of a single license
+spdx_license_details_json = "https://spdx.org/licenses/{license_id}.json"
+
+# local cache of spdx license indexes and license details
+# (one folder per license list version)
+user_cache_dir = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+spdx_cache_dir = Path(
+    os.environ.get("QHANA_TEMPLATE_CACHE_DIR") or user_cache_dir / "qhana-plugin-template"
+) / "spdx"
+# download the current spdx license list and the license text into the cache
+# (the network is only used if requested, the bundled index is used otherwise)
+refresh_spdx_index = os.environ.get("QHANA_TEMPLATE_SPDX_REFRESH", "").lower() in ("1", "true", "yes", "on")
+# never use the network, even if a refresh was requested
+# (e.g. on air-gapped build hosts)
+offline = os.environ.get("QHANA_TEMPLATE_OFFLINE", "").lower() in ("1", "true", "yes", "on")
+
+# bundled spdx license index: license ids (space separated) of the spdx
+# license list version below
+bundled_license_list_version = "3.29"
+bundled_license_ids = """
+0BSD 3D-Slicer-1.0 AAL Abstyles AdaCore-doc Adobe-2006 Adobe-Display-PostScript Adobe-Glyph
+Adobe-Utopia ADSL Advanced-Cryptics-Dictionary AFL-1.1 AFL-1.2 AFL-2.0 AFL-2.1 AFL-3.0 Afmparse
+AGPL-1.0-only AGPL-1.0-or-later AGPL-3.0-only AGPL-3.0-or-later Aladdin ALGLIB-Documentation
+AMD-newlib AMDPLPA AML AML-glslang AMPAS ANTLR-PD ANTLR-PD-fallback any-OSI any-OSI-perl-modules
+Apache-1.0 Apache-1.1 Apache-2.0 APAFML APL-1.0 App-s2p APSL-1.0 APSL-1.1 APSL-1.2 APSL-2.0
+Arphic-1999 Artistic-1.0 Artistic-1.0-cl8 Artistic-1.0-Perl Artistic-2.0 Artistic-dist Aspell-RU
+ASWF-Digital-Assets-1.0 ASWF-Digital-Assets-1.1 atc-game Baekmuk Bahyph Barr
+bcrypt-Solar-Designer Beerware Bitstream-Charter Bitstream-Vera BitTorrent-1.0 BitTorrent-1.1
+blessing BlueOak-1.0.0 Boehm-GC Boehm-GC-without-fee BOLA-1.1 Borceux Brian-Gladman-2-Clause
+Brian-Gladman-3-Clause Brian-Gladman-3-Clause-no-conversion BSD-1-Clause BSD-2-Clause
+BSD-2-Clause-Darwin BSD-2-Clause-first-lines BSD-2-Clause-Patent BSD-2-Clause-pkgconf-disclaimer
+BSD-2-Clause-pos-unchanged BSD-2-Clause-Views BSD-3-Clause BSD-3-Clause-acpica
+BSD-3-Clause-Attribution BSD-3-Clause-Clear BSD-3-Clause-flex BSD-3-Clause-HP BSD-3-Clause-LBNL
+BSD-3-Clause-Modification BSD-3-Clause-No-Military-License BSD-3-Clause-No-Nuclear-License
+BSD-3-Clause-No-Nuclear-License-2014 BSD-3-Clause-No-Nuclear-Warranty BSD-3-Clause-Open-MPI
+BSD-3-Clause-OpenWebUI BSD-3-Clause-Sun BSD-3-Clause-Tso BSD-4-Clause BSD-4-Clause-Shortened
+BSD-4-Clause-UC BSD-4.3RENO BSD-4.3TAHOE BSD-Advertising-Acknowledgement BSD-ask-to-endorse
+BSD-Attribution-HPND-disclaimer BSD-Inferno-Nettverk BSD-Mark-Modifications BSD-Protection
+BSD-Source-alt-GPL BSD-Source-beginning-file BSD-Source-Code BSD-Source-Code-no-disclaimer
+BSD-Systemics BSD-Systemics-W3Works BSL-1.0 Buddy Bugroff BUSL-1.1 bzip2-1.0.6 C-UDA-1.0 CAL-1.0
+CAL-1.0-Combined-Work-Exception Caldera Caldera-no-preamble CAPEC-tou Catharon CATOSL-1.1
+CC-BY-1.0 CC-BY-2.0 CC-BY-2.5 CC-BY-2.5-AU CC-BY-3.0 CC-BY-3.0-AT CC-BY-3.0-AU CC-BY-3.0-DE
+CC-BY-3.0-IGO CC-BY-3.0-NL CC-BY-3.0-US CC-BY-4.0 CC-BY-NC-1.0 CC-BY-NC-2.0 CC-BY-NC-2.5
+CC-BY-NC-3.0 CC-BY-NC-3.0-DE CC-BY-NC-3.0-IGO CC-BY-NC-4.0 CC-BY-NC-ND-1.0 CC-BY-NC-ND-2.0
+CC-BY-NC-ND-2.5 CC-BY-NC-ND-3.0 CC-BY-NC-ND-3.0-DE CC-BY-NC-ND-3.0-IGO CC-BY-NC-ND-4.0
+CC-BY-NC-SA-1.0 CC-BY-NC-SA-2.0 CC-BY-NC-SA-2.0-DE CC-BY-NC-SA-2.0-FR CC-BY-NC-SA-2.0-UK
+CC-BY-NC-SA-2.5 CC-BY-NC-SA-3.0 CC-BY-NC-SA-3.0-DE CC-BY-NC-SA-3.0-IGO CC-BY-NC-SA-4.0
+CC-BY-ND-1.0 CC-BY-ND-2.0 CC-BY-ND-2.5 CC-BY-ND-3.0 CC-BY-ND-3.0-DE CC-BY-ND-4.0 CC-BY-SA-1.0
+CC-BY-SA-2.0 CC-BY-SA-2.0-UK CC-BY-SA-2.1-JP CC-BY-SA-2.5 CC-BY-SA-3.0 CC-BY-SA-3.0-AT
+CC-BY-SA-3.0-DE CC-BY-SA-3.0-IGO CC-BY-SA-4.0 CC-PDDC CC-PDM-1.0 CC-SA-1.0 CC0-1.0 CDDL-1.0
+CDDL-1.1 CDL-1.0 CDLA-Permissive-1.0 CDLA-Permissive-2.0 CDLA-Sharing-1.0 CECILL-1.0 CECILL-1.1
+CECILL-2.0 CECILL-2.1 CECILL-B CECILL-C CERN-OHL-1.1 CERN-OHL-1.2 CERN-OHL-P-2.0 CERN-OHL-S-2.0
+CERN-OHL-W-2.0 CFITSIO check-cvs checkmk ClArtistic Clips CMU-Mach CMU-Mach-nodoc CNRI-Jython
+CNRI-Python CNRI-Python-GPL-Compatible COIL-1.0 Community-Spec-1.0 Condor-1.1
+copyleft-next-0.3.0 copyleft-next-0.3.1 Cornell-Lossless-JPEG CPAL-1.0 CPL-1.0 CPOL-1.02 Cronyx
+Crossword CryptoSwift CrystalStacker CUA-OPL-1.0 Cube curl cve-tou D-FSL-1.0 DEC-3-Clause
+diffmark DL-DE-BY-2.0 DL-DE-ZERO-2.0 DOC DocBook-DTD DocBook-Schema DocBook-Stylesheet
+DocBook-XML Dotseqn DRL-1.0 DRL-1.1 DSDP dtoa dvipdfm ECL-1.0 ECL-2.0 EFL-1.0 EFL-2.0 eGenix
+Elastic-2.0 Entessa EPICS EPL-1.0 EPL-2.0 ErlPL-1.1 ESA-PL-permissive-2.4
+ESA-PL-strong-copyleft-2.4 ESA-PL-weak-copyleft-2.4 etalab-2.0 EUDatagrid EUPL-1.0 EUPL-1.1
+EUPL-1.2 Eurosym Fair FBM FDK-AAC FDK-MPEG-H Ferguson-Twofish Frameworx-1.0 FreeBSD-DOC
+FreeImage FSFAP FSFAP-no-warranty-disclaimer FSFUL FSFULLR FSFULLRSD FSFULLRWD FSL-1.1-ALv2
+FSL-1.1-MIT FTL Furuseth fwlw Game-Programming-Gems GCR-docs GD generic-xts
+GFDL-1.1-invariants-only GFDL-1.1-invariants-or-later GFDL-1.1-no-invariants-only
+GFDL-1.1-no-invariants-or-later GFDL-1.1-only GFDL-1.1-or-later GFDL-1.2-invariants-only
+GFDL-1.2-invariants-or-later GFDL-1.2-no-invariants-only GFDL-1.2-no-invariants-or-later
+GFDL-1.2-only GFDL-1.2-or-later GFDL-1.3-invariants-only GFDL-1.3-invariants-or-later
+GFDL-1.3-no-invariants-only GFDL-1.3-no-invariants-or-later GFDL-1.3-only GFDL-1.3-or-later
+Giftware GL2PS Glide Glulxe GLWTPL gnuplot GPL-1.0-only GPL-1.0-or-later GPL-2.0-only
+GPL-2.0-or-later GPL-3.0-only GPL-3.0-or-later Graphics-Gems gSOAP-1.3b gtkbook Gutmann
+HaskellReport HDF5 hdparm HIDAPI Hippocratic-2.1 Hippocratic-3.0-core HP-1986 HP-1989 HPND
+HPND-DEC HPND-doc HPND-doc-sell HPND-export-US HPND-export-US-acknowledgement
+HPND-export-US-modify HPND-export2-US HPND-Fenneberg-Livingston HPND-INRIA-IMAG HPND-Intel
+HPND-Kevlin-Henney HPND-Markus-Kuhn HPND-merchantability-variant HPND-MIT-disclaimer HPND-Netrek
+HPND-Pbmplus HPND-sell-MIT-disclaimer-xserver HPND-sell-regexpr HPND-sell-variant
+HPND-sell-variant-critical-systems HPND-sell-variant-MIT-disclaimer
+HPND-sell-variant-MIT-disclaimer-rev HPND-SMC HPND-UC HPND-UC-export-US HTMLTIDY
+hyphen-bulgarian IBM-pibs ICU IEC-Code-Components-EULA IJG IJG-short ImageMagick iMatix Imlib2
+Info-ZIP Informatica Inner-Net-2.0 InnoSetup Intel Intel-ACPI Interbase-1.0 IPA IPL-1.0 ISC
+ISC-Veillard ISO-permission Jam JasPer-2.0 jove JPL-image JPNIC JSON Kastrup Kazlib Knuth-CTAN
+LAL-1.2 LAL-1.3 Latex2e Latex2e-translated-notice Leptonica LGPL-2.0-only LGPL-2.0-or-later
+LGPL-2.1-only LGPL-2.1-or-later LGPL-3.0-only LGPL-3.0-or-later LGPLLR Libpng libpng-1.6.35
+libpng-2.0 libselinux-1.0 libtiff libutil-David-Nugent LiLiQ-P-1.1 LiLiQ-R-1.1 LiLiQ-Rplus-1.1
+Linux-man-pages-1-para Linux-man-pages-copyleft Linux-man-pages-copyleft-2-para
+Linux-man-pages-copyleft-var Linux-OpenIB LOOP LPD-document LPL-1.0 LPL-1.02 LPPL-1.0 LPPL-1.1
+LPPL-1.2 LPPL-1.3a LPPL-1.3c lsof Lucida-Bitmap-Fonts LZMA-SDK-9.11-to-9.20 LZMA-SDK-9.22
+Mackerras-3-Clause Mackerras-3-Clause-acknowledgment magaz mailprio MakeIndex man2html
+Martin-Birgmeier McPhee-slideshow metamail Minpack MIPS MirOS MIT MIT-0 MIT-advertising
+MIT-Click MIT-CMU MIT-enna MIT-feh MIT-Festival MIT-Khronos-old MIT-Modern-Variant
+MIT-open-group MIT-STK MIT-testregex MIT-Wu MITNFA MMIXware MMPL-1.0.1 Motosoto MPEG-SSG
+mpi-permissive mpich2 MPL-1.0 MPL-1.1 MPL-2.0 MPL-2.0-no-copyleft-exception mplus MS-LPL MS-PL
+MS-RL MTLL MulanPSL-1.0 MulanPSL-2.0 Multics Mup MVT-1.1 NAIST-2003 NASA-1.3 Naumen NBPL-1.0
+NCBI-PD NCGL-UK-2.0 NCL NCSA NetCDF Newsletr NGPL ngrep NICTA-1.0 NIST-PD NIST-PD-fallback
+NIST-PD-TNT NIST-Software NLOD-1.0 NLOD-2.0 NLPL Nokia NOSL Noweb NPL-1.0 NPL-1.1 NPOSL-3.0 NRL
+NTIA-PD NTP NTP-0 O-UDA-1.0 OAR OCCT-PL OCLC-2.0 ODbL-1.0 ODC-By-1.0 OFFIS OFL-1.0
+OFL-1.0-no-RFN OFL-1.0-RFN OFL-1.1 OFL-1.1-no-RFN OFL-1.1-RFN OGC-1.0 OGDL-Taiwan-1.0
+OGL-Canada-2.0 OGL-UK-1.0 OGL-UK-2.0 OGL-UK-3.0 OGTSL OLDAP-1.1 OLDAP-1.2 OLDAP-1.3 OLDAP-1.4
+OLDAP-2.0 OLDAP-2.0.1 OLDAP-2.1 OLDAP-2.2 OLDAP-2.2.1 OLDAP-2.2.2 OLDAP-2.3 OLDAP-2.4 OLDAP-2.5
+OLDAP-2.6 OLDAP-2.7 OLDAP-2.8 OLFL-1.3 OML OpenMDW-1.0 OpenPBS-2.3 OpenSSL OpenSSL-standalone
+OpenVision OPL-1.0 OPL-UK-3.0 OPUBL-1.0 OSC-1.0 OSET-PL-2.1 OSL-1.0 OSL-1.1 OSL-2.0 OSL-2.1
+OSL-3.0 OSSP PADL ParaType-Free-Font-1.3 Parity-6.0.0 Parity-7.0.0 PDDL-1.0 PHP-3.0 PHP-3.01
+Pixar pkgconf Plexus pnmstitch PolyForm-Noncommercial-1.0.0 PolyForm-Small-Business-1.0.0
+PostgreSQL PPL PSF-2.0 psfrag psutils Python-2.0 Python-2.0.1 python-ldap Qhull QPL-1.0
+QPL-1.0-INRIA-2004 radvd Rdisc RHeCos-1.1 RPL-1.1 RPL-1.5 RPSL-1.0 RSA-MD RSCPL Ruby Ruby-pty
+SAX-PD SAX-PD-2.0 Saxpath SCEA SchemeReport Sendmail Sendmail-8.23 Sendmail-Open-Source-1.1
+SGI-B-1.0 SGI-B-1.1 SGI-B-2.0 SGI-OpenGL SGMLUG-PM SGP4 SHL-0.5 SHL-0.51 SimPL-2.0 SISSL
+SISSL-1.2 SL Sleepycat SMAIL-GPL SMLNJ SMPPL SNIA snprintf SOFA softSurfer Soundex Spencer-86
+Spencer-94 Spencer-99 SPL-1.0 ssh-keyscan SSH-OpenSSH SSH-short SSLeay-standalone SSPL-1.0
+SugarCRM-1.1.3 SUL-1.0 Sun-PPP Sun-PPP-2000 SunPro SWL swrule Symlinks TAPR-OHL-1.0 TCL
+TCP-wrappers TekHVC TermReadKey TGPPL-1.0 ThirdEye threeparttable TMate TORQUE-1.1 TOSL TPDL
+TPL-1.0 TrustedQSL TTWL TTYP0 TU-Berlin-1.0 TU-Berlin-2.0 Ubuntu-font-1.0 UCAR UCL-1.0 ulem
+UMich-Merit Unicode-3.0 Unicode-DFS-2015 Unicode-DFS-2016 Unicode-TOU UnixCrypt Unlicense
+Unlicense-libtelnet Unlicense-libwhirlpool UnRAR UPL-1.0 URT-RLE Vim Vixie-Cron VOSTROM VSL-1.0
+W3C W3C-19980720 W3C-20150513 w3m Watcom-1.0 Widget-Workshop WordNet Wsuipa WTFNMFPL WTFPL wwl
+X11 X11-distribute-modifications-variant X11-no-permit-persons X11-swapped Xdebug-1.03 Xerox
+Xfig XFree86-1.1 xinetd xkeyboard-config-Zinoviev xlock Xnet xpp XSkat xzoom YPL-1.0 YPL-1.1 Zed
+Zeeff Zend-2.0 Zimbra-1.3 Zimbra-1.4 Zlib zlib-acknowledgement ZPL-1.1 ZPL-2.0 ZPL-2.1
+"""
+bundled_deprecated_license_ids = """
+AGPL-1.0 AGPL-3.0 BSD-2-Clause-FreeBSD BSD-2-Clause-NetBSD bzip2-1.0.5 eCos-2.0 GFDL-1.1
+GFDL-1.2 GFDL-1.3 GPL-1.0 GPL-1.0+ GPL-2.0 GPL-2.0+ GPL-2.0-with-autoconf-exception
+GPL-2.0-with-bison-exception GPL-2.0-with-classpath-exception GPL-2.0-with-font-exception
+GPL-2.0-with-GCC-exception GPL-3.0 GPL-3.0+ GPL-3.0-with-autoconf-exception
+GPL-3.0-with-GCC-exception LGPL-2.0 LGPL-2.0+ LGPL-2.1 LGPL-2.1+ LGPL-3.0 LGPL-3.0+ Net-SNMP
+Nunit StandardML-NJ wxWindows
+"""
 
 def remove_unused_files():
     """Remove files that are not used because of the template configuration."""
@@ -48,15 +176,101 @@ def add_instance_path():
             ""
         ])
 
-def save_license_detail(license_):
-    """Save the license text downloaded from SPDX as LICENSE."""
-    if license_["isDeprecatedLicenseId"]:
-        print("\n\nThe chosen license is marked as deprecated!!!\n\n")
+def version_key(version: str) -> Tuple[int, ...]:
+    """Sort key of spdx license list versions (e.g. "3.29")."""
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+def bundled_license_index() -> Dict[str, Any]:
+    """The license index bundled with the template.
+
+    The index maps license ids to their deprecation flag.
+    """
+    licenses = dict.fromkeys(bundled_license_ids.split(), False)
+    licenses.update(dict.fromkeys(bundled_deprecated_license_ids.split(), True))
+    return {"version": bundled_license_list_version, "licenses": licenses}
+
+def cached_license_indexes():
+    """Iterate over all license indexes in the local cache."""
+    if not spdx_cache_dir.is_dir():
+        return
+    for index_path in spdx_cache_dir.glob("*/index.json"):
+        try:
+            yield loads(index_path.read_text(encoding="utf-8"))
+        except ValueError:
+            print(f"Ignoring the corrupt cached license index {index_path}.")
+
+def write_cache_file(path: Path, content: str):
+    """Write a cache file atomically.
+
+    Concurrent generations never read partial files.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+def refresh_license_index():
+    """Download the current spdx license list and cache its index."""
+    licenses: HTTPResponse
+    with request.urlopen(spdx_licenses_json, timeout=15) as licenses:
+        licenses_json = loads(licenses.read().decode("utf-8"))
+    version = licenses_json["licenseListVersion"]
+    index = {
+        "version": version,
+        "licenses": {lic["licenseId"]: lic["isDeprecatedLicenseId"] for lic in licenses_json["licenses"]},
+    }
+    write_cache_file(spdx_cache_dir / version / "index.json", dumps(index))
+    print(f"Refreshed the cached SPDX license index (license list version {version}).")
+
+def load_license_index() -> Dict[str, Any]:
+    """Load the newest license index (bundled or cached).
+
+    The network is only used if a refresh was requested.
+    """
+    if refresh_spdx_index and not offline:
+        try:
+            refresh_license_index()
+        except (OSError, ValueError, KeyError) as err:
+            print(f"Could not refresh the SPDX license index ({err}), using the bundled or cached index.")
+    return max([bundled_license_index(), *cached_license_indexes()], key=lambda index: version_key(index["version"]))
+
+def load_license_details(license_id: str, version: str) -> Optional[Dict[str, Any]]:
+    """Load the license details (including the license text) from the cache.
+
+    The details are only downloaded if a refresh was requested, otherwise a
+    license that is not cached yet is returned as None without waiting for
+    the network.
+    """
+    cache_path = spdx_cache_dir / version / "details" / f"{license_id}.json"
+    if cache_path.exists():
+        return loads(cache_path.read_text(encoding="utf-8"))
+    if offline or not refresh_spdx_index:
+        return None
     license_detail: HTTPResponse
-    with request.urlopen(license_["detailsUrl"], timeout=15) as license_detail, Path("LICENSE").open("wt") as license_file:
-        if license_detail.status != 200:
-            print("Could not fetch license detail information. Aborting")
-        detail_json = loads(license_detail.read().decode("utf-8"))
+    try:
+        with request.urlopen(spdx_license_details_json.format(license_id=license_id), timeout=15) as license_detail:
+            content = license_detail.read().decode("utf-8")
+        detail_json = loads(content)
+    except (OSError, ValueError) as err:
+        print(f"Could not fetch the license text of {license_id} ({err}).")
+        return None
+    write_cache_file(cache_path, content)
+    return detail_json
+
+def save_license_reference(license_id: str):
+    """Save a LICENSE file referencing the license.
+
+    Used if the license text is not available.
+    """
+    with Path("LICENSE").open("wt") as license_file:
+        license_file.write(f"SPDX-License-Identifier: {license_id}\n\nhttps://spdx.org/licenses/{license_id}.html\n")
+    print(f"Replace the LICENSE file with the full text of the license {license_id}.")
+    if not refresh_spdx_index:
+        print("Set QHANA_TEMPLATE_SPDX_REFRESH=1 to download and cache the license text.")
+
+def save_license_detail(detail_json: Dict[str, Any]):
+    """Save the license text from the SPDX license details as LICENSE."""
+    with Path("LICENSE").open("wt") as license_file:
         text = (
             detail_json["licenseText"]
                 .replace("<year>", str(date.today().year))
@@ -72,29 +286,36 @@ def save_license_detail(license_):
                     # grab indent from first line
                     match = re.match(r"^\s+", l)
                     if match:
-                        indent = match.string
+                        indent = match.group(0)
+                    wrapped_lines.append(l)
                 else:
                     # remove a single space from following lines if it is not followed by more spaces
                     # also add current indent to the line
                     wrapped_lines.append(indent + re.sub(r"^ (?! )", "", l))
+            if not wrapped:
+                wrapped_lines.append("")  # keep empty lines between paragraphs
 
-        license_file.writelines(wrapped_lines)
+        license_file.write("\n".join(line.rstrip() for line in wrapped_lines) + "\n")
 
 def check_license():
-    """Check license and download the license file."""
-    licenses: HTTPResponse
-    with request.urlopen(spdx_licenses_json, timeout=15) as licenses:
-        if licenses.status != 200:
-            print("Could not fetch license information. Aborting")
-        licenses_json = loads(licenses.read().decode("utf-8"))
-        matching = [l for l in licenses_json["licenses"] if l["licenseId"] == config["plugin_license"]]
-        if not matching:
-            print(f"Could not match license config['plugin_license'] to an SPDX license id.")
-            return
-        if len(matching) > 1:
-            print(f"Found more than one matching license for config['plugin_license'].")
+    """Check license and save the license file."""
+    index = load_license_index()
+    licenses: Dict[str, bool] = index["licenses"]
+    license_id = config["plugin_license"]
+    if license_id not in licenses:
+        # spdx license ids are case insensitive
+        matching = [l for l in licenses if l.lower() == license_id.lower()]
+        if len(matching) != 1:
+            print(f"Could not match license {license_id} to an SPDX license id (license list version {index['version']}).")
             return
-        save_license_detail(matching[0])
+        license_id = matching[0]
+    if licenses[license_id]:
+        print("\n\nThe chosen license is marked as deprecated!!!\n\n")
+    detail_json = load_license_details(license_id, index["version"])
+    if detail_json is None:
+        save_license_reference(license_id)
+    else:
+        save_license_detail(detail_json)
 
 if __name__=="__main__":
     remove_unused_files()
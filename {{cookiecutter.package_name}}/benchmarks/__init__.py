@@ -0,0 +1 @@
+# local benchmarks of the plugin, run them with `invoke bench` (see README.md)
@@ -0,0 +1,96 @@
+"""Run the benchmarks.
+
+Usage: ``python -m benchmarks [--filter NAME] [--output FILE] [--compare FILE]``
+"""
+
+import platform
+import re
+import sys
+from argparse import ArgumentParser
+from datetime import datetime
+from importlib import import_module
+from json import dumps, loads
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from .harness import PLUGIN_PACKAGE, PROJECT_ROOT, BenchmarkRunner
+
+BENCHMARK_FOLDER = Path(__file__).resolve().parent
+
+
+def discover_benchmarks() -> Iterator[Tuple[str, Callable[[BenchmarkRunner], None]]]:
+    """Find all ``bench_*`` functions in the ``bench_*.py`` modules."""
+    for module_path in sorted(BENCHMARK_FOLDER.glob("bench_*.py")):
+        module = import_module(f"{__package__}.{module_path.stem}")
+        for name in sorted(dir(module)):
+            func = getattr(module, name)
+            if name.startswith("bench_") and callable(func):
+                yield f"{module_path.stem}.{name}", func
+
+
+def plugin_version() -> str:
+    """Read the plugin version from plugin.py.
+
+    The plugin must not be imported before the app exists.
+    """
+    plugin_source = (PROJECT_ROOT / "plugins" / PLUGIN_PACKAGE / "plugin.py").read_text()
+    match = re.search(r"^__version__ = [\"']([^\"']+)[\"']", plugin_source, re.MULTILINE)
+    return match.group(1) if match else "unknown"
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]]):
+    """Print the change of the median latency relative to the baseline."""
+    baseline_latency = {
+        (r["name"], dumps(r["params"], sort_keys=True)): r["latency_ms"]["p50"]
+        for r in baseline
+        if "latency_ms" in r
+    }
+    print("\nchange of the p50 latency:")
+    for result in results:
+        key = (result["name"], dumps(result["params"], sort_keys=True))
+        if "latency_ms" not in result or key not in baseline_latency:
+            continue
+        change = result["latency_ms"]["p50"] / baseline_latency[key] - 1
+        print(f"  {result['name']:40} {change:+8.1%}")
+
+
+def main(argv: List[str]):
+    parser = ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this string")
+    parser.add_argument("--repeat", type=int, default=5, help="measured runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured runs per case")
+    parser.add_argument("--no-allocations", action="store_true", help="do not trace allocations")
+    parser.add_argument("--output", default="", help="the result file (default: benchmarks/results/<version>.json)")
+    parser.add_argument("--compare", default="", help="a result file to compare the results with")
+    args = parser.parse_args(argv)
+
+    version = plugin_version()
+    runner = BenchmarkRunner(args.repeat, args.warmup, allocations=not args.no_allocations)
+    for name, benchmark in discover_benchmarks():
+        if args.filter in name:
+            print(f"\n{name}")
+            benchmark(runner)
+
+    output = Path(args.output) if args.output else BENCHMARK_FOLDER / "results" / f"{version}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        dumps(
+            {
+                "plugin": PLUGIN_PACKAGE,
+                "version": version,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": runner.results,
+            },
+            indent=2,
+        )
+    )
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(runner.results, loads(Path(args.compare).read_text())["results"])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
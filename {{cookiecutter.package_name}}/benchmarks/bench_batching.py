@@ -0,0 +1,63 @@
+"""Vectorized batch processing (batching.py) vs. a naive per row loop."""
+
+from functools import partial
+from math import log1p, sqrt
+from os import devnull
+from typing import Dict, Iterator
+
+from .harness import BenchmarkRunner
+
+# the number of processed rows per run
+ROWS = 1_000_000
+# the batch sizes to compare
+BATCH_SIZES = (1_000, 10_000, 100_000)
+
+
+def iter_rows(rows: int) -> Iterator[Dict[str, str]]:
+    """Rows as they are produced by inputs.iter_csv."""
+    for i in range(rows):
+        yield {"ID": f"entity-{i}", "value": str(i * 0.5)}
+
+
+def transform(columns):
+    import numpy as np
+
+    values = columns["value"]
+    return {"ID": columns["ID"], "value": np.sqrt(values) * 2 + np.log1p(values)}
+
+
+def naive_loop(rows: int):
+    with open(devnull, "w") as output:
+        output.write("ID,value\n")
+        for row in iter_rows(rows):
+            value = float(row["value"])
+            output.write(f"{row['ID']},{sqrt(value) * 2 + log1p(value)}\n")
+
+
+def bench_batching(runner: BenchmarkRunner):
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("skipped (numpy is not installed)")
+        return
+
+    with runner.app_context():  # the plugin package is loaded by the plugin runner
+        from {{cookiecutter.package_name}}.batching import process_batches
+
+        def batched(rows: int, batch_size: int):
+            with open(devnull, "w") as output:
+                process_batches(
+                    iter_rows(rows), transform, output, {"ID": object, "value": float}, batch_size=batch_size
+                )
+
+        runner.measure(
+            "naive_loop", lambda: naive_loop(ROWS), params={"rows": ROWS}, items=ROWS, unit="rows"
+        )
+        for batch_size in BATCH_SIZES:
+            runner.measure(
+                f"process_batches[{batch_size}]",
+                partial(batched, ROWS, batch_size),
+                params={"rows": ROWS, "batch_size": batch_size},
+                items=ROWS,
+                unit="rows",
+            )
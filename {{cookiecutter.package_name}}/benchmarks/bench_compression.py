@@ -0,0 +1,65 @@
+"""Compression ratio and throughput of representative CSV and json outputs."""
+
+import gzip
+from io import BytesIO
+from json import dumps
+from time import perf_counter
+from typing import Callable, Dict
+
+from .harness import BenchmarkRunner
+
+# the number of rows of the generated outputs
+OUTPUT_ROWS = 200_000
+
+
+def csv_output(rows: int) -> bytes:
+    lines = ["ID,href,x,y,label\n"]
+    lines.extend(
+        f"entity-{i},http://example.com/entities/{i},{i * 0.25},{(i % 97) / 7},class-{i % 5}\n"
+        for i in range(rows)
+    )
+    return "".join(lines).encode()
+
+
+def json_output(rows: int) -> bytes:
+    return "".join(
+        dumps({"ID": f"entity-{i}", "href": f"http://example.com/entities/{i}", "values": [i, i * 0.5]}) + "\n"
+        for i in range(rows)
+    ).encode()
+
+
+def _codecs() -> Dict[str, Dict[str, Callable[[bytes], bytes]]]:
+    codecs = {
+        "gzip": {"compress": lambda data: gzip.compress(data, 6), "decompress": gzip.decompress}
+    }
+    try:
+        import zstandard
+    except ImportError:
+        return codecs  # zstd is optional
+    codecs["zstd"] = {
+        "compress": zstandard.ZstdCompressor(level=3).compress,
+        "decompress": lambda data: zstandard.ZstdDecompressor().stream_reader(BytesIO(data)).read(),
+    }
+    return codecs
+
+
+def _mib_per_s(size: int, seconds: float) -> float:
+    return round(size / (1024 * 1024) / seconds, 1)
+
+
+def bench_compression(runner: BenchmarkRunner):
+    for output_name, output in (("csv", csv_output(OUTPUT_ROWS)), ("json", json_output(OUTPUT_ROWS))):
+        for codec_name, codec in _codecs().items():
+            start = perf_counter()
+            compressed = codec["compress"](output)
+            write_time = perf_counter() - start
+            start = perf_counter()
+            codec["decompress"](compressed)
+            read_time = perf_counter() - start
+            runner.record(
+                f"compression[{codec_name}, {output_name}]",
+                params={"codec": codec_name, "output": output_name, "size": len(output)},
+                ratio=round(len(output) / len(compressed), 2),
+                write_mib_s=_mib_per_s(len(output), write_time),
+                read_mib_s=_mib_per_s(len(output), read_time),
+            )
@@ -0,0 +1,85 @@
+"""The pooled http session (http_session.py) compared with ``requests.get``.
+
+A local stub server answers every request with a small json document (like
+the entity metadata a task fetches per entity). ``requests.get`` opens a new
+connection for every request, the shared session reuses its keep-alive
+connections. The cases run sequentially and from concurrent threads (like the
+threads of a task fetching entities in parallel).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from typing import Callable
+
+from .harness import BenchmarkRunner
+
+# the number of requests per run
+REQUESTS = 500
+# the number of concurrent threads of the concurrent cases
+CONCURRENCY = 8
+
+RESPONSE_BODY = b'{"ID": "entity-1", "href": "http://example.com/entities/1", "value": 0.5}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep the connections alive
+    disable_nagle_algorithm = True  # headers and body are separate writes (no delayed ack on kept alive connections)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass  # logging every request slows the server down
+
+
+def fetch_all(get: Callable[[str], object], url: str, concurrency: int):
+    urls = [url] * REQUESTS
+    if concurrency == 1:
+        for request_url in urls:
+            get(request_url).content
+        return
+    with ThreadPoolExecutor(concurrency) as pool:
+        for response in pool.map(get, urls):
+            response.content
+
+
+def bench_http_session(runner: BenchmarkRunner):
+    import requests
+
+    with runner.app_context():  # the plugin package is loaded by the plugin runner
+        from {{cookiecutter.package_name}}.http_session import create_session
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        server.daemon_threads = True
+        thread = Thread(target=server.serve_forever, name="stub-server", daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_port}/entities/1"
+        session = create_session(pool_size=CONCURRENCY)
+        try:
+            for concurrency in (1, CONCURRENCY):
+                params = {"requests": REQUESTS, "concurrency": concurrency}
+                runner.measure(
+                    f"http[requests.get, {concurrency}]",
+                    partial(fetch_all, partial(requests.get, timeout=10), url, concurrency),
+                    params=params,
+                    items=REQUESTS,
+                    unit="requests",
+                )
+                runner.measure(
+                    f"http[session, {concurrency}]",
+                    partial(fetch_all, session.get, url, concurrency),
+                    params=params,
+                    items=REQUESTS,
+                    unit="requests",
+                )
+        finally:
+            session.close()
+            server.shutdown()
+            server.server_close()
+            thread.join()
@@ -0,0 +1,50 @@
+"""Requests per second of the micro frontend with and without the form cache.
+
+The QHAna UI requests the empty form of the plugin every time it is shown.
+``api.get_empty_form`` renders it once per plugin version and url context
+(``_EMPTY_FORM_CACHE``), the uncached case clears the cache before every
+request (the render path of every request before the cache). Requests with
+the ETag of the form are answered with 304 Not Modified.
+"""
+
+from functools import partial
+
+from .harness import BenchmarkRunner
+
+# the number of requests per run
+REQUESTS = 200
+
+
+def get_form(client, url: str, headers: dict, clear_cache: bool = False):
+    from {{cookiecutter.package_name}}.api import _EMPTY_FORM_CACHE
+
+    for _ in range(REQUESTS):
+        if clear_cache:
+            _EMPTY_FORM_CACHE.clear()
+        response = client.get(url, headers=headers)
+        assert response.status_code in (200, 304), response.status_code
+
+
+def bench_micro_frontend(runner: BenchmarkRunner):
+    with runner.app_context() as app:  # the plugin package is loaded by the plugin runner
+        from flask.helpers import url_for
+
+        from {{cookiecutter.package_name}}.api import PLUGIN_BLP
+
+        with app.test_request_context():
+            url = url_for(f"{PLUGIN_BLP.name}.MicroFrontend")
+        client = app.test_client()
+        etag = client.get(url).headers["ETag"]
+
+        for name, headers, clear_cache in (
+            ("uncached", {}, True),
+            ("cached", {}, False),
+            ("cached, If-None-Match", {"If-None-Match": etag}, False),
+        ):
+            runner.measure(
+                f"micro_frontend[{name}]",
+                partial(get_form, client, url, headers, clear_cache),
+                params={"requests": REQUESTS, "case": name},
+                items=REQUESTS,
+                unit="requests",
+            )
@@ -0,0 +1,86 @@
+"""Streaming task results (output.result_writer) vs. the old in-memory output.
+
+Before ``result_writer`` the task wrote its result into a
+``SpooledTemporaryFile(mode="w")`` without a size limit, i.e. the whole
+result was copied into memory before the STORE persisted it. The peak RSS
+growth is measured in a forked process per case (the RSS of the benchmark
+process never shrinks), the bytes copied into memory are the peak of the
+traced allocations.
+"""
+
+from functools import partial
+from multiprocessing import get_all_start_methods, get_context
+from tempfile import SpooledTemporaryFile
+from typing import IO, Callable, Optional
+
+from .harness import BenchmarkRunner, peak_rss_mib
+
+# the number of rows of the written results
+OUTPUT_ROWS = (100_000, 1_000_000)
+
+
+def write_rows(output: IO, rows: int):
+    for i in range(rows):
+        output.write(f"entity-{i},http://example.com/entities/{i},{i * 0.5}\n")
+
+
+def spooled_output(db_id: int, rows: int):
+    """The output path of the task before result_writer."""
+    from qhana_plugin_runner.storage import STORE
+
+    with SpooledTemporaryFile(mode="w") as output:
+        write_rows(output, rows)
+        output.seek(0)
+        STORE.persist_task_result(db_id, output, "spooled.txt", "text", "text/plain")
+
+
+def streamed_output(db_id: int, rows: int):
+    from {{cookiecutter.package_name}}.output import result_writer
+
+    with result_writer(db_id, "streamed.txt", "text", "text/plain", compression="none") as output:
+        write_rows(output, rows)
+
+
+def rss_growth_mib(func: Callable[[], None]) -> Optional[float]:
+    """The growth of the peak RSS while func runs once in a forked process.
+
+    None if the peak RSS is not available.
+    """
+    if "fork" not in get_all_start_methods() or peak_rss_mib() is None:
+        return None
+    from qhana_plugin_runner.db.db import DB
+
+    context = get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+
+    def run():
+        DB.engine.dispose()  # do not use the DB connections of the parent process
+        start = peak_rss_mib()
+        func()
+        sender.send(peak_rss_mib() - start)
+
+    process = context.Process(target=run)
+    process.start()
+    growth = receiver.recv()
+    process.join()
+    return growth
+
+
+def bench_output(runner: BenchmarkRunner):
+    with runner.app_context():  # the plugin package is loaded by the plugin runner
+        from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+        db_task = ProcessingTask(task_name="bench_output", parameters="{}")
+        db_task.save(commit=True)
+
+        for rows in OUTPUT_ROWS:
+            for name, output in (("spooled", spooled_output), ("result_writer", streamed_output)):
+                func = partial(output, db_task.id, rows)
+                params = {"rows": rows, "output": name}
+                result = runner.measure(f"output[{name}, {rows}]", func, params=params, items=rows, unit="rows")
+                runner.record(
+                    f"output[{name}, {rows}, memory]",
+                    params,
+                    peak_rss_growth_mib=rss_growth_mib(func),
+                    copied_to_memory_mib=result.get("allocated_peak_kib", 0) / 1024,
+                )
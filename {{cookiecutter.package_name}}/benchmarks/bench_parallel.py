@@ -0,0 +1,118 @@
+"""The data-parallel task layout (parallel_tasks.py) and its worker scaling.
+
+``parallel[celery]`` runs the whole task layout through ``split_task`` (split,
+chord over the shard tasks, merge and save_task_result) with celery in eager
+mode, i.e. one shard after the other in the benchmark process. Compared with
+``parallel[serial]`` (``compute_shard`` over all shards without celery) it
+shows the overhead of the task layout.
+
+The scaling is estimated by computing the shards with a pool of 1, 2, 4, ...
+workers, like the shard tasks by that many celery worker processes. Every
+call only receives its shard (like the message of a shard task), not the
+task parameters. Threads show the scaling of code that releases the GIL (e.g.
+numpy), forked processes the scaling of pure python code. The shard results
+are passed back to the benchmark process like to the chord callback.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from multiprocessing import get_all_start_methods, get_context
+from os import cpu_count
+from typing import Any, Callable, Dict, List
+
+from .harness import BenchmarkRunner
+
+# the number of input items split into shards
+INPUT_SIZE = 1_000_000
+# the number of items per shard (the shard_size parameter)
+SHARD_SIZE = 10_000
+# the parameters a shard task sees (the input is only passed as shards)
+SHARD_PARAMETERS = {"shard_size": SHARD_SIZE}
+
+
+class NeverCancelled:
+    """Stand-in for the CancellationToken of the shard tasks (no DB access)."""
+
+    def raise_if_cancelled(self):
+        pass
+
+
+def compute_single_shard(shard: Any) -> Any:
+    """Compute a shard in a pool worker (only the shard is sent to it)."""
+    from {{cookiecutter.package_name}}.computation import compute_shard
+
+    return compute_shard(SHARD_PARAMETERS, shard, NeverCancelled())
+
+
+def worker_counts() -> List[int]:
+    """1, 2, 4, ... up to (and including) the number of cpu cores."""
+    cores = cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    if cores > 1:
+        counts.append(cores)
+    return counts
+
+
+def pools() -> Dict[str, Callable[[int], Executor]]:
+    available: Dict[str, Callable[[int], Executor]] = {"threads": ThreadPoolExecutor}
+    if "fork" in get_all_start_methods():
+        # forked processes inherit the loaded plugin package (no app context)
+        available["processes"] = partial(ProcessPoolExecutor, mp_context=get_context("fork"))
+    return available
+
+
+def run_parallel_task(parameters: Dict[str, Any]):
+    """Run the data-parallel task layout of a new processing task.
+
+    Celery runs in eager mode, the shard tasks run one after the other.
+    """
+    from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+    from {{cookiecutter.package_name}}.parallel_tasks import create_parallel_task_chain, split_task
+    from {{cookiecutter.package_name}}.parameters import encode_parameters
+
+    db_task = ProcessingTask(task_name=split_task.name, parameters=encode_parameters(parameters))
+    db_task.save(commit=True)
+
+    create_parallel_task_chain(db_task.id).apply_async()
+
+    db_task = ProcessingTask.get_by_id(id_=db_task.id)
+    if db_task.task_status != "SUCCESS":
+        raise RuntimeError(f"Task {db_task.id} failed:\n{db_task.task_log}")
+
+
+def bench_parallel(runner: BenchmarkRunner):
+    with runner.app_context():  # the plugin package is loaded by the plugin runner
+        from {{cookiecutter.package_name}}.computation import split_input
+
+        task_parameters = {"example_value": "x" * INPUT_SIZE, "shard_size": SHARD_SIZE}
+        shards = split_input(task_parameters, SHARD_SIZE)
+        params = {"input_size": INPUT_SIZE, "shard_size": SHARD_SIZE}
+
+        def run(pool: Executor) -> List[Any]:
+            return list(pool.map(compute_single_shard, shards))
+
+        runner.measure(
+            "parallel[celery]",
+            partial(run_parallel_task, task_parameters),
+            params={**params, "workers": 1, "pool": "celery eager"},
+            items=INPUT_SIZE,
+        )
+        runner.measure(
+            "parallel[serial]",
+            lambda: [compute_single_shard(shard) for shard in shards],
+            params={**params, "workers": 0},
+            items=INPUT_SIZE,
+        )
+        for pool_name, create_pool in pools().items():
+            for workers in worker_counts():
+                # the pool is started once, like long running celery workers
+                with create_pool(workers) as pool:
+                    runner.measure(
+                        f"parallel[{pool_name}, {workers}]",
+                        partial(run, pool),
+                        params={**params, "pool": pool_name, "workers": workers},
+                        items=INPUT_SIZE,
+                    )
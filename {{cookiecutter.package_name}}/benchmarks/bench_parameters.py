@@ -0,0 +1,50 @@
+"""Encoding of large task parameters (parameters.py) vs. plain json."""
+
+from json import dumps, loads
+from random import Random
+from typing import Any, Dict
+
+from .harness import BenchmarkRunner
+
+# the size of the inline matrix parameter (rows x columns)
+MATRIX_SHAPE = (1_000, 100)
+# the number of ids of the entity id list parameter
+ID_COUNT = 100_000
+
+
+def large_parameters() -> Dict[str, Any]:
+    random = Random(42)
+    rows, columns = MATRIX_SHAPE
+    return {
+        "example_value": "benchmark",
+        "matrix": [[random.random() for _ in range(columns)] for _ in range(rows)],
+        "entity_ids": [f"entity-{i}" for i in range(ID_COUNT)],
+    }
+
+
+def bench_parameters(runner: BenchmarkRunner):
+    with runner.app_context():  # the plugin package is loaded by the plugin runner
+        from {{cookiecutter.package_name}}.parameters import LazyParameters, encode_parameters
+
+        parameters = large_parameters()
+        params = {"matrix_shape": list(MATRIX_SHAPE), "id_count": ID_COUNT}
+        plain = dumps(parameters)
+        encoded = encode_parameters(parameters)
+        runner.record("parameters[row size]", params, json_bytes=len(plain), encoded_bytes=len(encoded))
+
+        runner.measure("parameters[encode, json]", lambda: dumps(parameters), params=params)
+        runner.measure("parameters[encode, encoded]", lambda: encode_parameters(parameters), params=params)
+        # the task only reads a small parameter
+        runner.measure(
+            "parameters[small field, json]", lambda: loads(plain)["example_value"], params=params
+        )
+        runner.measure(
+            "parameters[small field, encoded]",
+            lambda: LazyParameters(encoded)["example_value"],
+            params=params,
+        )
+        # the task reads all parameters
+        runner.measure("parameters[all fields, json]", lambda: dict(loads(plain)), params=params)
+        runner.measure(
+            "parameters[all fields, encoded]", lambda: dict(LazyParameters(encoded)), params=params
+        )
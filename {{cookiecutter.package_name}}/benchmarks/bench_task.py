@@ -0,0 +1,60 @@
+"""End to end benchmark of the background task of the plugin."""
+
+from functools import partial
+from json import dumps
+from pathlib import Path
+from typing import Any, Dict
+
+from .harness import BenchmarkRunner
+
+# the number of input entities per case
+INPUT_SIZES = (1_000, 100_000)
+
+# the parameter sets to benchmark (the input_file_url is added per input size)
+PARAMETER_SETS: Dict[str, Dict[str, Any]] = {
+    "default": {"example_value": "benchmark"},
+    "gzip": {"example_value": "benchmark", "compression": "gzip"},
+}
+
+
+def write_csv_input(path: Path, size: int) -> str:
+    """Write an entity list with ``size`` entities and return its file url."""
+    with path.open("w", encoding="utf-8", newline="") as csv_file:
+        csv_file.write("ID,href,value\n")
+        for i in range(size):
+            csv_file.write(f"entity-{i},http://example.com/entities/{i},{i * 0.5}\n")
+    return path.resolve().as_uri()
+
+
+def run_task(parameters: Dict[str, Any]):
+    """Run the task chain of a new processing task.
+
+    Celery runs in eager mode, i.e. the task chain runs synchronously.
+    """
+    from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+    from {{cookiecutter.package_name}}.plugin_code import background_task, create_task_chain
+
+    db_task = ProcessingTask(task_name=background_task.name, parameters=dumps(parameters))
+    db_task.save(commit=True)
+
+    create_task_chain(db_task.id).apply_async()
+
+    db_task = ProcessingTask.get_by_id(id_=db_task.id)
+    if db_task.task_status != "SUCCESS":
+        raise RuntimeError(f"Task {db_task.id} failed:\n{db_task.task_log}")
+
+
+def bench_background_task(runner: BenchmarkRunner):
+    with runner.app_context():
+        for size in INPUT_SIZES:
+            input_url = write_csv_input(runner.work_dir / f"entities-{size}.csv", size)
+            for name, parameters in PARAMETER_SETS.items():
+                parameters = {**parameters, "input_file_url": input_url}
+                runner.measure(
+                    f"background_task[{name}, {size}]",
+                    partial(run_task, parameters),
+                    params={"parameter_set": name, "input_size": size},
+                    items=size,
+                    unit="entities",
+                )
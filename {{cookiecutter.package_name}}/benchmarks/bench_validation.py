@@ -0,0 +1,81 @@
+"""Validation throughput of the parameters schema with and without fast path.
+
+The fast path is implemented in fast_validation.py.
+"""
+
+from functools import partial
+from typing import Any, Dict
+
+import marshmallow as ma
+from marshmallow import EXCLUDE
+
+from .harness import BenchmarkRunner
+
+# the number of fields per type of the wide schema
+FIELDS_PER_TYPE = 10
+# the number of values of every list field
+LIST_SIZE = 10_000
+# the number of parameter sets of a batch submission
+BATCH_SIZE = 1_000
+
+
+def wide_schema_fields() -> Dict[str, ma.fields.Field]:
+    fields: Dict[str, ma.fields.Field] = {}
+    for i in range(FIELDS_PER_TYPE):
+        fields[f"text_{i}"] = ma.fields.String(required=True, validate=ma.validate.Length(max=100))
+        fields[f"count_{i}"] = ma.fields.Integer(validate=ma.validate.Range(min=0))
+        fields[f"weight_{i}"] = ma.fields.Float(load_default=1.0)
+        fields[f"flag_{i}"] = ma.fields.Boolean()
+        fields[f"values_{i}"] = ma.fields.List(ma.fields.Float())
+    return fields
+
+
+def wide_payload() -> Dict[str, Any]:
+    payload: Dict[str, Any] = {}
+    for i in range(FIELDS_PER_TYPE):
+        payload.update(
+            {
+                f"text_{i}": "some text",
+                f"count_{i}": str(i),  # form values are strings
+                f"weight_{i}": "0.5",
+                f"flag_{i}": "true",
+                f"values_{i}": [j * 0.5 for j in range(LIST_SIZE)],
+            }
+        )
+    return payload
+
+
+def bench_validation(runner: BenchmarkRunner):
+    with runner.app_context():  # the plugin package is loaded by the plugin runner
+        from qhana_plugin_runner.api.util import FrontendFormBaseSchema
+
+        from {{cookiecutter.package_name}}.api import {{cookiecutter.base_classname}}ParametersSchema
+        from {{cookiecutter.package_name}}.fast_validation import FastLoadMixin
+
+        fields = wide_schema_fields()
+        payload = wide_payload()
+        for name, bases in (("marshmallow", (ma.Schema,)), ("fast", (FastLoadMixin, ma.Schema))):
+            schema = type(f"Wide{name.title()}Schema", bases, dict(fields))(unknown=EXCLUDE)
+            runner.measure(
+                f"validation[wide, {name}]",
+                partial(schema.load, payload),
+                params={"schema": "wide", "variant": name, "list_size": LIST_SIZE},
+                unit="payloads",
+            )
+
+        # the plugin schema with the fast path compared with the same fields
+        # without it
+        plugin_fields = {{cookiecutter.base_classname}}ParametersSchema._declared_fields
+        batch = [{"example_value": f"value {i}", "time_limit": "60"} for i in range(BATCH_SIZE)]
+        for name, schema_class in (
+            ("marshmallow", type("PlainParametersSchema", (FrontendFormBaseSchema,), dict(plugin_fields))),
+            ("fast", {{cookiecutter.base_classname}}ParametersSchema),
+        ):
+            schema = schema_class(many=True, unknown=EXCLUDE)
+            runner.measure(
+                f"validation[batch, {name}]",
+                partial(schema.load, batch),
+                params={"schema": "parameters", "variant": name, "batch_size": BATCH_SIZE},
+                items=BATCH_SIZE,
+                unit="parameter sets",
+            )
@@ -0,0 +1,196 @@
+"""Local benchmark harness for the plugin (run with ``invoke bench``).
+
+Benchmarks are functions named ``bench_*`` in the ``bench_*.py`` modules of
+this folder. They receive a :class:`BenchmarkRunner` and call
+:meth:`BenchmarkRunner.measure` for every case they want to record.
+"""
+
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from os import environ
+from pathlib import Path
+from statistics import mean
+from tempfile import mkdtemp
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # pragma: no cover (windows)
+    resource = None
+
+# the folder containing README.md
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# the plugin package inside the plugins folder
+PLUGIN_PACKAGE = "{{cookiecutter.package_name}}"
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """The percentile of already sorted values.
+
+    Interpolates linearly between the closest ranks.
+    """
+    if not sorted_values:
+        return float("nan")
+    rank = (len(sorted_values) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def peak_rss_mib() -> Optional[float]:
+    """The peak resident set size of this process in MiB.
+
+    None if it is not available on this platform.
+    """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return max_rss / (1024 * 1024)  # bytes on mac os
+    return max_rss / 1024  # kibibytes on linux
+
+
+class BenchmarkRunner:
+    """Runs benchmark cases and collects their results.
+
+    The plugin runner app is only created if a benchmark needs it (see
+    :meth:`app_context`). It uses a SQLite DB and the local filesystem STORE
+    in a temporary instance folder and runs celery tasks eagerly in the
+    benchmark process.
+    """
+
+    def __init__(self, repeat: int = 5, warmup: int = 1, allocations: bool = True) -> None:
+        """Create a benchmark runner.
+
+        Args:
+            repeat (int, optional): the number of measured runs per case.
+                Defaults to 5.
+            warmup (int, optional): the number of unmeasured runs before the
+                measured runs. Defaults to 1.
+            allocations (bool, optional): trace the memory allocations of an
+                extra run per case. Defaults to True.
+        """
+        self.repeat = repeat
+        self.warmup = warmup
+        self.allocations = allocations
+        self.results: List[Dict[str, Any]] = []
+        self._app = None
+        self._work_dir: Optional[Path] = None
+
+    @property
+    def work_dir(self) -> Path:
+        """A temporary folder for generated inputs and the instance folder."""
+        if self._work_dir is None:
+            self._work_dir = Path(mkdtemp(prefix=f"{PLUGIN_PACKAGE}-bench-"))
+        return self._work_dir
+
+    @property
+    def app(self):
+        """The plugin runner app (created on first use)."""
+        if self._app is None:
+            self._app = self._create_app()
+        return self._app
+
+    def _create_app(self):
+        instance_folder = self.work_dir / "instance"
+        instance_folder.mkdir(exist_ok=True)
+        environ["QHANA_PLUGIN_RUNNER_INSTANCE_FOLDER"] = str(instance_folder)
+        sys.path.insert(0, str(PROJECT_ROOT / "plugins"))
+
+        from qhana_plugin_runner import create_app
+        from qhana_plugin_runner.celery import CELERY
+        from qhana_plugin_runner.db.db import DB
+
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": f"sqlite:///{instance_folder / 'bench.db'}",
+                "PLUGIN_FOLDERS": [str(PROJECT_ROOT / "plugins")],
+            }
+        )
+        # run all tasks synchronously in this process
+        # (no broker or worker needed)
+        CELERY.conf.update(task_always_eager=True, task_eager_propagates=False)
+        with app.app_context():
+            DB.create_all()
+        return app
+
+    @contextmanager
+    def app_context(self) -> Iterator[Any]:
+        """Enter the app context of the plugin runner app."""
+        with self.app.app_context():
+            yield self.app
+
+    def measure(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        items: int = 1,
+        unit: str = "items",
+    ) -> Dict[str, Any]:
+        """Measure the latency of ``func`` and record the result.
+
+        Args:
+            name (str): the name of the benchmark case
+            func (Callable[[], Any]): the function to measure (called once per
+                run)
+            params (Optional[Dict[str, Any]], optional): the parameters of the
+                case (stored with the result). Defaults to None.
+            items (int, optional): the number of items processed per run (for
+                the throughput). Defaults to 1.
+            unit (str, optional): the unit of the items. Defaults to "items".
+
+        Returns:
+            Dict[str, Any]: the recorded result
+        """
+        for _ in range(self.warmup):
+            func()
+
+        durations: List[float] = []
+        for _ in range(self.repeat):
+            start = perf_counter()
+            func()
+            durations.append(perf_counter() - start)
+        durations.sort()
+
+        result: Dict[str, Any] = {
+            "name": name,
+            "params": params or {},
+            "runs": len(durations),
+            "latency_ms": {
+                "min": durations[0] * 1000,
+                "mean": mean(durations) * 1000,
+                "p50": percentile(durations, 50) * 1000,
+                "p95": percentile(durations, 95) * 1000,
+                "p99": percentile(durations, 99) * 1000,
+                "max": durations[-1] * 1000,
+            },
+            "throughput": {"value": items / percentile(durations, 50), "unit": f"{unit}/s"},
+            "peak_rss_mib": peak_rss_mib(),  # peak of the whole process so far
+        }
+
+        if self.allocations:
+            # separate run, tracing slows down every allocation
+            tracemalloc.start()
+            try:
+                func()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            result["allocated_peak_kib"] = peak / 1024
+
+        self.results.append(result)
+        print(
+            f"{name:40} p50 {result['latency_ms']['p50']:10.2f} ms"
+            f"  p95 {result['latency_ms']['p95']:10.2f} ms"
+            f"  {result['throughput']['value']:12.1f} {unit}/s"
+        )
+        return result
+
+    def record(self, name: str, params: Optional[Dict[str, Any]] = None, **values: Any):
+        """Record a result that is not a latency (e.g. a compression ratio)."""
+        self.results.append({"name": name, "params": params or {}, **values})
+        print(f"{name:40} " + "  ".join(f"{k} {v}" for k, v in values.items()))
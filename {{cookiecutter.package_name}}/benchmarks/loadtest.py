@@ -0,0 +1,290 @@
+"""HTTP load test of the plugin endpoints.
+
+Usage: ``python -m benchmarks.loadtest [--mix metadata=70,ui=20,process=10]``
+
+The plugin runner app is served by a local threaded werkzeug server (with
+the SQLite DB and filesystem STORE of the benchmark harness). Concurrent
+clients send a weighted mix of requests to the endpoints of the plugin for
+a fixed duration. The latency percentiles and the throughput are recorded
+per endpoint in the same result format as the benchmarks.
+"""
+
+import platform
+import sys
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dumps, loads
+from pathlib import Path
+from random import Random
+from statistics import mean
+from threading import Barrier, Lock, Thread
+from time import perf_counter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .__main__ import BENCHMARK_FOLDER, compare, plugin_version
+from .bench_task import write_csv_input
+from .harness import PLUGIN_PACKAGE, BenchmarkRunner, percentile
+
+
+class Endpoint(NamedTuple):
+    method: str
+    view: str  # the endpoint name of the view in the plugin blueprint
+    form: Optional[Dict[str, str]] = None
+
+
+# the endpoints that can be used in a request mix
+ENDPOINTS: Dict[str, Endpoint] = {
+    "metadata": Endpoint("GET", "PluginView"),  # metadata polling of the QHAna UI
+    "ui": Endpoint("GET", "MicroFrontend"),  # rendering the micro frontend
+    "process": Endpoint("POST", "ProcessView", {"example_value": "loadtest"}),  # task submissions
+}
+
+DEFAULT_MIX = "metadata=70,ui=20,process=10"
+
+# celery configurations for the task submissions
+BROKERS = {
+    # run the task in the request thread (submissions include the task run)
+    "eager": {"task_always_eager": True},
+    # publish the task to an in-memory broker without a worker
+    # (submissions only include publishing)
+    "memory": {
+        "task_always_eager": False,
+        "broker_url": "memory://",
+        "result_backend": "cache+memory://",
+    },
+}
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """Parse a request mix of endpoint=weight pairs.
+
+    For example ``metadata=70,ui=20,process=10``.
+    """
+    weights: Dict[str, int] = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(
+                f"Unknown endpoint '{name}' in the request mix, use one of {', '.join(ENDPOINTS)}."
+            )
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def start_server(app) -> Tuple[Any, Thread]:
+    """Serve the app on a free local port in a background thread."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass  # logging every request slows the server down
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietRequestHandler)
+    thread = Thread(target=server.serve_forever, name="loadtest-server", daemon=True)
+    thread.start()
+    return server, thread
+
+
+class LoadTest:
+    """Sends a weighted mix of requests from concurrent clients.
+
+    The latencies of the requests are collected per endpoint.
+    """
+
+    def __init__(
+        self, base_url: str, urls: Dict[str, str], weights: Dict[str, int], form: Dict[str, str]
+    ) -> None:
+        self.base_url = base_url
+        self.urls = urls
+        self.weights = weights
+        self.form = form
+        self.latencies: Dict[str, List[float]] = {name: [] for name in weights}
+        self.errors: Dict[str, int] = {name: 0 for name in weights}
+        self._lock = Lock()
+
+    def request(self, session, name: str) -> Tuple[float, bool]:
+        endpoint = ENDPOINTS[name]
+        data = {**endpoint.form, **self.form} if endpoint.form is not None else None
+        start = perf_counter()
+        try:
+            # do not follow the redirect to the task resource of a submission
+            response = session.request(
+                endpoint.method, self.base_url + self.urls[name], data=data, allow_redirects=False
+            )
+            response.content  # read the whole response
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        return perf_counter() - start, ok
+
+    def _client(self, seed: int, barrier: Barrier, duration: float):
+        import requests
+
+        random = Random(seed)  # reproducible request sequence per client
+        names = list(self.weights)
+        weights = [self.weights[name] for name in names]
+        latencies: Dict[str, List[float]] = {name: [] for name in names}
+        errors: Dict[str, int] = {name: 0 for name in names}
+        with requests.Session() as session:
+            barrier.wait()
+            deadline = perf_counter() + duration
+            while perf_counter() < deadline:
+                name = random.choices(names, weights)[0]
+                latency, ok = self.request(session, name)
+                latencies[name].append(latency)
+                if not ok:
+                    errors[name] += 1
+        with self._lock:
+            for name in names:
+                self.latencies[name].extend(latencies[name])
+                self.errors[name] += errors[name]
+
+    def warmup(self):
+        """Send one request per endpoint.
+
+        The first requests load templates and create DB connections.
+        """
+        import requests
+
+        with requests.Session() as session:
+            for name in self.weights:
+                self.request(session, name)
+
+    def run(self, concurrency: int, duration: float) -> float:
+        """Run the clients for duration seconds and return the wall time."""
+        barrier = Barrier(concurrency + 1)
+        clients = [
+            Thread(target=self._client, args=(seed, barrier, duration), name=f"loadtest-client-{seed}")
+            for seed in range(concurrency)
+        ]
+        for client in clients:
+            client.start()
+        barrier.wait()
+        start = perf_counter()
+        for client in clients:
+            client.join()
+        return perf_counter() - start
+
+
+def summarize(
+    name: str, latencies: List[float], errors: int, wall_time: float, params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """A result in the format of ``BenchmarkRunner.measure``.
+
+    The result has no memory measurements.
+    """
+    latencies = sorted(latencies)
+    nan = float("nan")
+    result: Dict[str, Any] = {
+        "name": name,
+        "params": params,
+        "requests": len(latencies),
+        "errors": errors,
+        "latency_ms": {
+            "min": latencies[0] * 1000 if latencies else nan,
+            "mean": mean(latencies) * 1000 if latencies else nan,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": latencies[-1] * 1000 if latencies else nan,
+        },
+        "throughput": {"value": len(latencies) / wall_time, "unit": "requests/s"},
+    }
+    print(
+        f"{name:40} {len(latencies):8} requests {errors:6} errors"
+        f"  p50 {result['latency_ms']['p50']:9.2f} ms"
+        f"  p95 {result['latency_ms']['p95']:9.2f} ms"
+        f"  p99 {result['latency_ms']['p99']:9.2f} ms"
+        f"  {result['throughput']['value']:9.1f} requests/s"
+    )
+    return result
+
+
+def main(argv: List[str]):
+    parser = ArgumentParser(prog="python -m benchmarks.loadtest", description=__doc__)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"the request mix as endpoint=weight pairs (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=8, help="the number of concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to send requests")
+    parser.add_argument("--broker", choices=list(BROKERS), default="eager", help="how submitted tasks are run")
+    parser.add_argument("--input-size", type=int, default=0, help="entities of the input file of submissions (0 for no input file)")
+    parser.add_argument("--output", default="", help="the result file (default: benchmarks/results/loadtest-<version>.json)")
+    parser.add_argument("--compare", default="", help="a result file to compare the results with")
+    args = parser.parse_args(argv)
+
+    weights = parse_mix(args.mix)
+    version = plugin_version()
+    runner = BenchmarkRunner()
+    app = runner.app
+
+    from flask.helpers import url_for
+    from qhana_plugin_runner.celery import CELERY
+
+    from {{cookiecutter.package_name}}.api import PLUGIN_BLP
+
+    CELERY.conf.update(BROKERS[args.broker])
+
+    with app.test_request_context():
+        urls = {
+            name: url_for(f"{PLUGIN_BLP.name}.{endpoint.view}")
+            for name, endpoint in ENDPOINTS.items()
+        }
+    form: Dict[str, str] = {}
+    if args.input_size:
+        form["input_file_url"] = write_csv_input(runner.work_dir / "entities.csv", args.input_size)
+
+    server, thread = start_server(app)
+    try:
+        load_test = LoadTest(f"http://127.0.0.1:{server.server_port}", urls, weights, form)
+        load_test.warmup()
+        print(f"\n{len(weights)} endpoints, {args.concurrency} clients, {args.duration:g} s ({args.broker} broker)")
+        wall_time = load_test.run(args.concurrency, args.duration)
+    finally:
+        server.shutdown()
+        thread.join()
+
+    params = {
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "broker": args.broker,
+        "input_size": args.input_size,
+    }
+    results = [
+        summarize(
+            f"loadtest[{name}]", load_test.latencies[name], load_test.errors[name], wall_time, params
+        )
+        for name in weights
+    ]
+    results.append(
+        summarize(
+            "loadtest[total]",
+            [latency for latencies in load_test.latencies.values() for latency in latencies],
+            sum(load_test.errors.values()),
+            wall_time,
+            params,
+        )
+    )
+
+    output = Path(args.output) if args.output else BENCHMARK_FOLDER / "results" / f"loadtest-{version}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        dumps(
+            {
+                "plugin": PLUGIN_PACKAGE,
+                "version": version,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, loads(Path(args.compare).read_text())["results"])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,9 +1,11 @@
 from http import HTTPStatus
 from json import dumps, loads
-from tempfile import SpooledTemporaryFile
+from contextlib import contextmanager
+from io import TextIOWrapper
+from tempfile import TemporaryFile
 from textwrap import dedent
 from datetime import datetime
-from typing import Any, Mapping, Optional, List, Dict, Tuple
+from typing import IO, Any, Iterator, Mapping, Optional, List, Dict, Tuple
 
 import marshmallow as ma
 from celery.canvas import chain
@@ -227,6 +229,73 @@ class {{cookiecutter.base_classname}}(QHAnaPluginBase):
 
 TASK_LOGGER = get_task_logger(__name__)
 
+# size of the chunks that are written to the backing file of a result
+# (and peak memory used for buffering)
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+
+@contextmanager
+def result_writer(
+    db_id: int,
+    file_name: str,
+    file_type: str,
+    mimetype: str,
+    *,
+    binary: bool = False,
+    encoding: Optional[str] = "utf-8",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[IO]:
+    """Open a write handle for a task result that is persisted in the STORE.
+
+    Written data is pushed to a disk backed temporary file in fixed size chunks
+    as it is produced. Only one chunk is ever kept in memory and writes block
+    while a full chunk is flushed to disk (back-pressure for fast producers).
+    The result is only persisted if the block exits without an exception, so
+    partial results never end up in the STORE.
+
+    Only writing the result is streamed: ``STORE.persist_task_result`` takes a
+    complete file, so the finished temporary file is handed to the STORE in a
+    single call on exit. The storage provider copies it from the file (it is
+    never read into memory as a whole), but the result is not visible in the
+    STORE before the block exits.
+
+    Usage::
+
+        with result_writer(db_id, "out.csv", "entity/list", "text/csv") as out:
+            for row in rows:
+                out.write(row)
+
+    Args:
+        db_id (int): the database id of the processing task
+        file_name (str): the file name of the result
+        file_type (str): the data type of the result (e.g. "entity/list")
+        mimetype (str): the content type of the result (e.g. "text/csv")
+        binary (bool, optional): yield a binary handle instead of a text
+            handle. Defaults to False.
+        encoding (Optional[str], optional): the text encoding (ignored if
+            binary). Defaults to "utf-8".
+        chunk_size (int, optional): the size of the chunks written to disk.
+            Defaults to DEFAULT_CHUNK_SIZE.
+
+    Yields:
+        IO: the file handle to write the result into
+    """
+    if chunk_size < 1:
+        raise ValueError(f"The chunk size must be positive (got {chunk_size}).")
+    with TemporaryFile(mode="w+b", buffering=chunk_size) as raw_output:
+        text_output: Optional[TextIOWrapper] = None
+        output: IO = raw_output
+        if not binary:
+            text_output = output = TextIOWrapper(output, encoding=encoding, newline="")
+        try:
+            yield output
+            output.flush()
+            output.seek(0)
+            STORE.persist_task_result(db_id, output, file_name, file_type, mimetype)
+        finally:
+            if text_output is not None:
+                text_output.detach()  # raw_output is closed by the outer context manager
+
 
 # task names must be globally unique => use full versioned plugin identifier to scope name
 @CELERY.task(name=f"{{'{'}}{{cookiecutter.base_classname}}.instance.identifier{{'}'}}.demo_task", bind=True)
@@ -249,9 +318,8 @@ def background_task(self, db_id: int) -> str:
     # TODO implement your background task
     ############################################################################
     
-    # write output
-    with SpooledTemporaryFile(mode="w") as output:
+    # write output (streamed to disk in chunks, persisted in the STORE on exit)
+    with result_writer(
+        db_id, "{{cookiecutter.plugin_identifier}}.txt", "text", "text/plain"
+    ) as output:
         output.write("TODO")
-        STORE.persist_task_result(
-            db_id, output, "{{cookiecutter.plugin_identifier}}.txt", "text", "text/plain"
-        )
@@ -1,2 +1,8 @@
 from .plugin import __version__ # import plugin and version constant
+from .config import get_bool_setting
 from . import plugin_code # must happen last to avoid import problems
+
+# optional data-parallel task layout (endpoint process/parallel/),
+# delete parallel_tasks.py if not needed
+if get_bool_setting("PARALLEL_TASKS", False):
+    from . import parallel_tasks  # noqa: F401 (registers the tasks and the endpoint)
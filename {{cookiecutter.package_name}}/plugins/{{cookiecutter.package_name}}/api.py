@@ -1,3 +1,4 @@
+from hashlib import sha256
 from http import HTTPStatus
 from typing import Any, Mapping, Optional, List, Dict, Tuple
 
@@ -17,9 +18,19 @@ from qhana_plugin_runner.api.plugin_schemas import (
     PluginType,
     EntryPoint,
 )
-from qhana_plugin_runner.api.util import FrontendFormBaseSchema, SecurityBlueprint
+from qhana_plugin_runner.api.util import (
+    FileUrl,
+    FrontendFormBaseSchema,
+    MaBaseSchema,
+    SecurityBlueprint,
+)
 
+from .config import get_int_setting
+from .fast_validation import FastLoadMixin
+from .instrumentation import METRICS, TASK_METRICS_ENABLED
+from .output import COMPRESSION_SUFFIXES, NPY_CONTENT_TYPE, compressed_content_types
 from .plugin import {{cookiecutter.base_classname}}
+from .profiling import PROFILE_MODES
 
 # Blueprint to register API endpoints with
 PLUGIN_BLP = SecurityBlueprint( #SecurityBlueprint for eventual JWT support
@@ -28,8 +39,10 @@ PLUGIN_BLP = SecurityBlueprint( #SecurityBlueprint for eventual JWT support
     description="{{cookiecutter.description}}",
 )
 
+
 # Input parameters of the plugin
-class {{cookiecutter.base_classname}}ParametersSchema(FrontendFormBaseSchema):
+# (valid input is loaded by the fast path of FastLoadMixin)
+class {{cookiecutter.base_classname}}ParametersSchema(FastLoadMixin, FrontendFormBaseSchema):
     example_value = ma.fields.String(
         required=True,
         allow_none=False,
@@ -38,6 +51,138 @@ class {{cookiecutter.base_classname}}ParametersSchema(FrontendFormBaseSchema):
             "description": "A simple string example value.",
         },
     )
+    input_file_url = FileUrl(
+        required=False,
+        allow_none=True,
+        data_input_type="entity/list",  # must match an entry in data_input of the plugin metadata
+        data_content_types=["text/csv", "application/json"],
+        metadata={
+            "label": "Input Entities",
+            "description": "An optional CSV or json lines file with entities (streamed by the task).",
+        },
+    )
+    time_limit = ma.fields.Integer(
+        required=False,
+        allow_none=True,
+        validate=ma.validate.Range(min=1),
+        metadata={
+            "label": "Time Limit",
+            "description": "Optional time limit of the task in seconds.",
+        },
+    )
+    compression = ma.fields.String(
+        required=False,
+        allow_none=True,
+        validate=ma.validate.OneOf(["none", *COMPRESSION_SUFFIXES]),
+        metadata={
+            "label": "Result Compression",
+            "description": "Compress the result with gzip or zstd (or none). Leave empty for the default of the plugin runner.",
+        },
+    )
+    profile = ma.fields.String(
+        required=False,
+        allow_none=True,
+        validate=ma.validate.OneOf(PROFILE_MODES),
+        metadata={
+            "label": "Profile Task",
+            "description": "Profile the task with cprofile or a sampling profiler (or none). The profile is added to the task results.",
+        },
+    )
+
+
+# Response of the batch submission endpoint
+class BatchSubmissionResponseSchema(MaBaseSchema):
+    tasks = ma.fields.List(
+        ma.fields.String(),
+        required=True,
+        allow_none=False,
+        metadata={"description": "The URLs of the created tasks (in the order of the submitted parameters)."},
+    )
+
+
+def build_plugin_metadata(plugin: {{cookiecutter.base_classname}}) -> PluginMetadata:
+    """Build the plugin metadata.
+
+    Must be called inside a request context as it uses url_for.
+    """
+    return PluginMetadata(
+        # human readable title and description
+        title=plugin.name,
+        description=PLUGIN_BLP.description,
+        # machine readable identifying name and version
+        name=plugin.identifier,
+        version=plugin.version,
+        # pluin type: "processing"|"visualizing"|"conversion" (actual values still WIP!! confirm with current documentation)
+        type=PluginType.processing,
+        # tags describing the plugin, e.g. ml:autoencoder, ml:svm
+        tags=[],
+        # the main plugin entry point
+        entry_point=EntryPoint(
+            # entry point for headless (non-gui) applications
+            href=url_for(f"{PLUGIN_BLP.name}.ProcessView"),
+            # micro frontend entry point
+            ui_href=url_for(f"{PLUGIN_BLP.name}.MicroFrontend"),
+            # definition of (required) input data
+            data_input=[
+                DataMetadata(
+                    data_type="entity/list",
+                    content_type=["text/csv", "application/json"],
+                    required=False,
+                )
+            ],
+            # definition of output data
+            data_output=[
+                DataMetadata(
+                    data_type="txt",
+                    content_type=compressed_content_types("text/plain"),
+                    required=True,
+                ),
+                # optional binary output for numerical data
+                # (see output.persist_array)
+                DataMetadata(
+                    data_type="array",
+                    content_type=[NPY_CONTENT_TYPE],
+                    required=False,
+                ),
+                DataMetadata(
+                    data_type="profile",
+                    content_type=["application/octet-stream", "text/plain"],
+                    required=False,
+                ),
+            ],
+        ),
+    )
+
+
+# the generated urls depend on the host and the prefix (SCRIPT_NAME)
+# the app is served under
+MetadataCacheKey = Tuple[str, str]
+
+# serialized plugin metadata and its ETag for every url context
+_METADATA_CACHE: Dict[MetadataCacheKey, Tuple[str, str]] = {}
+_METADATA_CACHE_MAX_ENTRIES = 32
+
+# seconds clients (e.g. the QHAna backend and UI) may use the metadata
+# without revalidating it
+METADATA_MAX_AGE = get_int_setting("METADATA_MAX_AGE", 60)
+
+
+def get_serialized_plugin_metadata(plugin: {{cookiecutter.base_classname}}) -> Tuple[str, str]:
+    """Get the serialized plugin metadata and its ETag (cached per url context).
+
+    The metadata only changes with the plugin version (i.e. on restart), so it
+    is built and serialized only once per url context.
+    """
+    cache_key: MetadataCacheKey = (request.host_url, request.script_root)
+    cached = _METADATA_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    body = PluginMetadataSchema().dumps(build_plugin_metadata(plugin))
+    etag = sha256(body.encode("utf-8")).hexdigest()
+    if len(_METADATA_CACHE) >= _METADATA_CACHE_MAX_ENTRIES:
+        _METADATA_CACHE.clear()  # only reachable with many different hosts or prefixes
+    _METADATA_CACHE[cache_key] = (body, etag)
+    return body, etag
 
 
 @PLUGIN_BLP.route("/")
@@ -51,35 +196,28 @@ class PluginView(MethodView):
         plugin = {{cookiecutter.base_classname}}.instance
         if plugin is None:
             abort(HTTPStatus.INTERNAL_SERVER_ERROR)
-        return PluginMetadata(
-            # human readable title and description
-            title=plugin.name,
-            description=PLUGIN_BLP.description,
-            # machine readable identifying name and version
-            name=plugin.identifier,
-            version=plugin.version,
-            # pluin type: "processing"|"visualizing"|"conversion" (actual values still WIP!! confirm with current documentation)
-            type=PluginType.processing,
-            # tags describing the plugin, e.g. ml:autoencoder, ml:svm
-            tags=[],
-            # the main plugin entry point
-            entry_point=EntryPoint(
-                # entry point for headless (non-gui) applications
-                href=url_for(f"{PLUGIN_BLP.name}.ProcessView"),
-                # micro frontend entry point
-                ui_href=url_for(f"{PLUGIN_BLP.name}.MicroFrontend"),
-                # definition of (required) input data
-                data_input=[],
-                # definition of output data
-                data_output=[
-                    DataMetadata(
-                        data_type="txt",
-                        content_type=["text/plain"],
-                        required=True,
-                    )
-                ],
-            ),
-        )
+        body, etag = get_serialized_plugin_metadata(plugin)
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)  # strong ETag
+        response.cache_control.max_age = METADATA_MAX_AGE
+        # answers requests with a matching If-None-Match header
+        # with 304 Not Modified
+        return response.make_conditional(request)
+
+
+@PLUGIN_BLP.route("/metrics/")
+class MetricsView(MethodView):
+    """Task stage metrics of this plugin in the prometheus text format."""
+
+    @PLUGIN_BLP.require_jwt("jwt", optional=True)
+    def get(self):
+        """Endpoint returning the task metrics.
+
+        Enable the TASK_METRICS setting to collect them.
+        """
+        if not TASK_METRICS_ENABLED:
+            abort(HTTPStatus.NOT_FOUND)
+        return Response(METRICS.exposition(), mimetype="text/plain; version=0.0.4")
 
 
 @PLUGIN_BLP.route("/ui/")
@@ -133,15 +271,50 @@ class MicroFrontend(MethodView):
         plugin = {{cookiecutter.base_classname}}.instance
         if plugin is None:
             abort(HTTPStatus.INTERNAL_SERVER_ERROR)
-        schema = {{cookiecutter.base_classname}}ParametersSchema()
-        return Response(
-            render_template(
-                "simple_template.html",
-                name=plugin.name,
-                version=plugin.version,
-                schema=schema, #schema is used to create the html form
-                values=data, # data is used to prefill values in the form
-                errors=errors, # errors is used to show error texts in the form
-                process=url_for(f"{PLUGIN_BLP.name}.ProcessView"), # the endpoint starting the background task
-            )
-        )
+        if not data and not errors:
+            # the empty form is the same for every request
+            # => serve it from the cache
+            html, etag = get_empty_form(plugin)
+            response = Response(html)
+            response.set_etag(etag)
+            return response.make_conditional(request)
+        return Response(render_form(plugin, data, errors))
+
+
+def render_form(plugin: {{cookiecutter.base_classname}}, data: Mapping, errors: dict) -> str:
+    """Render the html form of the micro frontend.
+
+    Must be called inside a request context as it uses url_for.
+    """
+    return render_template(
+        "simple_template.html",
+        name=plugin.name,
+        version=plugin.version,
+        schema=FORM_SCHEMA, #schema is used to create the html form
+        values=data, # data is used to prefill values in the form
+        errors=errors, # errors is used to show error texts in the form
+        process=url_for(f"{PLUGIN_BLP.name}.ProcessView"), # the endpoint starting the background task
+    )
+
+
+# the schema instance used to render the form
+# (the schema is stateless, so it can be reused)
+FORM_SCHEMA = {{cookiecutter.base_classname}}ParametersSchema()
+
+# rendered empty form and its ETag for every plugin version and url context
+_EMPTY_FORM_CACHE: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
+_EMPTY_FORM_CACHE_MAX_ENTRIES = 32
+
+
+def get_empty_form(plugin: {{cookiecutter.base_classname}}) -> Tuple[str, str]:
+    """Get the rendered empty form and its ETag (cached per url context)."""
+    cache_key = (plugin.version, request.host_url, request.script_root)
+    cached = _EMPTY_FORM_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    html = render_form(plugin, {}, {})
+    etag = sha256(html.encode("utf-8")).hexdigest()
+    if len(_EMPTY_FORM_CACHE) >= _EMPTY_FORM_CACHE_MAX_ENTRIES:
+        _EMPTY_FORM_CACHE.clear()  # only reachable with many different hosts or prefixes
+    _EMPTY_FORM_CACHE[cache_key] = (html, etag)
+    return html, etag
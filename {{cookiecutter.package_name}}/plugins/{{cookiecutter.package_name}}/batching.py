@@ -0,0 +1,120 @@
+# vectorized batch processing for row-wise plugin logic
+# entities are read in fixed size batches, converted to numpy columns, processed
+# by a single vectorized function call per batch and streamed to the output
+#
+# requires numpy (add it to get_requirements),
+# only import this module in computation.py
+
+from csv import writer
+from itertools import islice
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, TypeVar
+
+from .config import get_int_setting
+from .task_context import TaskContext
+
+T = TypeVar("T")
+
+# default number of entities per batch
+# (larger batches amortize the per batch overhead but need more memory)
+BATCH_SIZE = get_int_setting("BATCH_SIZE", 10_000)
+
+# a vectorized function mapping input columns to output columns
+# (arrays of the same length)
+BatchFunction = Callable[[Dict[str, Any]], Mapping[str, Any]]
+
+
+def iter_batches(items: Iterable[T], batch_size: int = BATCH_SIZE) -> Iterator[List[T]]:
+    """Group the items into lists of batch_size items.
+
+    The last batch may be smaller.
+    """
+    if batch_size < 1:
+        raise ValueError(f"The batch size must be positive (got {batch_size}).")
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def to_columns(batch: List[Mapping[str, Any]], dtypes: Mapping[str, Any]) -> Dict[str, Any]:
+    """Convert a batch of entities into one numpy array per column.
+
+    Args:
+        batch (List[Mapping[str, Any]]): the entities (e.g. the rows of a CSV
+            file)
+        dtypes (Mapping[str, Any]): the numpy dtype of every column to extract
+            (e.g. {"ID": object, "value": float}), use object for strings
+            that are only passed through (avoids copying them into a unicode
+            array)
+
+    Returns:
+        Dict[str, numpy.ndarray]: the columns in the order of dtypes
+    """
+    import numpy as np
+
+    # numpy parses numbers from strings,
+    # so CSV values need no conversion in python
+    return {name: np.array([entity[name] for entity in batch], dtype=dtype) for name, dtype in dtypes.items()}
+
+
+def write_columns(output: IO, columns: Mapping[str, Any], header: bool = False):
+    """Write the columns as CSV rows.
+
+    The values are formatted with str and quoted if needed.
+    """
+    csv_writer = writer(output, lineterminator="\n")
+    if header:
+        csv_writer.writerow(columns)
+    # tolist converts all values at once and the csv writer formats the whole
+    # batch in C (this is much faster than numpy.savetxt that formats every row
+    # separately)
+    csv_writer.writerows(zip(*(column.tolist() for column in columns.values())))
+
+
+def process_batches(
+    entities: Iterable[Mapping[str, Any]],
+    func: BatchFunction,
+    output: IO,
+    dtypes: Mapping[str, Any],
+    *,
+    batch_size: int = BATCH_SIZE,
+    context: Optional[TaskContext] = None,
+) -> int:
+    """Apply a vectorized function to the entities batch by batch.
+
+    The results are written to output as CSV.
+
+    Usage::
+
+        def scale(columns):
+            return {"ID": columns["ID"], "value": columns["value"] * 2}
+
+        dtypes = {"ID": object, "value": float}
+        process_batches(iter_entities(url), scale, output, dtypes)
+
+    Args:
+        entities (Iterable[Mapping[str, Any]]): the input entities (streamed,
+            only one batch is kept in memory)
+        func (BatchFunction): maps the input columns of a batch to its output
+            columns
+        output (IO): the text file handle the CSV rows are written to (with a
+            header row)
+        dtypes (Mapping[str, Any]): the numpy dtype of every input column
+        batch_size (int, optional): the number of entities per batch.
+            Defaults to BATCH_SIZE.
+        context (Optional[TaskContext], optional): checks for cancellation and
+            reports progress after every batch. Defaults to None.
+
+    Returns:
+        int: the number of processed entities
+    """
+    count = 0
+    for batch in iter_batches(entities, batch_size):
+        write_columns(output, func(to_columns(batch, dtypes)), header=(count == 0))
+        count += len(batch)
+        if context is not None:
+            context.cancellation.raise_if_cancelled()
+            context.report_progress(count, 0, "processing entities")  # total is unknown
+    return count
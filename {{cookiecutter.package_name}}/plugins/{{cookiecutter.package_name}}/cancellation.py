@@ -0,0 +1,93 @@
+from datetime import datetime
+from time import monotonic
+from typing import Dict, Optional
+
+from qhana_plugin_runner.db.db import DB
+from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+from .config import get_float_setting, get_int_setting
+
+# minimum number of seconds between two checks of the task status in the DB
+CANCEL_POLL_INTERVAL = get_float_setting("CANCEL_POLL_INTERVAL", 2.0)
+# default soft time limit of tasks in seconds (0 for no limit),
+# overridden by the time_limit parameter
+TASK_TIME_LIMIT = get_int_setting("TASK_TIME_LIMIT", 0)
+# seconds between the soft time limit (raises an exception in the task)
+# and the hard time limit (kills the worker process)
+TASK_TIME_LIMIT_GRACE = get_int_setting("TASK_TIME_LIMIT_GRACE", 30)
+
+
+def time_limit_options(time_limit: Optional[int] = None) -> Dict[str, int]:
+    """The celery options of a task with the given soft time limit in seconds.
+
+    The options are empty if the task has no time limit.
+
+    The soft limit raises SoftTimeLimitExceeded in the task, the hard limit
+    TASK_TIME_LIMIT_GRACE seconds later kills the worker process.
+
+    Args:
+        time_limit (Optional[int], optional): the soft time limit in seconds.
+            Defaults to the TASK_TIME_LIMIT setting.
+    """
+    time_limit = time_limit or TASK_TIME_LIMIT
+    if not time_limit:
+        return {}
+    return {"soft_time_limit": time_limit, "time_limit": time_limit + TASK_TIME_LIMIT_GRACE}
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task that was cancelled by the user."""
+
+
+def cancel_task(db_task: ProcessingTask):
+    """Mark the task as cancelled in the DB.
+
+    The running task stops at its next cancellation check.
+    """
+    db_task.task_status = "FAILURE"
+    db_task.finished_at = datetime.utcnow()
+    db_task.add_task_log_entry("Task was cancelled.")
+    db_task.save(commit=True)
+
+
+class CancellationToken:
+    """Cooperative cancellation check for a running task.
+
+    The task status is read from the DB at most every ``poll_interval``
+    seconds, all other checks only compare timestamps. This makes the check
+    cheap enough to be called inside the main loop of a task.
+
+    Usage::
+
+        for item in items:
+            cancellation.raise_if_cancelled()
+            ...
+    """
+
+    def __init__(self, db_id: int, poll_interval: float = CANCEL_POLL_INTERVAL) -> None:
+        self.db_id = db_id
+        self.poll_interval = poll_interval
+        self._cancelled = False
+        self._next_poll = 0.0  # check the DB on the first call
+
+    @property
+    def cancelled(self) -> bool:
+        """True if the task was cancelled (or finished by someone else)."""
+        if self._cancelled:
+            return True
+        now = monotonic()
+        if now < self._next_poll:
+            return False
+        self._next_poll = now + self.poll_interval
+        finished_at: Optional[datetime] = (
+            DB.session.query(ProcessingTask.finished_at)
+            .filter(ProcessingTask.id == self.db_id)
+            .scalar()
+        )
+        self._cancelled = finished_at is not None
+        return self._cancelled
+
+    def raise_if_cancelled(self):
+        """Raise TaskCancelled if the task was cancelled."""
+        if self.cancelled:
+            raise TaskCancelled(f"The task with db id '{self.db_id}' was cancelled.")
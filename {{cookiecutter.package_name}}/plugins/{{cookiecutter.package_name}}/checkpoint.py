@@ -0,0 +1,117 @@
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from time import monotonic
+from typing import Any, Callable, Optional
+
+from flask import current_app
+
+from .config import get_float_setting, get_int_setting
+from .plugin import {{cookiecutter.base_classname}}
+
+# minimum number of seconds between two saved checkpoints
+CHECKPOINT_INTERVAL = get_float_setting("CHECKPOINT_INTERVAL", 60.0)
+# maximum size of a serialized checkpoint in bytes
+CHECKPOINT_MAX_SIZE = get_int_setting("CHECKPOINT_MAX_SIZE", 10 * 1024 * 1024)
+
+
+class CheckpointTooLarge(ValueError):
+    """Raised if a serialized checkpoint exceeds the size limit."""
+
+
+class Checkpoint:
+    """Periodically persisted (json serializable) state of a task.
+
+    The checkpoint is keyed by the task db id.
+
+    If the worker process dies while the task runs, the task message is
+    redelivered and the task can resume from the last saved state instead of
+    starting over. Checkpoints are stored in the (shared) instance folder.
+
+    The output file of a killed run is lost, so write the output only after the
+    checkpointed loop (or store the partial results in the checkpoint state).
+
+    Usage::
+
+        state = checkpoint.load() or {"done": 0}
+        for i in range(state["done"], len(items)):
+            ...
+            state["done"] = i + 1
+            checkpoint.save(state)  # written every CHECKPOINT_INTERVAL seconds
+    """
+
+    def __init__(
+        self,
+        db_id: int,
+        interval: float = CHECKPOINT_INTERVAL,
+        max_size: int = CHECKPOINT_MAX_SIZE,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """Create the checkpoint of a task.
+
+        Args:
+            db_id (int): the database id of the processing task
+            interval (float, optional): minimum number of seconds between two
+                saved checkpoints. Defaults to CHECKPOINT_INTERVAL.
+            max_size (int, optional): maximum size of a serialized checkpoint
+                in bytes. Defaults to CHECKPOINT_MAX_SIZE.
+            clock (Callable[[], float], optional): the time source. Defaults
+                to monotonic.
+        """
+        self.db_id = db_id
+        self.interval = interval
+        self.max_size = max_size
+        self._clock = clock
+        self._last_save = clock()
+
+    @property
+    def path(self) -> Path:
+        """The path of the checkpoint file (requires an app context)."""
+        plugin = {{cookiecutter.base_classname}}.instance
+        return Path(current_app.instance_path) / "checkpoints" / plugin.identifier / f"{self.db_id}.json"
+
+    def load(self) -> Optional[Any]:
+        """Load the last saved state (None if the task starts fresh)."""
+        try:
+            return loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def save(self, state: Any, force: bool = False) -> bool:
+        """Save the state if the checkpoint interval has passed.
+
+        The interval is counted from the last saved state.
+
+        Args:
+            state (Any): the json serializable task state
+            force (bool, optional): save the state regardless of the interval.
+                Defaults to False.
+
+        Raises:
+            CheckpointTooLarge: if the serialized state exceeds the size limit
+
+        Returns:
+            bool: True if the state was saved
+        """
+        now = self._clock()
+        if not force and now - self._last_save < self.interval:
+            return False
+        content = dumps(state, separators=(",", ":"))
+        if len(content) > self.max_size:
+            raise CheckpointTooLarge(
+                f"The checkpoint of task '{self.db_id}' has {len(content)} bytes (limit: {self.max_size} bytes)."
+            )
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(content)
+        replace(tmp_path, path)  # atomic, a crash never leaves a partial checkpoint
+        self._last_save = now
+        return True
+
+    def clear(self):
+        """Delete the saved state (once the task has finished)."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,99 @@
+# when renaming this module also change the import in
+# plugin_code.background_task
+
+from itertools import islice
+from typing import IO, Any, List, Mapping
+
+from .cancellation import CancellationToken
+from .inputs import iter_entities
+from .task_context import TaskContext
+
+################################################################################
+# import plugin specific requirements in this module
+# the get_requirements method of the plugin class must be defined and functional
+# before any of the requirements specified in the method are imported!
+#
+# this module is imported lazily by the background task, i.e. only inside the
+# celery worker, so heavy requirements do not slow down the web process
+################################################################################
+
+
+def compute(task_parameters: Mapping[str, Any], output: IO, context: TaskContext):
+    """The computation of the plugin {{cookiecutter.plugin_name}}.
+
+    Args:
+        task_parameters (Mapping[str, Any]): the task parameters (large
+            values are decoded on first access)
+        output (IO): the text file handle the result is written to
+        context (TaskContext): progress reporting, cancellation and
+            checkpoints of the task
+    """
+    ############################################################################
+    # TODO implement your background task
+    # (use batching.process_batches for vectorized row-wise logic over large
+    # inputs)
+    ############################################################################
+    input_file_url = task_parameters.get("input_file_url")
+    if input_file_url:
+        # resume from the last checkpoint if the task was restarted
+        state = context.checkpoint.load() or {"entity_count": 0}
+        # stream the entities instead of loading the whole file into memory
+        entities = islice(iter_entities(input_file_url), state["entity_count"], None)
+        for _ in entities:
+            context.cancellation.raise_if_cancelled()
+            state["entity_count"] += 1
+            context.report_progress(state["entity_count"], 0, "reading input entities")  # total is unknown
+            context.checkpoint.save(state)  # only written every CHECKPOINT_INTERVAL seconds
+        # write the output only after the checkpointed loop,
+        # so a resumed run produces the same output
+        output.write(f"Input entities: {state['entity_count']}\n")
+    output.write("TODO")
+
+
+################################################################################
+# data-parallel computation used by the task layout in parallel_tasks.py
+# (delete these functions together with parallel_tasks.py if not needed)
+################################################################################
+
+
+def split_input(task_parameters: Mapping[str, Any], shard_size: int) -> List[Any]:
+    """Split the input of the computation into shards of shard_size items.
+
+    The last shard may have fewer items.
+
+    Args:
+        task_parameters (Mapping[str, Any]): the task parameters (large
+            values are decoded on first access)
+        shard_size (int): the maximum number of items per shard
+
+    Returns:
+        List[Any]: the (json serializable) shards that are processed in parallel
+    """
+    # TODO split your input data
+    items = list(task_parameters.get("example_value", ""))
+    return [items[i : i + shard_size] for i in range(0, len(items), shard_size)]
+
+
+def compute_shard(task_parameters: Mapping[str, Any], shard: Any, cancellation: CancellationToken) -> Any:
+    """Compute the (json serializable) partial result of a single shard.
+
+    Args:
+        task_parameters (Mapping[str, Any]): the task parameters (large
+            values are decoded on first access)
+        shard (Any): the shard (as returned by split_input)
+        cancellation (CancellationToken): call
+            cancellation.raise_if_cancelled() regularly to stop early
+    """
+    # TODO implement the computation of a single shard
+    results = []
+    for item in shard:
+        cancellation.raise_if_cancelled()
+        results.append(item.upper())
+    return results
+
+
+def merge_shards(task_parameters: Mapping[str, Any], shard_results: List[Any], output: IO):
+    """Merge the partial results of all shards (in shard order) into output."""
+    # TODO merge the partial results
+    for result in shard_results:
+        output.write("".join(result))
@@ -0,0 +1,43 @@
+from os import environ
+
+# all plugin settings are read from environment variables with this prefix
+# (e.g. {{cookiecutter.package_name | upper}}_RESULT_CACHE=true in the .env file)
+ENV_PREFIX = "{{cookiecutter.package_name | upper}}_"
+
+
+def get_setting(name: str, default: str = "") -> str:
+    """Get the raw value of a plugin setting.
+
+    Args:
+        name (str): the name of the setting (without ENV_PREFIX)
+        default (str, optional): the value used if the setting is not set.
+            Defaults to "".
+
+    Returns:
+        str: the setting value
+    """
+    return environ.get(ENV_PREFIX + name, default)
+
+
+def get_bool_setting(name: str, default: bool = False) -> bool:
+    """Get a boolean plugin setting ("1", "true", "yes" and "on" are true)."""
+    value = get_setting(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_int_setting(name: str, default: int) -> int:
+    """Get an integer plugin setting."""
+    value = get_setting(name)
+    if not value:
+        return default
+    return int(value)
+
+
+def get_float_setting(name: str, default: float) -> float:
+    """Get a float plugin setting."""
+    value = get_setting(name)
+    if not value:
+        return default
+    return float(value)
@@ -0,0 +1,213 @@
+from math import isinf, isnan
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Optional
+
+import marshmallow as ma
+from marshmallow import EXCLUDE, INCLUDE, RAISE
+from marshmallow.utils import missing
+
+# schema hooks that change the loaded data
+# (schemas using them always take the marshmallow path)
+_LOAD_HOOKS = {"pre_load", "post_load", "validates", "validates_schema"}
+
+
+class _NotFast(Exception):
+    """The value needs the full marshmallow deserialization of the field."""
+
+
+def _fast_string(field: ma.fields.String) -> Callable[[Any], Any]:
+    def convert(value):
+        if type(value) is not str:
+            raise _NotFast
+        return value
+
+    return convert
+
+
+def _fast_integer(field: ma.fields.Integer) -> Callable[[Any], Any]:
+    def convert(value):
+        if type(value) is int:
+            return value
+        if type(value) is str and not field.strict:
+            return int(value)  # same conversion as marshmallow (raises ValueError if invalid)
+        raise _NotFast
+
+    return convert
+
+
+def _fast_float(field: ma.fields.Float) -> Callable[[Any], Any]:
+    def convert(value):
+        if type(value) not in (float, int, str):
+            raise _NotFast
+        value = float(value)
+        if not field.allow_nan and (isnan(value) or isinf(value)):
+            raise _NotFast
+        return value
+
+    return convert
+
+
+def _fast_boolean(field: ma.fields.Boolean) -> Callable[[Any], Any]:
+    def convert(value):
+        if not field.truthy:
+            return bool(value)
+        if value in field.truthy:
+            return True
+        if value in field.falsy:
+            return False
+        raise _NotFast
+
+    return convert
+
+
+# converters for the exact field types
+# (subclasses like FileUrl or Email may validate more)
+_FAST_CONVERTERS: Dict[type, Callable[[Any], Callable[[Any], Any]]] = {
+    ma.fields.String: _fast_string,
+    ma.fields.Integer: _fast_integer,
+    ma.fields.Float: _fast_float,
+    ma.fields.Boolean: _fast_boolean,
+}
+
+
+def _with_validators(convert: Callable[[Any], Any], field: ma.fields.Field) -> Callable[[Any], Any]:
+    if not field.validators:
+        return convert
+    validators = tuple(field.validators)
+
+    def convert_and_validate(value):
+        value = convert(value)
+        for validator in validators:
+            if validator(value) is False:
+                raise _NotFast
+        return value
+
+    return convert_and_validate
+
+
+def compile_field(field: ma.fields.Field) -> Optional[Callable[[Any], Any]]:
+    """Compile a fast converter for a (not None) field value.
+
+    Returns None if the field has no fast path.
+    """
+    if type(field) is ma.fields.List:
+        convert_item = compile_field(field.inner)
+        if convert_item is None:
+            return None
+
+        def convert_list(value):
+            if type(value) not in (list, tuple):
+                raise _NotFast
+            return [convert_item(item) for item in value]
+
+        return _with_validators(convert_list, field)
+    factory = _FAST_CONVERTERS.get(type(field))
+    if factory is None:
+        return None
+    return _with_validators(factory(field), field)
+
+
+class CompiledField(NamedTuple):
+    name: str
+    data_key: str
+    attribute: str
+    field: ma.fields.Field
+    convert: Optional[Callable[[Any], Any]]
+
+
+class FastLoadMixin:
+    """Schema mixin loading valid input without the marshmallow machinery.
+
+    On the first load the fields of the schema are compiled into plain
+    converter functions (for String, Integer, Float, Boolean and lists of
+    them, other fields use their own ``deserialize``). Only if the fast path
+    rejects the input, the input is loaded again by marshmallow to produce
+    the exact same errors. Schemas with load hooks (``pre_load``,
+    ``post_load``, ``validates`` and ``validates_schema``) always use
+    marshmallow.
+
+    Usage::
+
+        class ParametersSchema(FastLoadMixin, FrontendFormBaseSchema):
+            ...
+    """
+
+    _compiled_fields: Optional[List[CompiledField]] = None
+    _known_keys: FrozenSet[str] = frozenset()
+
+    def _fast_path_enabled(self) -> bool:
+        hooks = getattr(self, "_hooks", {})
+        for key, hook_list in hooks.items():
+            tag = key[0] if isinstance(key, tuple) else key
+            if hook_list and tag in _LOAD_HOOKS:
+                return False
+        return True
+
+    def _compile(self) -> List[CompiledField]:
+        compiled = []
+        if self._fast_path_enabled():
+            for name, field in self.load_fields.items():
+                compiled.append(
+                    CompiledField(
+                        name,
+                        field.data_key if field.data_key is not None else name,
+                        field.attribute or name,
+                        field,
+                        compile_field(field),
+                    )
+                )
+        self._known_keys = frozenset(field.data_key for field in compiled)
+        self._compiled_fields = compiled
+        return compiled
+
+    def _fast_load_one(self, data: Any, partial, unknown: str) -> Dict[str, Any]:
+        if not isinstance(data, Mapping):
+            raise _NotFast
+        result: Dict[str, Any] = getattr(self, "dict_class", dict)()
+        for name, data_key, attribute, field, convert in self._compiled_fields:
+            raw_value = data.get(data_key, missing)
+            if raw_value is missing and (partial is True or (partial and name in partial)):
+                continue
+            if convert is not None and raw_value is not missing and raw_value is not None:
+                value = convert(raw_value)
+            else:
+                # same call marshmallow makes
+                # (handles missing values, defaults and None)
+                value = field.deserialize(raw_value, name, data)
+            if value is not missing:
+                result[attribute] = value
+        if unknown != EXCLUDE:
+            self._fast_load_unknown(data, unknown, result)
+        return result
+
+    def _fast_load_unknown(self, data: Mapping, unknown: str, result: Dict[str, Any]):
+        """Handle the unknown keys of data (like marshmallow)."""
+        for key in data:
+            if key in self._known_keys:
+                continue
+            if unknown == RAISE:
+                raise _NotFast
+            if unknown == INCLUDE:
+                result[key] = data[key]
+
+    def load(self, data, *, many=None, partial=None, unknown=None):
+        compiled_fields = self._compiled_fields
+        if compiled_fields is None:
+            compiled_fields = self._compile()
+        if compiled_fields:
+            many = self.many if many is None else bool(many)
+            partial = self.partial if partial is None else partial
+            unknown = unknown or self.unknown
+            try:
+                if many:
+                    if not isinstance(data, list):
+                        raise _NotFast
+                    result: Any = [self._fast_load_one(item, partial, unknown) for item in data]
+                else:
+                    result = self._fast_load_one(data, partial, unknown)
+            except (_NotFast, ma.ValidationError, ValueError, TypeError):
+                pass  # let marshmallow produce the error messages
+            else:
+                if getattr(self, "validate_errors_as_result", False):
+                    return {}  # the input has no validation errors
+                return result
+        return super().load(data, many=many, partial=partial, unknown=unknown)
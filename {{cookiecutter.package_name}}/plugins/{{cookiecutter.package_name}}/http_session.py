@@ -0,0 +1,98 @@
+from os import getpid
+from random import uniform
+from threading import Lock
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .config import get_float_setting, get_int_setting
+
+# maximum number of pooled (keep-alive) connections per host
+HTTP_POOL_SIZE = get_int_setting("HTTP_POOL_SIZE", 10)
+# number of retries for failed idempotent requests
+# (connection errors and 502/503/504 responses)
+HTTP_RETRIES = get_int_setting("HTTP_RETRIES", 3)
+# base of the exponential backoff between retries in seconds
+# (randomized with full jitter)
+HTTP_BACKOFF = get_float_setting("HTTP_BACKOFF", 0.5)
+# default (connect, read) timeouts in seconds
+HTTP_TIMEOUT: Tuple[float, float] = (
+    get_float_setting("HTTP_CONNECT_TIMEOUT", 5.0),
+    get_float_setting("HTTP_READ_TIMEOUT", 60.0),
+)
+
+
+class JitteredRetry(Retry):
+    """Retry configuration with full jitter.
+
+    The retries of many tasks do not happen in lockstep.
+    """
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return uniform(0, backoff) if backoff > 0 else 0
+
+
+class PluginSession(requests.Session):
+    """Session applying a default timeout to all requests."""
+
+    def __init__(self, timeout: Tuple[float, float] = HTTP_TIMEOUT) -> None:
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(
+    pool_size: int = HTTP_POOL_SIZE,
+    retries: int = HTTP_RETRIES,
+    backoff: float = HTTP_BACKOFF,
+    timeout: Tuple[float, float] = HTTP_TIMEOUT,
+) -> requests.Session:
+    """Create a new session with a bounded keep-alive connection pool.
+
+    The session retries failed requests and sets default timeouts.
+    """
+    session = PluginSession(timeout=timeout)
+    retry = JitteredRetry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,  # return the last response instead of raising
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# the session of the process that created it (see get_session)
+_SESSION: Optional[requests.Session] = None
+_SESSION_PID: Optional[int] = None
+_SESSION_LOCK = Lock()
+
+
+def get_session() -> requests.Session:
+    """Get the shared session of the current process.
+
+    Use it for all outbound http requests. Connections are reused across all
+    tasks running in the same worker process. Sessions are never shared
+    between processes: the session is created lazily on first use and
+    recreated if the process id changed (i.e. in a forked celery worker
+    process), so this module does not have to be imported before the worker
+    processes are forked.
+    """
+    global _SESSION, _SESSION_PID
+    session = _SESSION
+    if session is not None and _SESSION_PID == getpid():
+        return session
+    with _SESSION_LOCK:
+        if _SESSION is None or _SESSION_PID != getpid():
+            # first use in this process or inherited from the parent process
+            # by fork
+            _SESSION, _SESSION_PID = create_session(), getpid()
+        return _SESSION
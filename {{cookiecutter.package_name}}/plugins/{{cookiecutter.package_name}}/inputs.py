@@ -0,0 +1,272 @@
+import codecs
+from contextlib import contextmanager
+from csv import DictReader
+from hashlib import sha256
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from flask import current_app
+
+from .http_session import get_session
+
+# size of the chunks read from the network or the disk cache
+DEFAULT_CHUNK_SIZE = 256 * 1024  # 256 KiB
+
+# content types parsed as json lines (one json document per line)
+# by iter_entities
+JSON_LINES_CONTENT_TYPES = ("application/json", "application/x-ndjson", "application/jsonl")
+
+
+def input_cache_folder() -> Path:
+    """The folder of the local download cache (requires an app context)."""
+    return Path(current_app.instance_path) / "input_cache"
+
+
+def _cache_paths(url: str) -> Tuple[Path, Path]:
+    """The metadata file path and the data file prefix of a cached url."""
+    url_hash = sha256(url.encode("utf-8")).hexdigest()
+    folder = input_cache_folder()
+    return folder / f"{url_hash}.json", folder / url_hash
+
+
+def _read_cache_entry(metadata_path: Path) -> Optional[Dict[str, str]]:
+    """Read the metadata (etag, content type and data file) of a cached url."""
+    try:
+        metadata = loads(metadata_path.read_text())
+    except (OSError, ValueError):
+        return None
+    if not Path(metadata.get("file", "")).exists():
+        return None
+    return metadata
+
+
+def _write_text_atomic(path: Path, text: str):
+    """Write the file via a temporary file.
+
+    A concurrent reader never sees a partial file.
+    """
+    with NamedTemporaryFile("w", dir=path.parent, delete=False) as tmp_file:
+        tmp_file.write(text)
+    replace(tmp_file.name, path)
+
+
+def _download(chunks: Iterator[bytes], path: Path):
+    """Write the downloaded chunks to path.
+
+    The file is only replaced if the download succeeds.
+    """
+    download = NamedTemporaryFile(dir=path.parent, delete=False)
+    try:
+        with download:
+            for chunk in chunks:
+                download.write(chunk)
+        replace(download.name, path)
+    except BaseException:
+        # the download failed, do not leave the partial file in the cache folder
+        try:
+            Path(download.name).unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _iter_file(path: Path, chunk_size: int) -> Iterator[bytes]:
+    with path.open("rb") as file_:
+        while True:
+            chunk = file_.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+@contextmanager
+def _request_input(
+    url: str, chunk_size: int, store: bool = False
+) -> Iterator[Tuple[str, Optional[Path], Optional[Iterator[bytes]]]]:
+    """Request an input file using the local download cache.
+
+    Yields:
+        Tuple[str, Optional[Path], Optional[Iterator[bytes]]]: the content
+            type and either the path of the downloaded file or the (uncached)
+            response content
+    """
+    metadata_path, data_path_prefix = _cache_paths(url)
+    cached = _read_cache_entry(metadata_path)
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+
+    with get_session().get(url, headers=headers, stream=True) as response:
+        if cached and response.status_code == 304:
+            yield cached["content_type"], Path(cached["file"]), None
+            return
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        etag = response.headers.get("ETag")
+        chunks = response.iter_content(chunk_size=chunk_size)
+        if not etag and not store:
+            # cannot revalidate the file later => stream it without caching
+            yield content_type, None, chunks
+            return
+
+        # download into the cache first
+        folder = input_cache_folder()
+        folder.mkdir(parents=True, exist_ok=True)
+        if etag:
+            data_path = Path(f"{data_path_prefix}-{sha256(etag.encode('utf-8')).hexdigest()[:16]}")
+        else:
+            data_path = Path(f"{data_path_prefix}-latest")  # replaced on every download
+        _download(chunks, data_path)
+        if cached and cached["file"] != str(data_path):
+            try:
+                Path(cached["file"]).unlink()  # outdated version of the file
+            except FileNotFoundError:
+                pass
+        if etag:
+            _write_text_atomic(
+                metadata_path,
+                dumps({"etag": etag, "content_type": content_type, "file": str(data_path)}),
+            )
+    yield content_type, data_path, None
+
+
+@contextmanager
+def open_input(url: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, Iterator[bytes]]]:
+    """Open an input file referenced by url and stream its content in chunks.
+
+    Downloads with an ETag are cached on the local disk (keyed by url and ETag).
+    A cached file is revalidated with a conditional request and reused if the
+    server answers with 304 Not Modified. ``file://`` urls are read directly.
+
+    Usage::
+
+        with open_input(url) as (content_type, chunks):
+            for chunk in chunks:
+                ...
+
+    Args:
+        url (str): the url of the input file
+        chunk_size (int, optional): the size of the yielded chunks. Defaults
+            to DEFAULT_CHUNK_SIZE.
+
+    Yields:
+        Tuple[str, Iterator[bytes]]: the content type of the file and an
+            iterator over its content
+    """
+    parsed_url = urlparse(url)
+    if parsed_url.scheme == "file":
+        yield "", _iter_file(Path(url2pathname(parsed_url.path)), chunk_size)
+        return
+
+    with _request_input(url, chunk_size) as (content_type, path, chunks):
+        if path is not None:
+            chunks = _iter_file(path, chunk_size)
+        yield content_type, chunks
+
+
+def fetch_input_file(url: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[str, Path]:
+    """Get a local file with the content of the input file referenced by url.
+
+    The file is downloaded into the local download cache (``file://`` urls are
+    used directly). Do not modify the returned file!
+
+    Returns:
+        Tuple[str, Path]: the content type and the path of the local file
+    """
+    parsed_url = urlparse(url)
+    if parsed_url.scheme == "file":
+        return "", Path(url2pathname(parsed_url.path))
+    with _request_input(url, chunk_size, store=True) as (content_type, path, _):
+        assert path is not None
+        return content_type, path
+
+
+def load_array(url: str):
+    """Load a numpy array (``.npy`` file) memory-mapped.
+
+    The array is not read into memory. It is read-only and shares the memory
+    with the local (cached) file, so only the parts of the array that are
+    actually accessed are read from disk.
+
+    Returns:
+        numpy.ndarray: the memory-mapped array
+    """
+    import numpy as np  # optional requirement (add numpy to get_requirements to use this)
+
+    _, path = fetch_input_file(url)
+    return np.load(path, mmap_mode="r", allow_pickle=False)
+
+
+def iter_text_lines(chunks: Iterator[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    """Incrementally decode byte chunks and split them into lines.
+
+    The line endings are kept. Only "\\n" ends a line ("\\r\\n" line endings
+    are kept intact). Unlike with ``str.splitlines`` other unicode line
+    boundaries (e.g. U+2028 or "\\x0c" inside a json string or a quoted CSV
+    field) do not split the line.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    rest = ""
+    for chunk in chunks:
+        lines = (rest + decoder.decode(chunk)).split("\n")
+        # the last line is incomplete, wait for the next chunk
+        rest = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    rest += decoder.decode(b"", final=True)
+    if rest:
+        yield rest
+
+
+def parse_csv(chunks: Iterator[bytes], encoding: str = "utf-8", **reader_kwargs) -> Iterator[Dict[str, str]]:
+    """Incrementally parse CSV data (with a header row) into dicts."""
+    yield from DictReader(iter_text_lines(chunks, encoding), **reader_kwargs)
+
+
+def parse_json_lines(chunks: Iterator[bytes], encoding: str = "utf-8") -> Iterator[Any]:
+    """Incrementally parse json lines data (one json document per line)."""
+    for line in iter_text_lines(chunks, encoding):
+        if line.strip():
+            yield loads(line)
+
+
+def iter_csv(url: str, encoding: str = "utf-8", **reader_kwargs) -> Iterator[Dict[str, str]]:
+    """Stream the rows of a CSV file (with a header row) as dicts."""
+    with open_input(url) as (_, chunks):
+        yield from parse_csv(chunks, encoding, **reader_kwargs)
+
+
+def iter_json_lines(url: str, encoding: str = "utf-8") -> Iterator[Any]:
+    """Stream the documents of a json lines file."""
+    with open_input(url) as (_, chunks):
+        yield from parse_json_lines(chunks, encoding)
+
+
+def input_format(url: str, content_type: str) -> str:
+    """The format of an input file ("csv" or "json lines").
+
+    A known content type takes precedence, the file extension is only used
+    for other content types (e.g. ``text/plain`` or none for ``file://`` urls).
+    """
+    if content_type == "text/csv":
+        return "csv"
+    if content_type in JSON_LINES_CONTENT_TYPES:
+        return "json lines"
+    path = urlparse(url).path
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith((".json", ".jsonl")):
+        return "json lines"
+    raise ValueError(f"Unsupported content type '{content_type}' of input file {url}.")
+
+
+def iter_entities(url: str, encoding: str = "utf-8") -> Iterator[Any]:
+    """Stream the entities of a CSV or json lines file (see input_format)."""
+    with open_input(url) as (content_type, chunks):
+        if input_format(url, content_type) == "csv":
+            yield from parse_csv(chunks, encoding)
+        else:
+            yield from parse_json_lines(chunks, encoding)
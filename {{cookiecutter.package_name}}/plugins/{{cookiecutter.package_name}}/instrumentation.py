@@ -0,0 +1,297 @@
+from contextlib import contextmanager
+from json import dumps, loads
+from os import getpid, kill, name as os_name, replace
+from pathlib import Path
+from socket import gethostname
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional
+
+from celery.exceptions import Ignore, Retry, SoftTimeLimitExceeded
+from flask import current_app
+
+from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+from .cancellation import TaskCancelled
+from .config import get_bool_setting
+from .plugin import {{cookiecutter.base_classname}}
+
+try:
+    import fcntl
+except ImportError:  # windows (no celery prefork workers)
+    fcntl = None
+
+# write the stage timings of every task into the task log
+TASK_TIMINGS_ENABLED = get_bool_setting("TASK_TIMINGS", False)
+# collect the stage timings in a metrics registry that can be scraped from
+# the metrics endpoint
+TASK_METRICS_ENABLED = get_bool_setting("TASK_METRICS", False)
+
+# prefix of all metric names
+METRICS_PREFIX = "{{cookiecutter.package_name}}_task"
+
+
+class StageTiming:
+    """The duration and the number of processed bytes of a single task stage."""
+
+    __slots__ = ("name", "duration", "bytes")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.duration: float = 0.0
+        self.bytes: Optional[int] = None  # set while the stage runs to record a byte count
+
+
+class TaskTimer:
+    """Records the durations of the stages of a single task run.
+
+    Usage::
+
+        timer = task_timer()
+        with timer.stage("compute") as stage:
+            stage.bytes = compute(...)
+        timer.finish(task_data, "success")
+    """
+
+    def __init__(self) -> None:
+        self.stages: List[StageTiming] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageTiming]:
+        """Time the enclosed block as the task stage ``name``."""
+        stage = StageTiming(name)
+        start = perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.duration = perf_counter() - start
+            self.stages.append(stage)
+
+    def summary(self) -> str:
+        """Format the recorded stages as a single log message."""
+        parts = []
+        for stage in self.stages:
+            part = f"{stage.name}: {stage.duration * 1000:.1f} ms"
+            if stage.bytes is not None:
+                part += f" ({stage.bytes} bytes)"
+            parts.append(part)
+        return "Stage timings: " + ", ".join(parts)
+
+    def finish(self, task_data: Optional[ProcessingTask], outcome: str = "success"):
+        """Write the recorded stages to the task log and the metrics registry.
+
+        Both are only written if enabled in the settings.
+
+        Args:
+            task_data (Optional[ProcessingTask]): the task (None if it could
+                not be loaded)
+            outcome (str, optional): the outcome of the task run (see
+                task_outcome). Defaults to "success".
+        """
+        if TASK_TIMINGS_ENABLED and task_data is not None:
+            task_data.add_task_log_entry(f"{self.summary()} (outcome: {outcome})", commit=True)
+        if TASK_METRICS_ENABLED:
+            METRICS.record(self.stages, outcome)
+
+
+class _NullTimer(TaskTimer):
+    """No-op timer used if timings and metrics are disabled."""
+
+    _stage = StageTiming("")  # shared, values written to it are never read
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageTiming]:
+        yield self._stage
+
+    def finish(self, task_data: Optional[ProcessingTask], outcome: str = "success"):
+        pass
+
+
+# shared timer used if nothing is recorded
+NULL_TIMER = _NullTimer()
+
+
+def task_timer() -> TaskTimer:
+    """Get a timer for a new task run.
+
+    A shared no-op timer is returned if timings and metrics are disabled.
+    """
+    if TASK_TIMINGS_ENABLED or TASK_METRICS_ENABLED:
+        return TaskTimer()
+    return NULL_TIMER
+
+
+def task_outcome(error: Optional[BaseException]) -> str:
+    """The outcome of a task run that raised error (None if it succeeded)."""
+    if error is None:
+        return "success"
+    if isinstance(error, Ignore):
+        return "ignored"
+    if isinstance(error, Retry):
+        return "retry"
+    if isinstance(error, TaskCancelled):
+        return "cancelled"
+    if isinstance(error, SoftTimeLimitExceeded):
+        return "timeout"
+    return "failure"
+
+
+def _process_alive(pid: int) -> bool:
+    """Check if a process of this host is still running.
+
+    Always True on windows, the files of other processes are never merged.
+    """
+    if os_name == "nt":
+        # os.kill terminates the process on windows instead of checking it
+        return True
+    try:
+        kill(pid, 0)  # signal 0 only checks that the process exists
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # the process belongs to another user
+    return True
+
+
+class MetricsRegistry:
+    """Aggregates stage timings and outcomes of the tasks run by this process.
+
+    Tasks run in the worker processes while the metrics are scraped from the
+    web process. The aggregated values of every process are therefore written
+    to a file in the (shared) instance folder that the metrics endpoint reads.
+    The files of processes that are no longer running (e.g. recycled or
+    crashed worker processes) are merged into a single file when the metrics
+    are collected, so the counters never decrease and the number of files
+    stays bounded.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._outcomes: Dict[str, int] = {}
+
+    @staticmethod
+    def metrics_folder() -> Path:
+        """The folder with the metrics files of all processes.
+
+        Requires an app context.
+        """
+        plugin = {{cookiecutter.base_classname}}.instance
+        return Path(current_app.instance_path) / "metrics" / plugin.identifier
+
+    @staticmethod
+    def _write(path: Path, values: Dict[str, Any]):
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(dumps(values))
+        replace(tmp_path, path)  # atomic, readers never see a partial file
+
+    def record(self, stages: List[StageTiming], outcome: str = "success"):
+        """Add the stages and the outcome of a finished task.
+
+        The aggregated values of this process are written to its file.
+        """
+        with self._lock:
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+            for stage in stages:
+                values = self._stages.setdefault(
+                    stage.name, {"count": 0, "seconds": 0.0, "bytes": 0}
+                )
+                values["count"] += 1
+                values["seconds"] += stage.duration
+                if stage.bytes is not None:
+                    values["bytes"] += stage.bytes
+            content = {"stages": self._stages, "outcomes": self._outcomes}
+            folder = self.metrics_folder()
+            folder.mkdir(parents=True, exist_ok=True)
+            self._write(folder / f"{gethostname()}-{getpid()}.json", content)
+
+    @staticmethod
+    def _add(totals: Dict[str, Any], values: Dict[str, Any]):
+        """Add the aggregated values of a process to the totals."""
+        for name, stage_values in values.get("stages", {}).items():
+            total = totals["stages"].setdefault(name, {"count": 0, "seconds": 0.0, "bytes": 0})
+            for key, value in stage_values.items():
+                total[key] = total.get(key, 0) + value
+        for outcome, count in values.get("outcomes", {}).items():
+            totals["outcomes"][outcome] = totals["outcomes"].get(outcome, 0) + count
+
+    def _dead_process_files(self, folder: Path) -> List[Path]:
+        """The files of processes of this host that are no longer running."""
+        prefix = f"{gethostname()}-"
+        dead = []
+        for path in folder.glob(f"{prefix}*.json"):
+            pid = path.stem[len(prefix) :]
+            if pid.isdigit() and int(pid) != getpid() and not _process_alive(int(pid)):
+                dead.append(path)
+        return dead
+
+    def _prune(self, folder: Path):
+        """Merge the files of dead processes of this host into finished.json."""
+        if not self._dead_process_files(folder):
+            return
+        with (folder / ".prune.lock").open("a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # other web processes may prune at the same time
+            self._merge_finished(folder, self._dead_process_files(folder))
+
+    def _merge_finished(self, folder: Path, dead: List[Path]):
+        finished_path = folder / "finished.json"
+        finished = {"stages": {}, "outcomes": {}}
+        if finished_path.exists():
+            self._add(finished, loads(finished_path.read_text()))
+        for path in dead:
+            try:
+                self._add(finished, loads(path.read_text()))
+            except (FileNotFoundError, ValueError):
+                continue
+        # written before the files are deleted, a crash in between counts the
+        # values twice instead of losing them
+        self._write(finished_path, finished)
+        for path in dead:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def collect(self) -> Dict[str, Any]:
+        """Sum up the aggregated values of all processes.
+
+        The files of dead processes are pruned.
+        """
+        totals: Dict[str, Any] = {"stages": {}, "outcomes": {}}
+        folder = self.metrics_folder()
+        if not folder.exists():
+            return totals
+        with self._lock:
+            self._prune(folder)
+            for path in folder.glob("*.json"):
+                try:
+                    self._add(totals, loads(path.read_text()))
+                except (FileNotFoundError, ValueError):
+                    continue
+        return totals
+
+    def exposition(self) -> str:
+        """Render all metrics in the prometheus text exposition format."""
+        totals = self.collect()
+        name = f"{METRICS_PREFIX}_runs_total"
+        lines = [
+            f"# HELP {name} Number of finished task runs by outcome.",
+            f"# TYPE {name} counter",
+        ]
+        for outcome, count in sorted(totals["outcomes"].items()):
+            lines.append('%s{outcome="%s"} %s' % (name, outcome, count))
+        for metric, key, metric_type, help_text in (
+            ("stage_runs_total", "count", "counter", "Number of executions of a task stage."),
+            ("stage_seconds_total", "seconds", "counter", "Total duration of a task stage in seconds."),
+            ("stage_bytes_total", "bytes", "counter", "Total number of bytes processed by a task stage."),
+        ):
+            name = f"{METRICS_PREFIX}_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for stage, values in sorted(totals["stages"].items()):
+                lines.append('%s{stage="%s"} %s' % (name, stage, values.get(key, 0)))
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,180 @@
+# make sure only one run of a task works on its checkpoint at a time
+# background_task is acked late, so the broker redelivers the task message if
+# the worker process dies, but also if the task runs longer than the visibility
+# timeout of the broker (redis: 1 hour by default) while the first run is still
+# going; the lease turns such a duplicate delivery into a delayed retry
+
+from contextlib import contextmanager
+from json import dumps, loads
+from os import getpid, replace
+from pathlib import Path
+from socket import gethostname
+from tempfile import NamedTemporaryFile
+from threading import Event, Thread
+from time import time
+from typing import Any, Callable, Dict, Iterator, Optional
+from uuid import uuid4
+
+from flask import current_app
+
+from .config import get_float_setting, get_int_setting
+from .plugin import {{cookiecutter.base_classname}}
+
+try:
+    import fcntl
+except ImportError:  # windows (no celery prefork workers)
+    fcntl = None
+
+# seconds a lease stays valid without being renewed
+# (renewed every third of the time while the task runs)
+TASK_LEASE_TTL = get_float_setting("TASK_LEASE_TTL", 300.0)
+# maximum number of runs of a task, further deliveries
+# (e.g. after repeated worker crashes) fail the task
+TASK_MAX_DELIVERIES = get_int_setting("TASK_MAX_DELIVERIES", 3)
+
+
+class LeaseHeld(Exception):
+    """Raised if another (still running) run of the task holds the lease."""
+
+    def __init__(self, db_id: int, expires: float) -> None:
+        super().__init__(db_id, expires)  # the exception can be pickled (e.g. by the result backend)
+        self.db_id = db_id
+        self.expires = expires
+
+    def __str__(self) -> str:
+        return f"The task with db id '{self.db_id}' is already running in another worker."
+
+
+class TooManyDeliveries(RuntimeError):
+    """Raised if a task was started more often than TASK_MAX_DELIVERIES."""
+
+
+class TaskLease:
+    """Exclusive, expiring lease on a task run.
+
+    The lease is stored next to the task checkpoint.
+
+    The lease file also counts the runs of the task. It is only deleted when
+    a run finishes (successfully or with an error), so a run that was killed
+    together with its worker process still counts.
+
+    Usage::
+
+        lease = TaskLease(db_id)
+        lease.acquire()  # raises LeaseHeld or TooManyDeliveries
+        try:
+            ...
+        finally:
+            lease.release()
+    """
+
+    def __init__(
+        self,
+        db_id: int,
+        ttl: float = TASK_LEASE_TTL,
+        max_deliveries: int = TASK_MAX_DELIVERIES,
+        clock: Callable[[], float] = time,
+    ) -> None:
+        """Create the lease of a task run.
+
+        Args:
+            db_id (int): the database id of the processing task
+            ttl (float, optional): seconds the lease stays valid without being
+                renewed. Defaults to TASK_LEASE_TTL.
+            max_deliveries (int, optional): maximum number of runs of the task.
+                Defaults to TASK_MAX_DELIVERIES.
+            clock (Callable[[], float], optional): the (wall clock) time
+                source shared by all workers. Defaults to time.
+        """
+        self.db_id = db_id
+        self.ttl = ttl
+        self.max_deliveries = max_deliveries
+        self.owner = f"{gethostname()}:{getpid()}:{uuid4().hex}"
+        self.deliveries = 0
+        self._clock = clock
+        self._path: Optional[Path] = None
+        self._stop = Event()
+        self._heartbeat: Optional[Thread] = None
+
+    @property
+    def path(self) -> Path:
+        """The path of the lease file (requires an app context on first use)."""
+        if self._path is None:
+            plugin = {{cookiecutter.base_classname}}.instance
+            folder = Path(current_app.instance_path) / "checkpoints" / plugin.identifier
+            self._path = folder / f"{self.db_id}.lease"
+        return self._path
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialize the read-modify-write of lease files between processes.
+
+        There is one lock file per plugin.
+        """
+        lock_path = self.path.parent / ".lease.lock"
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with lock_path.open("a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield  # the lock is released when the file is closed
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            return loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, state: Dict[str, Any]):
+        with NamedTemporaryFile("w", dir=self.path.parent, delete=False) as tmp_file:
+            tmp_file.write(dumps(state))
+        replace(tmp_file.name, self.path)  # atomic
+
+    def acquire(self):
+        """Take the lease and start renewing it in a background thread.
+
+        Raises:
+            LeaseHeld: if another run holds a valid lease
+            TooManyDeliveries: if the task was already started max_deliveries
+                times
+        """
+        with self._locked():
+            state = self._read()
+            now = self._clock()
+            if state.get("owner") and state.get("expires", 0) > now:
+                raise LeaseHeld(self.db_id, state["expires"])
+            self.deliveries = state.get("deliveries", 0) + 1
+            if self.deliveries > self.max_deliveries:
+                self.path.unlink()  # the task fails for good
+                raise TooManyDeliveries(
+                    f"The task with db id '{self.db_id}' was started {self.deliveries} times "
+                    f"(limit: {self.max_deliveries}), earlier runs did not finish."
+                )
+            self._write({"owner": self.owner, "expires": now + self.ttl, "deliveries": self.deliveries})
+        self._heartbeat = Thread(
+            target=self._renew_periodically, name=f"task-lease-{self.db_id}", daemon=True
+        )
+        self._heartbeat.start()
+
+    def renew(self) -> bool:
+        """Extend the lease (False if another run took over the lease)."""
+        with self._locked():
+            state = self._read()
+            if state.get("owner") != self.owner:
+                return False
+            state["expires"] = self._clock() + self.ttl
+            self._write(state)
+            return True
+
+    def _renew_periodically(self):
+        while not self._stop.wait(self.ttl / 3):
+            if not self.renew():
+                return
+
+    def release(self):
+        """Stop renewing the lease and delete it (once the task finished)."""
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        with self._locked():
+            if self._read().get("owner") == self.owner:
+                self.path.unlink()
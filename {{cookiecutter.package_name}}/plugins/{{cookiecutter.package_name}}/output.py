@@ -0,0 +1,184 @@
+from contextlib import contextmanager
+from gzip import GzipFile
+from io import TextIOWrapper
+from tempfile import TemporaryFile
+from typing import IO, Iterator, List, Optional
+
+from qhana_plugin_runner.storage import STORE
+
+from .config import get_int_setting, get_setting
+from .instrumentation import NULL_TIMER, TaskTimer
+
+# size of the chunks that are written to the backing file
+# (and peak memory used for buffering)
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+# content type of numpy arrays in the .npy format
+NPY_CONTENT_TYPE = "application/x-npy"
+
+# supported result compressions with their file name suffix
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+# registered content types of the compressed files (RFC 6713 and RFC 8878)
+COMPRESSION_CONTENT_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+# default compression of text results ("none", "gzip" or "zstd"),
+# overridden by the compression parameter
+RESULT_COMPRESSION = get_setting("RESULT_COMPRESSION", "none")
+# compression level (0 for the default level of the compression)
+RESULT_COMPRESSION_LEVEL = get_int_setting("RESULT_COMPRESSION_LEVEL", 0)
+
+
+def compressed_content_type(mimetype: str, compression: Optional[str]) -> str:
+    """The content type of a (compressed) result, e.g. "application/gzip".
+
+    The content type of a compressed result is the one of its compression. The
+    content type of the decompressed data is recorded by the file name, which
+    keeps its extension before the compression suffix (e.g. "out.csv.gz").
+    """
+    if compression in (None, "none"):
+        return mimetype
+    return COMPRESSION_CONTENT_TYPES[compression]
+
+
+def compressed_content_types(*mimetypes: str) -> List[str]:
+    """All content types the results can have.
+
+    Used for the data_output of the plugin metadata.
+    """
+    return [*mimetypes, *COMPRESSION_CONTENT_TYPES.values()]
+
+
+def _open_compressor(raw_output: IO, compression: str, level: int) -> IO:
+    """Wrap the binary file handle with a streaming compressor.
+
+    Closing the compressor does not close raw_output.
+    """
+    if compression == "gzip":
+        return GzipFile(fileobj=raw_output, mode="wb", compresslevel=level or 6, mtime=0)
+    if compression == "zstd":
+        import zstandard  # optional requirement (add zstandard to get_requirements to use this)
+
+        compressor = zstandard.ZstdCompressor(level=level or 3)
+        return compressor.stream_writer(raw_output, closefd=False)
+    raise ValueError(
+        f"Unknown compression '{compression}' (supported: none, {', '.join(COMPRESSION_SUFFIXES)})."
+    )
+
+
+@contextmanager
+def result_writer(
+    db_id: int,
+    file_name: str,
+    file_type: str,
+    mimetype: str,
+    *,
+    binary: bool = False,
+    encoding: Optional[str] = "utf-8",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    compression: Optional[str] = None,
+    compression_level: int = RESULT_COMPRESSION_LEVEL,
+    timer: Optional[TaskTimer] = None,
+) -> Iterator[IO]:
+    """Open a write handle for a task result that is persisted in the STORE.
+
+    Written data is pushed to a disk backed temporary file in fixed size chunks
+    as it is produced. Only one chunk is ever kept in memory and writes block
+    while a full chunk is flushed to disk (back-pressure for fast producers).
+    The result is only persisted if the block exits without an exception, so
+    partial results never end up in the STORE.
+
+    Only writing the result is streamed: ``STORE.persist_task_result`` takes a
+    complete file, so the finished temporary file is handed to the STORE in a
+    single call on exit. The storage provider copies it from the file (it is
+    never read into memory as a whole), but the result is not visible in the
+    STORE before the block exits.
+
+    With a compression the data is compressed while it is written (nothing
+    uncompressed is ever buffered on disk). The compression suffix is appended
+    to the file name (e.g. "out.csv.gz") and the mimetype is replaced by the
+    content type of the compression (see ``compressed_content_type``).
+
+    Usage::
+
+        with result_writer(db_id, "out.csv", "entity/list", "text/csv") as out:
+            for row in rows:
+                out.write(row)
+
+    Args:
+        db_id (int): the database id of the processing task
+        file_name (str): the file name of the result
+        file_type (str): the data type of the result (e.g. "entity/list")
+        mimetype (str): the content type of the result (e.g. "text/csv")
+        binary (bool, optional): yield a binary handle instead of a text
+            handle. Defaults to False.
+        encoding (Optional[str], optional): the text encoding (ignored if
+            binary). Defaults to "utf-8".
+        chunk_size (int, optional): the size of the chunks written to disk.
+            Defaults to DEFAULT_CHUNK_SIZE.
+        compression (Optional[str], optional): "none", "gzip" or "zstd" (None
+            uses RESULT_COMPRESSION). Defaults to None.
+        compression_level (int, optional): the compression level (0 for the
+            default level). Defaults to RESULT_COMPRESSION_LEVEL.
+        timer (Optional[TaskTimer], optional): records the "persist" stage
+            with the result size. Defaults to None.
+
+    Yields:
+        IO: the file handle to write the result into
+    """
+    if chunk_size < 1:
+        raise ValueError(f"The chunk size must be positive (got {chunk_size}).")
+    if timer is None:
+        timer = NULL_TIMER
+    if compression is None:
+        compression = RESULT_COMPRESSION
+    with TemporaryFile(mode="w+b", buffering=chunk_size) as raw_output:
+        compressed: Optional[IO] = None
+        text_output: Optional[TextIOWrapper] = None
+        output: IO = raw_output
+        if compression != "none":
+            compressed = output = _open_compressor(raw_output, compression, compression_level)
+            file_name += COMPRESSION_SUFFIXES[compression]
+            mimetype = compressed_content_type(mimetype, compression)
+        if not binary:
+            text_output = output = TextIOWrapper(output, encoding=encoding, newline="")
+        try:
+            yield output
+            with timer.stage("persist") as stage:
+                output.flush()
+                result: IO = output
+                if compressed is not None:
+                    if text_output is not None:
+                        text_output.detach()
+                        text_output = None
+                    compressed.close()  # writes the end of the compressed stream
+                    result = raw_output  # persist the compressed bytes
+                stage.bytes = raw_output.tell()
+                result.seek(0)
+                STORE.persist_task_result(db_id, result, file_name, file_type, mimetype)
+        finally:
+            if text_output is not None:
+                text_output.detach()  # raw_output is closed by the outer context manager
+            if compressed is not None:
+                compressed.close()  # no-op if the result was persisted
+
+
+def persist_array(db_id: int, array, file_name: str, file_type: str = "array"):
+    """Persist a numpy array as a binary ``.npy`` task result.
+
+    Compared to a text format the array is written without any conversion and
+    downstream plugins can memory-map it (see ``inputs.load_array``).
+
+    Args:
+        db_id (int): the database id of the processing task
+        array (numpy.ndarray): the array to persist (must not contain python
+            objects)
+        file_name (str): the file name of the result (should end with ".npy")
+        file_type (str, optional): the data type of the result. Defaults to
+            "array".
+    """
+    import numpy as np  # optional requirement (add numpy to get_requirements to use this)
+
+    # stored uncompressed, compressed arrays cannot be memory-mapped
+    with result_writer(
+        db_id, file_name, file_type, NPY_CONTENT_TYPE, binary=True, compression="none"
+    ) as output:
+        np.save(output, array, allow_pickle=False)
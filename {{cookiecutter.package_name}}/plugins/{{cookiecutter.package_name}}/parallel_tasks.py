@@ -0,0 +1,217 @@
+# alternative task layout for data-parallel plugins
+# the input is split into shards that are processed by a group of shard tasks
+# (distributed over all workers) and merged by a chord callback before
+# save_task_result stores the task result
+# every task of the layout honors the time_limit and profile parameters and
+# stops early if the task is cancelled
+#
+# enable this layout with the PARALLEL_TASKS setting or delete this module
+# (and its import in __init__.py) if it is not needed!
+
+from http import HTTPStatus
+from typing import Any, List, Mapping, Optional
+
+import marshmallow as ma
+from celery import chord, group
+from celery.canvas import chain
+from celery.utils.log import get_task_logger
+from flask import redirect
+from flask.helpers import url_for
+from flask.views import MethodView
+from marshmallow import EXCLUDE
+
+from qhana_plugin_runner.celery import CELERY
+from qhana_plugin_runner.db.db import DB
+from qhana_plugin_runner.db.models.tasks import ProcessingTask
+from qhana_plugin_runner.tasks import save_task_error, save_task_result
+
+from .api import PLUGIN_BLP, {{cookiecutter.base_classname}}ParametersSchema
+from .cancellation import CancellationToken, time_limit_options
+from .output import result_writer
+from .parameters import LazyParameters, delete_parameters, encode_parameters
+from .plugin import {{cookiecutter.base_classname}}
+from .profiling import task_profiler
+from .routing import route
+from .scheduling import mark_scheduling_failed
+
+
+# Input parameters of the data-parallel variant
+class {{cookiecutter.base_classname}}ParallelParametersSchema({{cookiecutter.base_classname}}ParametersSchema):
+    shard_size = ma.fields.Integer(
+        required=False,
+        allow_none=False,
+        load_default=1000,
+        validate=ma.validate.Range(min=1),
+        metadata={
+            "label": "Shard Size",
+            "description": "The number of input items processed by a single shard task.",
+        },
+    )
+
+
+def create_parallel_task_chain(db_id: int, time_limit: Optional[int] = None) -> chain:
+    """Create the data-parallel task chain for the processing task db_id.
+
+    Args:
+        db_id (int): the database id of the processing task
+        time_limit (Optional[int], optional): the soft time limit of every
+            task of the layout in seconds. Defaults to the TASK_TIME_LIMIT
+            setting.
+    """
+    # split_task replaces itself with the chord over all shards, the result of
+    # the chord callback is then passed on to save_task_result
+    split = split_task.s(db_id=db_id).set(**time_limit_options(time_limit))
+    task: chain = route(split) | route(save_task_result.s(db_id=db_id))
+    # save errors appearing somewhere in task chain to db (and clean up)
+    task.link_error(route(parallel_task_error.s(db_id=db_id)))
+    return task
+
+
+@PLUGIN_BLP.route("/process/parallel/")
+class ParallelProcessView(MethodView):
+    """Start a long running data-parallel processing task."""
+
+    @PLUGIN_BLP.arguments({{cookiecutter.base_classname}}ParallelParametersSchema(unknown=EXCLUDE), location="form")
+    @PLUGIN_BLP.response(HTTPStatus.SEE_OTHER)
+    @PLUGIN_BLP.require_jwt("jwt", optional=True)
+    def post(self, arguments):
+        """Start the data-parallel background task."""
+        # create a new task instance in DB with the relevant parameters
+        db_task = ProcessingTask(task_name=split_task.name, parameters=encode_parameters(arguments))
+        db_task.save(commit=True)
+
+        task = create_parallel_task_chain(db_task.id, arguments.get("time_limit"))
+
+        try:
+            # start the task chain as a background task
+            task.apply_async()
+        except Exception as e:
+            # save error in DB if task could not be scheduled!
+            mark_scheduling_failed(db_task, e)
+            DB.session.commit()
+            raise e  # and raise exception again
+
+        # redirect to the created task resource
+        # (constructed from the ProcessingTask saved in the DB)
+        return redirect(
+            url_for("tasks-api.TaskView", task_id=str(db_task.id)), HTTPStatus.SEE_OTHER
+        )
+
+
+TASK_LOGGER = get_task_logger(__name__)
+
+
+def load_task_data(db_id: int) -> ProcessingTask:
+    """Load the processing task with the given db id."""
+    task_data: Optional[ProcessingTask] = ProcessingTask.get_by_id(id_=db_id)
+
+    if task_data is None:
+        msg = f"Could not load task data with id {db_id} to read parameters!"
+        TASK_LOGGER.error(msg)
+        raise KeyError(msg)
+
+    return task_data
+
+
+def load_task_parameters(db_id: int) -> Mapping[str, Any]:
+    """Load the task parameters of the processing task with the given db id.
+
+    Every task of the layout loads the parameters from the DB (large values
+    are only decoded when they are accessed), the shard tasks only receive the
+    db id and their shard in the task message.
+    """
+    return LazyParameters(load_task_data(db_id).parameters)
+
+
+# task names must be globally unique
+# => use full versioned plugin identifier to scope name
+@CELERY.task(name=f"{{'{'}}{{cookiecutter.base_classname}}.instance.identifier{{'}'}}.split_task", bind=True)
+def split_task(self, db_id: int):
+    """Split the input into shards and replace this task with a chord."""
+    TASK_LOGGER.info(f"Starting new data-parallel task for plugin {{cookiecutter.plugin_name}} with db id '{db_id}'")
+
+    CancellationToken(db_id).raise_if_cancelled()
+
+    task_parameters = load_task_parameters(db_id)
+
+    from .computation import split_input
+
+    with task_profiler(db_id, task_parameters.get("profile"), "profile-split"):
+        shards = split_input(task_parameters, task_parameters.get("shard_size", 1000))
+    if not shards:
+        shards = [[]]  # the chord callback must run even for empty inputs
+
+    TASK_LOGGER.info(f"Processing {len(shards)} shards for the task with db id '{db_id}'")
+
+    # every task of the layout gets the time limit of the task
+    options = time_limit_options(task_parameters.get("time_limit"))
+    shard_tasks = group(
+        route(shard_task.s(db_id=db_id, index=index, shard=shard).set(**options))
+        for index, shard in enumerate(shards)
+    )
+    merge = merge_task.s(db_id=db_id).set(**options)
+    # the chord keeps the errbacks of this task (parallel_task_error), they run
+    # if a shard task fails or is cancelled and the chord callback never runs
+    return self.replace(chord(shard_tasks, route(merge)))
+
+
+@CELERY.task(name=f"{{'{'}}{{cookiecutter.base_classname}}.instance.identifier{{'}'}}.shard_task", bind=True)
+def shard_task(self, db_id: int, index: int, shard: Any) -> Any:
+    """Compute the partial result of a single shard."""
+    # skip the remaining shards of a cancelled task
+    # (the first failed shard fails the chord)
+    cancellation = CancellationToken(db_id)
+    cancellation.raise_if_cancelled()
+
+    task_parameters = load_task_parameters(db_id)
+
+    from .computation import compute_shard
+
+    with task_profiler(db_id, task_parameters.get("profile"), f"profile-shard-{index}"):
+        return compute_shard(task_parameters, shard, cancellation)
+
+
+@CELERY.task(name=f"{{'{'}}{{cookiecutter.base_classname}}.instance.identifier{{'}'}}.merge_task", bind=True)
+def merge_task(self, shard_results: List[Any], db_id: int):
+    """Merge the partial results of all shards and persist the task result.
+
+    This is the callback of the chord over all shards.
+    """
+    CancellationToken(db_id).raise_if_cancelled()
+
+    task_data = load_task_data(db_id)
+    task_parameters = LazyParameters(task_data.parameters)
+
+    from .computation import merge_shards
+
+    try:
+        # write output (streamed to disk in chunks and persisted in the STORE
+        # on exit)
+        with result_writer(
+            db_id,
+            "{{cookiecutter.plugin_identifier}}.txt",
+            "text",
+            "text/plain",
+            compression=task_parameters.get("compression"),
+        ) as output:
+            with task_profiler(db_id, task_parameters.get("profile"), "profile-merge"):
+                merge_shards(task_parameters, shard_results, output)
+    finally:
+        delete_parameters(task_data.parameters)  # the out-of-band values are no longer needed
+
+
+@CELERY.task(
+    name=f"{{'{'}}{{cookiecutter.base_classname}}.instance.identifier{{'}'}}.parallel_task_error",
+    bind=True,
+    ignore_result=True,
+)
+def parallel_task_error(self, failing_task_id: str, db_id: int):
+    """Errback of the task layout: delete the parameters, mark the task failed.
+
+    merge_task only deletes the out-of-band parameters if it runs, this
+    errback also deletes them if the split task or a shard task failed.
+    """
+    task_data: Optional[ProcessingTask] = ProcessingTask.get_by_id(id_=db_id)
+    if task_data is not None:
+        delete_parameters(task_data.parameters)
+    save_task_error(failing_task_id, db_id=db_id)
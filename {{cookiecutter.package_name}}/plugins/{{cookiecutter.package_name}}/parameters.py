@@ -0,0 +1,240 @@
+# encoding of the task parameters stored in ProcessingTask.parameters
+# small parameter values are stored inline as json (like before), large values
+# (e.g. inline matrices or long entity id lists) are stored out-of-band in the
+# (shared) instance folder in a compact binary format and only referenced in
+# the DB row; the task decodes them lazily on first access and deletes them
+# when it finishes (values of tasks that never finish expire after
+# PARAMETER_TTL)
+
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping
+from itertools import chain
+from json import dumps, loads
+from os import replace
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from flask import current_app
+
+from .config import get_float_setting, get_int_setting
+from .plugin import {{cookiecutter.base_classname}}
+
+# values with a larger json encoding (in bytes) are stored out-of-band
+# (0 to store all values inline)
+PARAMETER_INLINE_LIMIT = get_int_setting("PARAMETER_INLINE_LIMIT", 64 * 1024)
+# seconds until out-of-band values of unfinished tasks are deleted
+# (0 to keep them), longer than any task waits and runs
+PARAMETER_TTL = get_float_setting("PARAMETER_TTL", 7 * 24 * 3600.0)
+# minimum seconds between two searches for expired out-of-band values
+# (per process)
+PARAMETER_CLEANUP_INTERVAL = 3600.0
+
+# key of the out-of-band references in the stored parameters
+# (not a valid field name)
+EXTERNAL_KEY = "$external"
+
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+_next_cleanup = 0.0
+
+
+def parameter_folder() -> Path:
+    """The folder of the out-of-band parameter values (needs an app context)."""
+    plugin = {{cookiecutter.base_classname}}.instance
+    return Path(current_app.instance_path) / "parameters" / plugin.identifier
+
+
+def _array_layout(value: Any) -> Optional[Tuple[str, List[int], List[Any]]]:
+    """The typecode, shape and flat items of a list usable as an array.
+
+    Only 1-D or rectangular 2-D lists of only ints or only floats have a
+    layout.
+    """
+    if not isinstance(value, list) or not value:
+        return None
+    if all(isinstance(row, list) for row in value):
+        columns = len(value[0])
+        if any(len(row) != columns for row in value):
+            return None
+        shape = [len(value), columns]
+        items = list(chain.from_iterable(value))
+    else:
+        shape = [len(value)]
+        items = value
+    item_types = set(map(type, items))
+    if item_types == {float}:
+        return "d", shape, items
+    if item_types == {int} and _INT64_MIN <= min(items) and max(items) <= _INT64_MAX:
+        return "q", shape, items
+    return None  # mixed types, bools, strings and nested values keep their exact json types
+
+
+def _encode_value(value: Any, json_text: str) -> Tuple[Dict[str, Any], bytes]:
+    """Encode a value in a compact binary format.
+
+    Returns the reference metadata and the payload.
+    """
+    layout = _array_layout(value)
+    if layout is not None:
+        typecode, shape, items = layout
+        return (
+            {"encoding": "array", "typecode": typecode, "shape": shape, "byteorder": sys.byteorder},
+            array(typecode, items).tobytes(),
+        )
+    return {"encoding": "json+zlib"}, zlib.compress(json_text.encode("utf-8"))
+
+
+def _decode_value(reference: Dict[str, Any], payload: bytes) -> Any:
+    if reference["encoding"] == "json+zlib":
+        return loads(zlib.decompress(payload).decode("utf-8"))
+    if reference["encoding"] == "array":
+        values = array(reference["typecode"])
+        values.frombytes(payload)
+        if reference["byteorder"] != sys.byteorder:
+            values.byteswap()
+        items = values.tolist()
+        shape = reference["shape"]
+        if len(shape) == 1:
+            return items
+        rows, columns = shape
+        return [items[row * columns : (row + 1) * columns] for row in range(rows)]
+    raise ValueError(f"Unknown parameter encoding '{reference['encoding']}'.")
+
+
+def _write_payload(payload: bytes) -> str:
+    """Store the payload under a new key.
+
+    Every value belongs to a single task and is deleted with it.
+    """
+    key = uuid4().hex
+    path = parameter_folder() / key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(dir=path.parent, delete=False) as tmp_file:
+        tmp_file.write(payload)
+    replace(tmp_file.name, path)  # atomic, a concurrent reader never sees a partial file
+    return key
+
+
+def delete_parameters(encoded: Optional[str]):
+    """Delete the out-of-band values of the encoded task parameters.
+
+    Call it once the task has finished.
+    """
+    external: Dict[str, Dict[str, Any]] = loads(encoded or "{}").get(EXTERNAL_KEY, {})
+    for reference in external.values():
+        try:
+            (parameter_folder() / reference["key"]).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def delete_expired_parameters(max_age: float = PARAMETER_TTL, clock: Callable[[], float] = time) -> int:
+    """Delete out-of-band values older than max_age seconds.
+
+    These values belong to tasks that never finished.
+
+    Args:
+        max_age (float, optional): the age of expired values in seconds (0 to
+            keep all values). Defaults to PARAMETER_TTL.
+        clock (Callable[[], float], optional): the (wall clock) time source.
+            Defaults to time.
+
+    Returns:
+        int: the number of deleted values
+    """
+    folder = parameter_folder()
+    if not max_age or not folder.exists():
+        return 0
+    deadline = clock() - max_age
+    deleted = 0
+    for path in folder.iterdir():
+        try:
+            if path.stat().st_mtime < deadline:
+                path.unlink()
+                deleted += 1
+        except FileNotFoundError:
+            pass  # deleted concurrently
+    return deleted
+
+
+def encode_parameters(arguments: Mapping, inline_limit: int = PARAMETER_INLINE_LIMIT) -> str:
+    """Encode the task parameters for ProcessingTask.parameters.
+
+    Requires an app context.
+
+    Values with a json encoding larger than inline_limit bytes are stored
+    out-of-band. Without large values the result is the plain json encoding.
+
+    Args:
+        arguments (Mapping): the (json serializable) task parameters
+        inline_limit (int, optional): the maximum size of inline values in bytes
+            (0 to store all values inline). Defaults to PARAMETER_INLINE_LIMIT.
+
+    Returns:
+        str: the encoded parameters (decode them with ``LazyParameters``)
+    """
+    global _next_cleanup
+
+    if not inline_limit:
+        return dumps(arguments)
+    inline: Dict[str, Any] = {}
+    external: Dict[str, Dict[str, Any]] = {}
+    for name, value in arguments.items():
+        json_text = dumps(value, separators=(",", ":"))
+        if len(json_text) <= inline_limit:
+            inline[name] = value
+            continue
+        reference, payload = _encode_value(value, json_text)
+        reference["key"] = _write_payload(payload)
+        external[name] = reference
+    if external:
+        inline[EXTERNAL_KEY] = external
+        if time() >= _next_cleanup:
+            _next_cleanup = time() + PARAMETER_CLEANUP_INTERVAL
+            delete_expired_parameters()
+    return dumps(inline)
+
+
+class LazyParameters(Mapping):
+    """Read only mapping of the task parameters from ``encode_parameters``.
+
+    Out-of-band values are only read and decoded when they are accessed for
+    the first time (requires an app context), so the task only materializes
+    the parameters it uses. Plain json parameters are decoded as well.
+
+    Usage::
+
+        task_parameters = LazyParameters(task_data.parameters)
+        task_parameters.get("example_value")
+    """
+
+    def __init__(self, encoded: Optional[str]) -> None:
+        self._values: Dict[str, Any] = loads(encoded or "{}")
+        self._external: Dict[str, Dict[str, Any]] = self._values.pop(EXTERNAL_KEY, {})
+        self._names = [*self._values, *self._external]  # stable while values are decoded
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            reference = self._external[name]  # KeyError for unknown parameters
+        payload = (parameter_folder() / reference["key"]).read_bytes()
+        value = self._values[name] = _decode_value(reference, payload)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._values or name in self._external
+
+    def __repr__(self) -> str:
+        return f"LazyParameters({self._names!r})"
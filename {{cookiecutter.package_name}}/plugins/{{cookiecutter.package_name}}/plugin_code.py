@@ -1,31 +1,90 @@
 # when renaming this module also change the import in __init__.py
 
 from http import HTTPStatus
-from json import dumps, loads
-from tempfile import SpooledTemporaryFile
-from datetime import datetime
+from time import time
 from typing import Any, Mapping, Optional, List, Dict, Tuple
 
-from celery.canvas import chain
+from celery.canvas import chain, group
+from celery.exceptions import Ignore
 from celery.utils.log import get_task_logger
-from flask import redirect
+from flask import abort, redirect
+from flask.globals import request
 from flask.helpers import url_for
 from flask.views import MethodView
 from marshmallow import EXCLUDE
 
 from qhana_plugin_runner.celery import CELERY
+from qhana_plugin_runner.db.db import DB
 from qhana_plugin_runner.db.models.tasks import ProcessingTask
-from qhana_plugin_runner.storage import STORE
 from qhana_plugin_runner.tasks import save_task_error, save_task_result
 
 ################################################################################
-# import plugin specific requirements in this module
-# the get_requirements method of the plugin class must be defined and functional
-# before any of the requirements specified in the method are imported!
+# do NOT import heavy plugin specific requirements in this module!
+# this module is also imported by the web process (for the API endpoints)
+# import the requirements only needed by the task in computation.py instead
 ################################################################################
 
-from .api import PLUGIN_BLP, {{cookiecutter.base_classname}}ParametersSchema
+from .api import (
+    PLUGIN_BLP,
+    BatchSubmissionResponseSchema,
+    {{cookiecutter.base_classname}}ParametersSchema,
+)
+from .cancellation import CancellationToken, cancel_task, time_limit_options
+from .checkpoint import Checkpoint
+from .instrumentation import task_outcome, task_timer
+from .lease import LeaseHeld, TaskLease, TooManyDeliveries
+from .output import result_writer
+from .parameters import LazyParameters, delete_parameters, encode_parameters
 from .plugin import {{cookiecutter.base_classname}}
+from .profiling import task_profiler
+from .progress import ProgressReporter
+from .result_cache import RESULT_CACHE, RESULT_CACHE_ENABLED, result_cache_key
+from .routing import route
+from .scheduling import ASYNC_SCHEDULING_ENABLED, TASK_PUBLISHER, mark_scheduling_failed
+from .task_context import TaskContext
+
+
+def create_task_chain(db_id: int, time_limit: Optional[int] = None) -> chain:
+    """Create the background task chain for the processing task db_id.
+
+    Args:
+        db_id (int): the database id of the processing task
+        time_limit (Optional[int], optional): the soft time limit of the
+            background task in seconds. Defaults to the TASK_TIME_LIMIT
+            setting.
+    """
+    background = background_task.s(db_id=db_id)
+    background.set(**time_limit_options(time_limit))
+    # all tasks need to know about db id to load the db entry
+    # (all tasks are routed to the plugin queue if task routing is enabled)
+    task: chain = route(background) | route(save_task_result.s(db_id=db_id))
+    # save errors appearing somewhere in task chain to db
+    task.link_error(route(save_task_error.s(db_id=db_id)))
+    return task
+
+
+def bypass_result_cache() -> bool:
+    """True if the current request asks to bypass the result cache.
+
+    Send a ``Cache-Control: no-cache`` header or the query parameter
+    ``?no-cache=true``.
+    """
+    if request.cache_control.no_cache:
+        return True
+    return request.args.get("no-cache", "false").lower() in ("", "1", "true", "yes")
+
+
+def get_cached_task(cache_key: str) -> Optional[ProcessingTask]:
+    """Get the earlier task with the same result as the cache key's task."""
+    db_id = RESULT_CACHE.get(cache_key)
+    if db_id is None:
+        return None
+    db_task: Optional[ProcessingTask] = ProcessingTask.get_by_id(id_=db_id)
+    if db_task is None or db_task.task_status == "FAILURE":
+        # failed tasks have no result to reuse
+        RESULT_CACHE.invalidate(cache_key)
+        return None
+    return db_task
 
 
 @PLUGIN_BLP.route("/process/")
@@ -37,61 +96,214 @@ class ProcessView(MethodView):
     @PLUGIN_BLP.require_jwt("jwt", optional=True)
     def post(self, arguments):
         """Start the background task."""
+        cache_key: Optional[str] = None
+        if RESULT_CACHE_ENABLED and not bypass_result_cache():
+            cache_key = result_cache_key({{cookiecutter.base_classname}}.instance.identifier, arguments)
+            cached_task = get_cached_task(cache_key)
+            if cached_task is not None:
+                # link to the earlier task with the same parameters
+                # instead of scheduling new work
+                return redirect(
+                    url_for("tasks-api.TaskView", task_id=str(cached_task.id)), HTTPStatus.SEE_OTHER
+                )
+
         # create a new task instance in DB with the relevant parameters
-        db_task = ProcessingTask(task_name=background_task.name, parameters=dumps(arguments))
+        # large parameter values are stored out-of-band (see parameters.py)
+        db_task = ProcessingTask(
+            task_name=background_task.name, parameters=encode_parameters(arguments)
+        )
         db_task.save(commit=True)
 
-        # all tasks need to know about db id to load the db entry
-        task: chain = background_task.s(db_id=db_task.id) | save_task_result.s(
-            db_id=db_task.id
+        task = create_task_chain(db_task.id, arguments.get("time_limit"))
+
+        if ASYNC_SCHEDULING_ENABLED:
+            # publish the task chain in a background thread
+            # (errors are saved in the DB there)
+            TASK_PUBLISHER.submit(db_task.id, task)
+        else:
+            try:
+                # start the task chain as a background task
+                task.apply_async()
+            except Exception as e:
+                # save error in DB if task could not be scheduled!
+                mark_scheduling_failed(db_task, e)
+                DB.session.commit()
+                raise e # and raise exception again
+
+        if cache_key is not None:
+            RESULT_CACHE.put(cache_key, db_task.id)
+
+        # redirect to the created task resource (constructed from the ProcessingTask saved in the DB)
+        return redirect(
+            url_for("tasks-api.TaskView", task_id=str(db_task.id)), HTTPStatus.SEE_OTHER
+        )
+
+
+@PLUGIN_BLP.route("/process/batch/")
+class BatchProcessView(MethodView):
+    """Start many processing tasks (e.g. a parameter sweep) with one request."""
+
+    @PLUGIN_BLP.arguments(
+        {{cookiecutter.base_classname}}ParametersSchema(many=True, unknown=EXCLUDE),
+        location="json",  # a json list of parameter sets, all are validated before any task is created
+    )
+    @PLUGIN_BLP.response(HTTPStatus.ACCEPTED, BatchSubmissionResponseSchema())
+    @PLUGIN_BLP.require_jwt("jwt", optional=True)
+    def post(self, arguments_list: List[Dict[str, Any]]):
+        """Start one background task per parameter set."""
+        db_tasks = [
+            ProcessingTask(task_name=background_task.name, parameters=encode_parameters(arguments))
+            for arguments in arguments_list
+        ]
+        # insert all task entries in a single transaction
+        for db_task in db_tasks:
+            db_task.save()
+        DB.session.commit()
+
+        # publish all task chains at once (reusing a single broker connection)
+        tasks = group(
+            create_task_chain(db_task.id, arguments.get("time_limit"))
+            for db_task, arguments in zip(db_tasks, arguments_list)
         )
-        # save errors appearing somewhere in task chain to db
-        task.link_error(save_task_error.s(db_id=db_task.id))
 
         try:
-            # start the task chain as a background task
-            task.apply_async()
+            tasks.apply_async()
         except Exception as e:
-            # save error in DB if task could not be scheduled!
-            db_task.task_status = "FAILURE"
-            db_task.finished_at = datetime.utcnow()
-            db_task.add_task_log_entry(f"Error scheduling task: {e!r}")
+            # save error in DB if the tasks could not be scheduled!
+            for db_task in db_tasks:
+                mark_scheduling_failed(db_task, e)
+            DB.session.commit()
+            raise e  # and raise exception again
 
-            db_task.save(commit=True)
-            raise e # and raise exception again
+        return {
+            "tasks": [
+                url_for("tasks-api.TaskView", task_id=str(db_task.id))
+                for db_task in db_tasks
+            ]
+        }
 
-        # redirect to the created task resource (constructed from the ProcessingTask saved in the DB)
+
+@PLUGIN_BLP.route("/process/<int:task_id>/cancel")
+class CancelView(MethodView):
+    """Cancel a running processing task."""
+
+    @PLUGIN_BLP.response(HTTPStatus.SEE_OTHER)
+    @PLUGIN_BLP.require_jwt("jwt", optional=True)
+    def post(self, task_id: int):
+        """Cancel the task.
+
+        The task stops at its next cancellation check and its partial result
+        is discarded.
+        """
+        db_task: Optional[ProcessingTask] = ProcessingTask.get_by_id(id_=task_id)
+        if db_task is None or not db_task.task_name.startswith({{cookiecutter.base_classname}}.instance.identifier):
+            abort(HTTPStatus.NOT_FOUND)
+        if db_task.finished_at is None:
+            cancel_task(db_task)
+
+        # redirect to the cancelled task resource
         return redirect(
             url_for("tasks-api.TaskView", task_id=str(db_task.id)), HTTPStatus.SEE_OTHER
         )
 
+
 TASK_LOGGER = get_task_logger(__name__)
 
 
 # task names must be globally unique => use full versioned plugin identifier to scope name
-@CELERY.task(name=f"{{'{'}}{{cookiecutter.base_classname}}.instance.identifier{{'}'}}.demo_task", bind=True)
+# acks_late + reject_on_worker_lost: redeliver the task if the worker process
+# dies (it resumes from its checkpoint)
+@CELERY.task(
+    name=f"{{'{'}}{{cookiecutter.base_classname}}.instance.identifier{{'}'}}.demo_task",
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
 def background_task(self, db_id: int) -> str:
     """The main background task of the plugin {{cookiecutter.plugin_name}}."""
     TASK_LOGGER.info(f"Starting new background task for plugin {{cookiecutter.plugin_name}} with db id '{db_id}'")
 
-    # load task data based on given DB id
-    task_data: Optional[ProcessingTask] = ProcessingTask.get_by_id(id_=db_id)
-
-    if task_data is None:
-        msg = f"Could not load task data with id {db_id} to read parameters!"
-        TASK_LOGGER.error(msg)
-        raise KeyError(msg)
-
-    # deserialize task parameters
-    task_parameters: Dict[str, Any] = loads(task_data.parameters or "{}")
-
-    ############################################################################
-    # TODO implement your background task
-    ############################################################################
-    
-    # write output
-    with SpooledTemporaryFile(mode="w") as output:
-        output.write("TODO")
-        STORE.persist_task_result(
-            db_id, output, "{{cookiecutter.plugin_identifier}}.txt", "text", "text/plain"
-        )
+    # times the task stages
+    # (a no-op unless the TASK_TIMINGS or TASK_METRICS setting is enabled)
+    timer = task_timer()
+
+    task_data: Optional[ProcessingTask] = None
+    try:
+        # cheap cooperative cancellation check
+        cancellation = CancellationToken(db_id)
+        if cancellation.cancelled:
+            # cancelled before it started or a redelivery of a finished task,
+            # nothing to do
+            raise Ignore()
+
+        # load task data based on given DB id
+        with timer.stage("load_task_data"):
+            task_data = ProcessingTask.get_by_id(id_=db_id)
+
+        if task_data is None:
+            msg = f"Could not load task data with id {db_id} to read parameters!"
+            TASK_LOGGER.error(msg)
+            raise KeyError(msg)
+
+        # deserialize task parameters
+        # (large out-of-band values are only loaded when they are accessed)
+        with timer.stage("load_parameters") as stage:
+            stage.bytes = len(task_data.parameters or "")
+            task_parameters: Mapping[str, Any] = LazyParameters(task_data.parameters)
+
+        # import the computation lazily, so that its requirements are only
+        # loaded by the worker
+        with timer.stage("import_computation"):
+            from .computation import compute
+
+        # profile the task if requested
+        # (the profile is persisted as extra task results)
+        with task_profiler(db_id, task_parameters.get("profile")):
+            # the state saved by an earlier run of this task is kept until the
+            # task finishes (successfully or with an error), but not if the
+            # worker process dies
+            checkpoint = Checkpoint(db_id)
+
+            # only one run may resume from the checkpoint, the broker also
+            # redelivers tasks that run longer than its visibility timeout
+            # (see lease.py)
+            lease = TaskLease(db_id)
+            try:
+                lease.acquire()
+            except LeaseHeld as held:
+                if self.request.is_eager:
+                    raise  # an eager retry would run again immediately
+                # try again after the other run finished or its lease expired
+                # (its worker died)
+                raise self.retry(countdown=max(held.expires - time(), 1), max_retries=None)
+            except TooManyDeliveries:
+                # earlier runs crashed their worker, the task fails for good
+                checkpoint.clear()
+                delete_parameters(task_data.parameters)
+                raise
+
+            try:
+                # write output (streamed to disk in chunks, persisted in the
+                # STORE on exit), the output is discarded if the task is
+                # cancelled or exceeds its time limit
+                with result_writer(
+                    db_id,
+                    "{{cookiecutter.plugin_identifier}}.txt",
+                    "text",
+                    "text/plain",
+                    compression=task_parameters.get("compression"),
+                    timer=timer,
+                ) as output, ProgressReporter(db_id) as progress:
+                    context = TaskContext(db_id, progress.report_progress, cancellation, checkpoint)
+                    with timer.stage("compute"):
+                        compute(task_parameters, output, context)
+            finally:
+                checkpoint.clear()
+                delete_parameters(task_data.parameters)  # the out-of-band values are no longer needed
+                lease.release()
+
+    except BaseException as error:
+        # also record the timings of failed, cancelled and retried runs
+        timer.finish(task_data, task_outcome(error))
+        raise
+    timer.finish(task_data, "success")
@@ -0,0 +1,230 @@
+# run CPU-bound parts of a single task on all cores of the worker machine
+# a celery prefork worker runs every task in one process (one core), the pool
+# started by this module spreads the work of one task over PROCESS_POOL_SIZE
+# processes
+#
+# only import this module in computation.py
+
+import multiprocessing
+import sys
+from concurrent.futures import FIRST_EXCEPTION, Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from os import cpu_count
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .cancellation import CancellationToken
+from .config import get_float_setting, get_int_setting, get_setting
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:  # python 3.7
+    SharedMemory = None
+
+# number of processes of the pool (0 for one process per cpu core)
+PROCESS_POOL_SIZE = get_int_setting("PROCESS_POOL_SIZE", 0)
+# start method of the pool processes, "spawn" is safe in processes with
+# threads (forking them can deadlock)
+PROCESS_POOL_START_METHOD = get_setting("PROCESS_POOL_START_METHOD", "spawn")
+# seconds between two cancellation checks while waiting for results
+PROCESS_POOL_POLL_INTERVAL = get_float_setting("PROCESS_POOL_POLL_INTERVAL", 1.0)
+
+# shared memory blocks attached by this (pool) process,
+# kept open while the process lives
+_ATTACHED: Dict[str, Any] = {}
+
+
+class SharedArray(NamedTuple):
+    """Picklable handle of a numpy array in shared memory.
+
+    Pass the handle (see ``TaskPool.share``) instead of the array to the pool
+    function and call ``handle.array()`` there to get a read only view of the
+    array without copying it into the pool process.
+    """
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    def array(self):
+        import numpy as np
+
+        shared_memory = _ATTACHED.get(self.name)
+        if shared_memory is None:
+            shared_memory = _ATTACHED[self.name] = SharedMemory(name=self.name)
+        array = np.ndarray(self.shape, dtype=self.dtype, buffer=shared_memory.buf)
+        array.flags.writeable = False
+        return array
+
+
+class _PickledArray(NamedTuple):
+    """Fallback of SharedArray for python versions without shared memory.
+
+    The array is pickled.
+    """
+
+    value: Any
+
+    def array(self):
+        return self.value
+
+
+@contextmanager
+def _allow_child_processes():
+    """Allow a daemonic celery worker process to start child processes.
+
+    Celery prefork workers are daemon processes and multiprocessing refuses
+    to start children from them. The pool processes are always shut down
+    (or terminated) before the task finishes, so they cannot outlive the
+    worker process.
+    """
+    config = getattr(multiprocessing.current_process(), "_config", None)  # no public api for this flag
+    if not isinstance(config, dict):
+        raise RuntimeError(
+            f"Cannot start a process pool on python {sys.version.split()[0]} "
+            "(multiprocessing.Process._config is not available)."
+        )
+    daemon = config.get("daemon")
+    config["daemon"] = False
+    try:
+        yield
+    finally:
+        if daemon is None:
+            del config["daemon"]
+        else:
+            config["daemon"] = daemon
+
+
+def _terminate_processes(executor: ProcessPoolExecutor):
+    """Terminate the pool processes without waiting for running calls."""
+    terminate_workers = getattr(executor, "terminate_workers", None)
+    if terminate_workers is not None:  # python 3.14+
+        terminate_workers()
+        return
+    try:
+        processes = executor._processes  # no public api before python 3.14
+    except AttributeError:
+        raise RuntimeError(
+            f"Cannot terminate the processes of the process pool on python {sys.version.split()[0]} "
+            "(ProcessPoolExecutor._processes is not available)."
+        ) from None
+    for process in list((processes or {}).values()):  # None once the executor was shut down
+        process.terminate()
+
+
+class TaskPool:
+    """A process pool bound to a single task run (see ``process_pool``)."""
+
+    def __init__(self, executor: ProcessPoolExecutor, cancellation: Optional[CancellationToken]) -> None:
+        self.executor = executor
+        self.cancellation = cancellation
+        self._shared: List[Any] = []
+
+    def share(self, array) -> SharedArray:
+        """Copy a numpy array into shared memory once.
+
+        The array is not pickled for every call. On python 3.7 (no shared
+        memory support) the array is pickled for every call instead.
+        """
+        if SharedMemory is None:
+            return _PickledArray(array)
+        import numpy as np
+
+        shared_memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._shared.append(shared_memory)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shared_memory.buf)[...] = array
+        return SharedArray(shared_memory.name, array.shape, array.dtype.str)
+
+    def map(self, func: Callable[..., Any], *iterables: Iterable[Any]) -> List[Any]:
+        """Call func for every item of the iterables in the pool.
+
+        The results are returned in the order of the items.
+
+        The first exception raised by func is raised here (with the traceback
+        of the pool process as its cause). All pending calls are cancelled and
+        the pool processes are stopped if a call fails or the task is cancelled.
+
+        Args:
+            func (Callable[..., Any]): a module level function (it is pickled
+                by name)
+
+        Returns:
+            List[Any]: the results in the order of the items
+        """
+        futures: List[Future] = [self.executor.submit(func, *args) for args in zip(*iterables)]
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=PROCESS_POOL_POLL_INTERVAL, return_when=FIRST_EXCEPTION)
+            for future in done:
+                if future.exception() is not None:
+                    raise future.exception()
+            if self.cancellation is not None:
+                self.cancellation.raise_if_cancelled()
+        return [future.result() for future in futures]
+
+    def close(self, terminate: bool = False):
+        """Shut the pool down and free the shared memory.
+
+        Args:
+            terminate (bool, optional): stop the pool processes without
+                waiting for running calls. Defaults to False.
+        """
+        try:
+            if terminate:
+                # running calls cannot be cancelled, stop the pool processes
+                # instead (the executor then fails all pending calls with
+                # BrokenProcessPool)
+                _terminate_processes(self.executor)
+        except RuntimeError:
+            self.executor.shutdown(wait=False)  # do not wait for the running calls
+            raise
+        else:
+            self.executor.shutdown(wait=True)
+        finally:
+            for shared_memory in self._shared:
+                shared_memory.close()
+                shared_memory.unlink()
+            self._shared.clear()
+
+
+@contextmanager
+def process_pool(
+    max_workers: Optional[int] = None, cancellation: Optional[CancellationToken] = None
+) -> Iterator[TaskPool]:
+    """Start a process pool for the current task.
+
+    Functions run in the pool must be defined at module level (e.g. in
+    computation.py) and must not use the DB or the flask app context.
+
+    Usage::
+
+        with process_pool(cancellation=context.cancellation) as pool:
+            matrix = pool.share(matrix)  # large numpy arrays
+            results = pool.map(compute_row, repeat(matrix), range(rows))
+
+        def compute_row(matrix: SharedArray, row: int):
+            return matrix.array()[row].sum()
+
+    Args:
+        max_workers (Optional[int], optional): the number of processes.
+            Defaults to PROCESS_POOL_SIZE (or the number of cpu cores).
+        cancellation (Optional[CancellationToken], optional): stop waiting for
+            results if the task was cancelled. Defaults to None.
+
+    Yields:
+        TaskPool: the pool
+    """
+    if max_workers is None:
+        max_workers = PROCESS_POOL_SIZE or cpu_count() or 1
+    with _allow_child_processes():
+        executor = ProcessPoolExecutor(
+            max_workers, mp_context=multiprocessing.get_context(PROCESS_POOL_START_METHOD)
+        )
+        pool = TaskPool(executor, cancellation)
+        try:
+            yield pool
+        except BaseException:
+            # also on cancellation and time limits (SoftTimeLimitExceeded)
+            pool.close(terminate=True)
+            raise
+        else:
+            pool.close()
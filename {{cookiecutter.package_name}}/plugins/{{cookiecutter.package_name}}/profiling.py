@@ -0,0 +1,152 @@
+import marshal
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from cProfile import Profile
+from functools import partial
+from io import StringIO
+from pathlib import Path
+from pstats import Stats
+from threading import Event, Thread, get_ident
+from types import CodeType
+from typing import IO, Dict, Iterator, Optional
+
+from celery.utils.log import get_logger
+
+from .config import get_float_setting, get_setting
+from .instrumentation import task_outcome
+from .output import result_writer
+
+LOGGER = get_logger(__name__)
+
+# profile every task ("none", "cprofile" or "sampling"),
+# overridden by the profile parameter
+TASK_PROFILING = get_setting("TASK_PROFILING", "none")
+# seconds between two stack samples of the sampling profiler
+PROFILE_SAMPLE_INTERVAL = get_float_setting("PROFILE_SAMPLE_INTERVAL", 0.005)
+
+PROFILE_MODES = ("none", "cprofile", "sampling")
+# outcomes of task runs whose profile is discarded (like their partial results)
+DISCARDED_OUTCOMES = ("cancelled", "ignored", "retry")
+
+
+class StackSampler:
+    """Sampling profiler counting the call stacks of a single thread.
+
+    A background thread records the current stack of the profiled thread
+    every ``interval`` seconds. The overhead is independent of the number of
+    function calls, so the profile of call heavy code is not distorted (unlike
+    with cProfile). The samples are written in the collapsed stack format
+    (``frame;frame;frame count``) that flamegraph tools (flamegraph.pl,
+    speedscope, inferno) can read.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, thread_id: Optional[int] = None) -> None:
+        self.interval = interval
+        self.thread_id = get_ident() if thread_id is None else thread_id
+        self.samples: Counter = Counter()
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, output: IO[str]):
+        """Write the samples in the collapsed stack format."""
+        for stack, count in self.samples.most_common():
+            output.write(f"{stack} {count}\n")
+
+
+def _persist_cprofile(db_id: int, profiler: Profile, name: str):
+    profiler.create_stats()
+    with result_writer(
+        db_id, f"{name}.pstats", "profile", "application/octet-stream", binary=True, compression="none"
+    ) as output:
+        # same format as Profile.dump_stats, read it with pstats or snakeviz
+        output.write(marshal.dumps(profiler.stats))
+
+    report = StringIO()
+    Stats(profiler, stream=report).sort_stats("cumulative").print_stats(50)
+    with result_writer(
+        db_id, f"{name}.txt", "profile", "text/plain", compression="none"
+    ) as output:
+        output.write(report.getvalue())
+
+
+def _persist_samples(db_id: int, sampler: StackSampler, name: str):
+    with result_writer(
+        db_id, f"{name}.collapsed.txt", "profile", "text/plain", compression="none"
+    ) as output:
+        sampler.write_collapsed(output)
+
+
+@contextmanager
+def task_profiler(db_id: int, mode: Optional[str] = None, name: str = "profile") -> Iterator[None]:
+    """Profile the enclosed block and persist the profile as extra task results.
+
+    The profile is also persisted if the block raises an exception (e.g. if
+    the task exceeds its time limit), but not if the task was cancelled or
+    is retried later.
+
+    Args:
+        db_id (int): the database id of the processing task
+        mode (Optional[str], optional): "none", "cprofile" or "sampling" (None
+            uses TASK_PROFILING). Defaults to None.
+        name (str, optional): the file name of the profile without extension
+            (one per task of a task layout). Defaults to "profile".
+    """
+    if mode is None:
+        mode = TASK_PROFILING
+    if mode == "none":
+        yield
+        return
+
+    if mode == "cprofile":
+        profiler = Profile()
+        start, stop = profiler.enable, profiler.disable
+        persist = partial(_persist_cprofile, db_id, profiler, name)
+    elif mode == "sampling":
+        sampler = StackSampler()
+        start, stop = sampler.start, sampler.stop
+        persist = partial(_persist_samples, db_id, sampler, name)
+    else:
+        raise ValueError(f"Unknown profiling mode '{mode}' (supported: {', '.join(PROFILE_MODES)}).")
+
+    start()
+    error: Optional[BaseException] = None
+    try:
+        yield
+    except BaseException as exc:
+        error = exc
+        raise
+    finally:
+        stop()
+        if task_outcome(error) not in DISCARDED_OUTCOMES:
+            try:
+                persist()
+            except Exception:
+                # a missing profile must not hide the result (or the error)
+                # of the task
+                LOGGER.exception(f"Could not persist the profile of the task with db id '{db_id}'")
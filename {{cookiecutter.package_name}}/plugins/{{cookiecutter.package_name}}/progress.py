@@ -0,0 +1,122 @@
+from time import monotonic
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import func, update
+
+from qhana_plugin_runner.db.db import DB
+from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+from .config import get_float_setting
+
+# minimum number of seconds between two progress updates written to the DB
+PROGRESS_INTERVAL = get_float_setting("PROGRESS_INTERVAL", 5.0)
+# minimum progress in percent that forces an update before the interval
+# has passed
+PROGRESS_STEP = get_float_setting("PROGRESS_STEP", 5.0)
+
+
+class ProgressReporter:
+    """Coalesces progress reports of a task and writes them to the task log.
+
+    Reports are only kept in memory until ``interval`` seconds have passed or
+    the progress advanced by ``step`` percent since the last write. Every
+    write is a single UPDATE of the task row, so a task can report progress
+    inside its hot loop without slowing it down (at most ``100 / step`` plus
+    one write per ``interval`` seconds). The task log only contains the last
+    progress report, every write replaces the line of the previous write.
+
+    Usage::
+
+        with ProgressReporter(db_id) as progress:
+            for i, item in enumerate(items):
+                ...
+                progress.report_progress(i + 1, len(items), "processing items")
+    """
+
+    def __init__(
+        self,
+        db_id: int,
+        interval: float = PROGRESS_INTERVAL,
+        step: float = PROGRESS_STEP,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """Create a new progress reporter.
+
+        Args:
+            db_id (int): the database id of the processing task
+            interval (float, optional): minimum number of seconds between two
+                writes. Defaults to PROGRESS_INTERVAL.
+            step (float, optional): progress in percent that forces a write
+                before the interval has passed. Defaults to PROGRESS_STEP.
+            clock (Callable[[], float], optional): the time source. Defaults
+                to monotonic.
+        """
+        self.db_id = db_id
+        self.interval = interval
+        self.step = step
+        self.writes = 0
+        self._clock = clock
+        self._last_write_time = clock()
+        self._last_write_percent = 0.0
+        self._pending: Optional[Tuple[int, int, str]] = None
+        self._last_entry: Optional[str] = None  # the progress line in the task log
+
+    def report_progress(self, done: int, total: int, message: str = ""):
+        """Report the progress of the task (cheap, may be called in hot loops).
+
+        Args:
+            done (int): the number of finished work items
+            total (int): the total number of work items (0 if unknown)
+            message (str, optional): a short description of the current work.
+                Defaults to "".
+        """
+        self._pending = (done, total, message)
+        if total > 0:
+            percent = done * 100 / total
+            if percent - self._last_write_percent >= self.step or (
+                percent >= 100.0 > self._last_write_percent  # always write completion
+            ):
+                self.flush()
+                return
+        if self._clock() - self._last_write_time >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Write the last pending progress report (if any) to the DB."""
+        if self._pending is None:
+            return
+        done, total, message = self._pending
+        self._pending = None
+        if total > 0:
+            percent = done * 100 / total
+            entry = f"\nProgress: {done}/{total} ({percent:.1f}%)"
+            self._last_write_percent = percent
+        else:
+            entry = f"\nProgress: {done}"
+        if message:
+            entry += f" {message}"
+        if self._last_entry is None:
+            task_log = func.coalesce(ProcessingTask.task_log, "") + entry
+        else:
+            # overwrite the previous progress line, the log does not grow with
+            # every write (entries added to the log by other processes in the
+            # meantime are kept)
+            task_log = func.replace(ProcessingTask.task_log, self._last_entry, entry)
+        # single UPDATE in the DB (no read of the current log needed)
+        DB.session.execute(
+            update(ProcessingTask)
+            .where(ProcessingTask.id == self.db_id)
+            .values(task_log=task_log)
+            .execution_options(synchronize_session=False)
+        )
+        DB.session.commit()
+        self._last_entry = entry
+        self.writes += 1
+        self._last_write_time = self._clock()
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # always write the last progress report
+        self.flush()
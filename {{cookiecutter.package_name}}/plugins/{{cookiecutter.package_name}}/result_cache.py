@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from hashlib import sha256
+from json import dumps
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+from .config import get_bool_setting, get_float_setting, get_int_setting
+
+
+def result_cache_key(identifier: str, arguments: Mapping[str, Any]) -> str:
+    """Compute the content address of a task result.
+
+    The plugin identifier includes the plugin version, so all cached results
+    are invalidated automatically when the plugin version changes.
+
+    Args:
+        identifier (str): the full (versioned) plugin identifier
+        arguments (Mapping[str, Any]): the deserialized task parameters
+
+    Returns:
+        str: the hex digest identifying the result
+    """
+    # canonical json: stable key order and no optional whitespace
+    canonical_arguments = dumps(arguments, sort_keys=True, separators=(",", ":"))
+    return sha256(f"{identifier}\n{canonical_arguments}".encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread safe LRU cache with a TTL mapping result keys to task ids.
+
+    The cache lives in the memory of the web process, so every process of a
+    multi process server keeps its own cache.
+    """
+
+    def __init__(
+        self, max_entries: int = 1024, ttl: float = 3600, clock: Callable[[], float] = monotonic
+    ) -> None:
+        """Create a new result cache.
+
+        Args:
+            max_entries (int, optional): the size cap of the cache; the least
+                recently used entries are evicted first. Defaults to 1024.
+            ttl (float, optional): the number of seconds an entry stays valid.
+                Defaults to 3600.
+            clock (Callable[[], float], optional): the time source. Defaults
+                to monotonic.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        """Get the task id cached under key (None if there is no entry)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, db_id = entry
+            if expires_at < self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return db_id
+
+    def put(self, key: str, db_id: int):
+        """Cache the task id under key.
+
+        The least recently used entries are evicted if the cache is full.
+        """
+        if self.max_entries < 1:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, db_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        """Remove the entry cached under key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all cache entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+# the result cache is opt-in, enable it with the RESULT_CACHE setting
+RESULT_CACHE_ENABLED = get_bool_setting("RESULT_CACHE", False)
+
+RESULT_CACHE = ResultCache(
+    max_entries=get_int_setting("RESULT_CACHE_SIZE", 1024),
+    ttl=get_float_setting("RESULT_CACHE_TTL", 3600),
+)
@@ -0,0 +1,49 @@
+# route the tasks of this plugin to a dedicated celery queue
+# by default all plugins share the default queue, so the tasks of one heavy
+# plugin can starve the quick tasks of all other plugins on the runner
+# with TASK_ROUTING enabled only the workers consuming TASK_QUEUE run the
+# tasks of this plugin (start them with `invoke worker`)
+
+from typing import Any, Dict, Optional, TypeVar
+
+from celery.canvas import Signature
+
+from .config import get_bool_setting, get_setting
+from .plugin import _identifier
+
+# route the plugin tasks to TASK_QUEUE
+# (at least one worker must consume that queue!)
+TASK_ROUTING_ENABLED = get_bool_setting("TASK_ROUTING", False)
+# the queue of the plugin tasks, defaults to the full plugin identifier
+# (including the version)
+TASK_QUEUE = get_setting("TASK_QUEUE", _identifier)
+# message priority of the plugin tasks (broker specific),
+# empty for the default priority
+_task_priority = get_setting("TASK_PRIORITY")
+TASK_PRIORITY: Optional[int] = int(_task_priority) if _task_priority else None
+
+S = TypeVar("S", bound=Signature)
+
+
+def routing_options() -> Dict[str, Any]:
+    """The celery options of the plugin tasks (empty if routing is disabled)."""
+    if not TASK_ROUTING_ENABLED:
+        return {}
+    options: Dict[str, Any] = {"queue": TASK_QUEUE}
+    if TASK_PRIORITY is not None:
+        options["priority"] = TASK_PRIORITY
+    return options
+
+
+def route(signature: S) -> S:
+    """Route the task signature to the plugin queue (changes it in place).
+
+    Route every signature of a task chain, including the result and error
+    callbacks (``save_task_result`` and ``save_task_error``). The workers of
+    the plugin queue then run the whole chain and the result of a task is
+    not stuck behind the tasks of other plugins in the default queue.
+    """
+    options = routing_options()
+    if options:
+        signature.set(**options)
+    return signature
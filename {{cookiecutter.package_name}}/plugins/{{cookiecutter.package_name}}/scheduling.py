@@ -0,0 +1,117 @@
+import atexit
+from datetime import datetime
+from queue import Full, Queue
+from threading import Lock, Thread
+from typing import Optional, Tuple
+
+from celery.canvas import Signature
+from celery.utils.log import get_logger
+from flask import Flask, current_app
+
+from qhana_plugin_runner.celery import CELERY
+from qhana_plugin_runner.db.db import DB
+from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+from .config import get_bool_setting, get_int_setting
+
+# publish task chains from a background thread instead of the request thread
+ASYNC_SCHEDULING_ENABLED = get_bool_setting("ASYNC_SCHEDULING", False)
+# maximum number of task chains waiting to be published
+ASYNC_SCHEDULING_QUEUE_SIZE = get_int_setting("ASYNC_SCHEDULING_QUEUE_SIZE", 1000)
+
+LOGGER = get_logger(__name__)
+
+
+def mark_scheduling_failed(db_task: ProcessingTask, error: Exception):
+    """Save the error of a task that could not be scheduled in the DB.
+
+    Does not commit the DB session.
+    """
+    db_task.task_status = "FAILURE"
+    db_task.finished_at = datetime.utcnow()
+    db_task.add_task_log_entry(f"Error scheduling task: {error!r}")
+    db_task.save()
+
+
+def publish_task(db_id: int, task: Signature):
+    """Publish a task chain and save scheduling errors in the DB.
+
+    The task chain is published with a pooled broker connection.
+
+    Must be called inside an app context.
+    """
+    try:
+        with CELERY.producer_pool.acquire(block=True) as producer:
+            task.apply_async(producer=producer)
+    except Exception as e:
+        LOGGER.exception(f"Error scheduling task with db id '{db_id}'")
+        db_task: Optional[ProcessingTask] = ProcessingTask.get_by_id(id_=db_id)
+        if db_task is not None:
+            mark_scheduling_failed(db_task, e)
+            DB.session.commit()
+
+
+# marks the end of the queue
+_STOP = None
+
+
+class TaskPublisher:
+    """Publishes task chains to the broker from a background thread.
+
+    Requests only enqueue the task chain after the task entry was saved in
+    the DB, so they do not wait for the broker. The queue is bounded; if it is
+    full the task chain is published synchronously in the request thread.
+    All queued task chains are published before the process exits cleanly.
+    """
+
+    def __init__(self, maxsize: int = ASYNC_SCHEDULING_QUEUE_SIZE) -> None:
+        self._queue: "Queue[Optional[Tuple[int, Signature]]]" = Queue(maxsize)
+        self._lock = Lock()
+        self._thread: Optional[Thread] = None
+        self._app: Optional[Flask] = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = current_app._get_current_object()
+            self._thread = Thread(target=self._run, name="task-publisher", daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def submit(self, db_id: int, task: Signature):
+        """Publish the task chain in the background.
+
+        Must be called inside an app context.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((db_id, task))
+        except Full:
+            publish_task(db_id, task)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                with self._app.app_context():
+                    publish_task(*item)
+            except Exception:
+                LOGGER.exception("Unexpected error in the task publisher thread")
+            finally:
+                self._queue.task_done()
+
+    def shutdown(self, timeout: Optional[float] = 30):
+        """Publish all queued task chains and stop the background thread."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._thread = None
+        self._queue.put(_STOP)  # queued after all pending task chains
+        thread.join(timeout)
+
+
+TASK_PUBLISHER = TaskPublisher()
@@ -0,0 +1,21 @@
+from typing import Callable, NamedTuple
+
+from .cancellation import CancellationToken
+from .checkpoint import Checkpoint
+
+
+class TaskContext(NamedTuple):
+    """The helpers available to the computation of a single task run."""
+
+    # the database id of the processing task
+    db_id: int
+    # report progress as (done, total, message),
+    # cheap enough to call for every item
+    report_progress: Callable[[int, int, str], None]
+    # call cancellation.raise_if_cancelled() regularly to stop early
+    # if the task was cancelled
+    cancellation: CancellationToken
+    # save compact task state to resume from after the worker process died
+    # (the output of a killed run is lost, write the output after the
+    # checkpointed loop)
+    checkpoint: Checkpoint
@@ -1,6 +1,8 @@
+import re
+from os import environ
 from pathlib import Path
 from shlex import join
-from typing import List
+from typing import Dict, List, Tuple
 
 from dotenv import load_dotenv
 from invoke import task
@@ -13,6 +15,9 @@ load_dotenv(".env")
 # FIXME change this name after renaming the flask template package!
 MODULE_NAME = "flask_template"
 
+# the plugin package inside the plugins folder
+PLUGIN_PACKAGE = "{{cookiecutter.package_name}}"
+
 
 @task
 def doc(c, format_="html", all_=False, color=True):
@@ -83,6 +88,218 @@ def doc_index(c, filter_=""):
         )
 
 
+# marker written to stderr between the measured import phases
+_IMPORT_PHASE_MARKER = "import-phase:"
+
+_IMPORT_TIME_SCRIPT = f"""
+import os, sys
+sys.path.insert(0, "plugins")
+def phase(name):
+    os.write(2, ("{_IMPORT_PHASE_MARKER}" + name + "\\n").encode())
+import qhana_plugin_runner.celery, qhana_plugin_runner.db.models.tasks, qhana_plugin_runner.storage
+phase("web")
+import {PLUGIN_PACKAGE}
+phase("worker")
+import {PLUGIN_PACKAGE}.computation
+"""
+
+
+def _parse_import_times(stderr: str) -> Dict[str, Dict[str, int]]:
+    """Sum up the ``-X importtime`` output per import phase and top package.
+
+    Returns:
+        Dict[str, Dict[str, int]]: the import time in microseconds of every
+            top level package per phase
+    """
+    phases: Dict[str, Dict[str, int]] = {"runner": {}}
+    current = phases["runner"]
+    for line in stderr.splitlines():
+        if line.startswith(_IMPORT_PHASE_MARKER):
+            current = phases.setdefault(line[len(_IMPORT_PHASE_MARKER) :], {})
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:") :].split("|")
+        package = module.strip().split(".")[0]
+        current[package] = current.get(package, 0) + int(self_us)
+    return phases
+
+
+@task
+def import_time(c, top=10):
+    """Report which packages the web process and the worker load for the plugin.
+
+    Only the schema and the blueprint should be loaded by the web process.
+    Heavy requirements should only show up in the worker phase (imports of
+    the computation module).
+
+    Args:
+        c (Context): task context
+        top (int, optional): the number of slowest packages to show per
+            phase. Defaults to 10.
+    """
+    result: Result = c.run(
+        join(["python", "-X", "importtime", "-c", _IMPORT_TIME_SCRIPT]), hide=True
+    )
+    phases = _parse_import_times(result.stderr)
+    for phase, title in (
+        ("web", "web process (plugin package)"),
+        ("worker", "worker only (computation module)"),
+    ):
+        packages: List[Tuple[str, int]] = sorted(
+            phases.get(phase, {}).items(), key=lambda p: p[1], reverse=True
+        )
+        total_ms = sum(us for _, us in packages) / 1000
+        print(f"\n{title}: {total_ms:.1f} ms in {len(packages)} packages")
+        for package, us in packages[:top]:
+            print(f"  {us / 1000:9.1f} ms  {package}")
+
+
+@task
+def bench(c, filter_="", repeat=5, output="", compare=""):
+    """Run the local benchmarks of the plugin (see the benchmarks folder).
+
+    The background task runs with celery in eager mode, a SQLite DB and the
+    local filesystem STORE in a temporary instance folder. The results are
+    stored as JSON (by default in benchmarks/results/<plugin version>.json).
+
+    Args:
+        c (Context): task context
+        filter_ (str, optional): only run benchmarks containing this string.
+            Defaults to "".
+        repeat (int, optional): the number of measured runs per case.
+            Defaults to 5.
+        output (str, optional): the result file. Defaults to "".
+        compare (str, optional): a previous result file to compare the
+            results with. Defaults to "".
+    """
+    cmd = ["python", "-m", "benchmarks", "--repeat", str(repeat)]
+    if filter_:
+        cmd += ["--filter", filter_]
+    if output:
+        cmd += ["--output", output]
+    if compare:
+        cmd += ["--compare", compare]
+    c.run(join(cmd), echo=True)
+
+
+@task
+def loadtest(
+    c, mix="", concurrency=8, duration=30, broker="eager", input_size=0, output="", compare=""
+):
+    """Put HTTP load on the plugin endpoints (see benchmarks/loadtest.py).
+
+    The plugin runner is served locally with a SQLite DB and the local
+    filesystem STORE in a temporary instance folder. The latency percentiles
+    and the throughput per endpoint are stored as JSON (by default in
+    benchmarks/results/loadtest-<plugin version>.json).
+
+    Args:
+        c (Context): task context
+        mix (str, optional): the request mix as endpoint=weight pairs
+            (endpoints: metadata, ui, process). Defaults to ""
+            (metadata=70,ui=20,process=10).
+        concurrency (int, optional): the number of concurrent clients.
+            Defaults to 8.
+        duration (int, optional): seconds to send requests. Defaults to 30.
+        broker (str, optional): "eager" runs submitted tasks in the request,
+            "memory" only publishes them to an in-memory broker. Defaults to
+            "eager".
+        input_size (int, optional): the number of entities of the input file
+            of submissions (0 for no input file). Defaults to 0.
+        output (str, optional): the result file. Defaults to "".
+        compare (str, optional): a previous result file to compare the
+            results with. Defaults to "".
+    """
+    cmd = [
+        "python",
+        "-m",
+        "benchmarks.loadtest",
+        "--concurrency",
+        str(concurrency),
+        "--duration",
+        str(duration),
+        "--broker",
+        broker,
+        "--input-size",
+        str(input_size),
+    ]
+    if mix:
+        cmd += ["--mix", mix]
+    if output:
+        cmd += ["--output", output]
+    if compare:
+        cmd += ["--compare", compare]
+    c.run(join(cmd), echo=True)
+
+
+# prefix of the plugin settings (see config.py of the plugin package)
+PLUGIN_ENV_PREFIX = "{{cookiecutter.package_name | upper}}_"
+
+
+def _plugin_queue() -> str:
+    """The queue of the plugin tasks (see routing.py of the plugin package).
+
+    The identifier is read from plugin.py, importing the plugin needs the app.
+    """
+    queue = environ.get(PLUGIN_ENV_PREFIX + "TASK_QUEUE")
+    if queue:
+        return queue
+    from qhana_plugin_runner.util.plugins import plugin_identifier
+
+    plugin_source = (Path("plugins") / PLUGIN_PACKAGE / "plugin.py").read_text()
+    name, version = (
+        re.search(rf"^{constant} = [\"']([^\"']+)[\"']", plugin_source, re.MULTILINE).group(1)
+        for constant in ("_plugin_name", "__version__")
+    )
+    return plugin_identifier(name, version)
+
+
+@task
+def worker(c, concurrency=0, pool="", default_queue=False, loglevel="INFO"):
+    """Start a celery worker for the tasks of this plugin only.
+
+    The plugin tasks are only routed to the plugin queue if the
+    {{cookiecutter.package_name | upper}}_TASK_ROUTING setting is enabled.
+    Heavy plugins then get their own worker pool and do not block the workers
+    of the default queue.
+
+    Args:
+        c (Context): task context
+        concurrency (int, optional): the number of worker processes. Defaults
+            to the {{cookiecutter.package_name | upper}}_WORKER_CONCURRENCY
+            setting (or 1).
+        pool (str, optional): the celery pool implementation (e.g. "prefork",
+            "threads" or "solo"). Defaults to "" (celery default).
+        default_queue (bool, optional): also consume the default queue (e.g.
+            to run all tasks with a single worker). Defaults to False.
+        loglevel (str, optional): the log level. Defaults to "INFO".
+    """
+    concurrency = concurrency or int(environ.get(PLUGIN_ENV_PREFIX + "WORKER_CONCURRENCY") or 1)
+    queues = [_plugin_queue()]
+    if default_queue:
+        queues.append("celery")
+    cmd = [
+        "celery",
+        "--app",
+        "qhana_plugin_runner.celery_worker:CELERY",
+        "worker",
+        "--queues",
+        ",".join(queues),
+        "--hostname",
+        f"{PLUGIN_PACKAGE}@%h",
+        "--concurrency",
+        str(concurrency),
+        # long running tasks: only reserve the next task when a process is free
+        "--prefetch-multiplier",
+        "1",
+        "--loglevel",
+        loglevel,
+    ]
+    if pool:
+        cmd += ["--pool", pool]
+    c.run(join(cmd), echo=True)
+
 {%- if cookiecutter.use_poetry == 'y' %}
 @task()
 def update_dependencies(c):
@@ -0,0 +1,53 @@
+"""Fixtures of the plugin tests (run with ``pytest``).
+
+The tests use the plugin runner app with a SQLite DB and the local
+filesystem STORE in a temporary instance folder and run celery tasks eagerly
+in the test process (like the benchmarks, no broker or worker needed).
+"""
+
+import sys
+from os import environ
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+# the folder containing README.md
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# the plugin settings are read on import, save checkpoints on every call, let
+# leases of killed task runs expire quickly and test the data-parallel layout
+environ.setdefault("{{cookiecutter.package_name | upper}}_CHECKPOINT_INTERVAL", "0")
+environ.setdefault("{{cookiecutter.package_name | upper}}_TASK_LEASE_TTL", "1")
+environ.setdefault("{{cookiecutter.package_name | upper}}_PARALLEL_TASKS", "true")
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory) -> Any:
+    """The plugin runner app (shared by all tests)."""
+    instance_folder = tmp_path_factory.mktemp("instance")
+    environ["QHANA_PLUGIN_RUNNER_INSTANCE_FOLDER"] = str(instance_folder)
+    sys.path.insert(0, str(PROJECT_ROOT / "plugins"))
+
+    from qhana_plugin_runner import create_app
+    from qhana_plugin_runner.celery import CELERY
+    from qhana_plugin_runner.db.db import DB
+
+    app = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{instance_folder / 'test.db'}",
+            "PLUGIN_FOLDERS": [str(PROJECT_ROOT / "plugins")],
+        }
+    )
+    # run all tasks synchronously in the test process
+    CELERY.conf.update(task_always_eager=True, task_eager_propagates=False)
+    with app.app_context():
+        DB.create_all()
+    return app
+
+
+@pytest.fixture
+def app_context(app) -> Iterator[Any]:
+    """Run the test in the app context of the plugin runner app."""
+    with app.app_context():
+        yield app
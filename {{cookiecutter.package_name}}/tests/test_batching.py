@@ -0,0 +1,23 @@
+"""CSV output of the vectorized batch processing."""
+
+from csv import DictReader
+from io import StringIO
+
+import pytest
+
+
+def test_write_columns_quotes_fields(app_context):
+    np = pytest.importorskip("numpy")
+    from {{cookiecutter.package_name}}.batching import write_columns
+
+    columns = {
+        "ID": np.array(["x,y", 'say "hi"', "multi\nline"], dtype=object),
+        "value": np.array([0.5, 1.0, 2.25]),
+    }
+    output = StringIO()
+    write_columns(output, columns, header=True)
+    write_columns(output, columns)
+
+    rows = list(DictReader(StringIO(output.getvalue())))
+    assert [row["ID"] for row in rows] == ["x,y", 'say "hi"', "multi\nline"] * 2
+    assert [float(row["value"]) for row in rows] == [0.5, 1.0, 2.25] * 2
@@ -0,0 +1,157 @@
+"""Resuming the background task from its checkpoint after its worker died."""
+
+import os
+import signal
+from contextlib import contextmanager
+from io import StringIO
+from json import loads
+from multiprocessing import get_context
+from pathlib import Path
+from time import monotonic, sleep, time
+from typing import Any, Callable, Iterator, List
+
+import pytest
+
+# the runs of the task are killed in forked worker processes
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+INPUT_SIZE = 200
+
+
+def write_input(path: Path, size: int) -> str:
+    """Write an entity list with ``size`` entities and return its file url."""
+    with path.open("w", encoding="utf-8", newline="") as csv_file:
+        csv_file.write("ID,href\n")
+        for i in range(size):
+            csv_file.write(f"entity-{i},http://example.com/entities/{i}\n")
+    return path.resolve().as_uri()
+
+
+def create_task(input_url: str) -> int:
+    """Save a new processing task of the background task, return its db id."""
+    from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+    from {{cookiecutter.package_name}}.parameters import encode_parameters
+    from {{cookiecutter.package_name}}.plugin_code import background_task
+
+    db_task = ProcessingTask(
+        task_name=background_task.name,
+        parameters=encode_parameters({"example_value": "test", "input_file_url": input_url}),
+    )
+    db_task.save(commit=True)
+    return db_task.id
+
+
+def run_slow_task(app, db_id: int):
+    """Run the background task with slow input (in a forked worker process)."""
+    from qhana_plugin_runner.db.db import DB
+
+    from {{cookiecutter.package_name}} import computation
+    from {{cookiecutter.package_name}}.plugin_code import background_task
+
+    iter_entities = computation.iter_entities
+
+    def iter_slowly(*args, **kwargs) -> Iterator[Any]:
+        for entity in iter_entities(*args, **kwargs):
+            sleep(0.05)
+            yield entity
+
+    computation.iter_entities = iter_slowly
+    with app.app_context():
+        DB.engine.dispose()  # do not use the DB connections of the parent process
+        background_task.apply(args=(db_id,))
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 30):
+    deadline = monotonic() + timeout
+    while not condition():
+        assert monotonic() < deadline, "timed out"
+        sleep(0.01)
+
+
+def checkpoint_state(path: Path) -> Any:
+    try:
+        return loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@contextmanager
+def captured_output(*args, **kwargs) -> Iterator[StringIO]:
+    """Stand-in for ``output.result_writer`` that keeps the output in memory."""
+    output = StringIO()
+    yield output
+    CAPTURED_OUTPUTS.append(output.getvalue())
+
+
+CAPTURED_OUTPUTS: List[str] = []
+
+
+def test_resume_after_killed_worker(app_context, tmp_path, monkeypatch):
+    from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+    from {{cookiecutter.package_name}} import plugin_code
+    from {{cookiecutter.package_name}}.checkpoint import Checkpoint
+    from {{cookiecutter.package_name}}.lease import LeaseHeld, TaskLease
+
+    db_id = create_task(write_input(tmp_path / "entities.csv", INPUT_SIZE))
+    checkpoint = Checkpoint(db_id)
+    lease = TaskLease(db_id)
+
+    # kill the worker process running the task after it saved a checkpoint
+    worker = get_context("fork").Process(target=run_slow_task, args=(app_context, db_id))
+    worker.start()
+    try:
+        wait_for(lambda: (checkpoint_state(checkpoint.path) or {}).get("entity_count", 0) >= 10)
+    finally:
+        os.kill(worker.pid, signal.SIGKILL)
+        worker.join()
+    killed_state = checkpoint_state(checkpoint.path)
+    assert 0 < killed_state["entity_count"] < INPUT_SIZE
+    assert lease.path.exists()  # the killed run counts as a delivery
+
+    # a redelivery while the lease of the killed run is still valid
+    # must not resume
+    result = plugin_code.background_task.apply(args=(db_id,))
+    assert isinstance(result.result, LeaseHeld)
+    assert checkpoint_state(checkpoint.path) == killed_state
+
+    # the redelivery after the lease expired resumes from the checkpoint
+    sleep(max(lease._read()["expires"] - time(), 0) + 0.1)
+    loaded_states: List[Any] = []
+    load = Checkpoint.load
+
+    def recording_load(self):
+        state = load(self)
+        loaded_states.append(state)
+        return state
+
+    monkeypatch.setattr(Checkpoint, "load", recording_load)
+    monkeypatch.setattr(plugin_code, "result_writer", captured_output)
+    CAPTURED_OUTPUTS.clear()
+    plugin_code.create_task_chain(db_id).apply_async()
+
+    db_task = ProcessingTask.get_by_id(id_=db_id)
+    assert db_task.task_status == "SUCCESS", db_task.task_log
+    assert loaded_states[0]["entity_count"] >= killed_state["entity_count"]
+    assert CAPTURED_OUTPUTS == [f"Input entities: {INPUT_SIZE}\nTODO"]
+    assert not checkpoint.path.exists()
+    assert not lease.path.exists()
+
+
+def test_delivery_cap(app_context, tmp_path):
+    from {{cookiecutter.package_name}}.checkpoint import Checkpoint
+    from {{cookiecutter.package_name}}.lease import TaskLease, TooManyDeliveries
+    from {{cookiecutter.package_name}}.plugin_code import background_task
+
+    db_id = create_task(write_input(tmp_path / "entities.csv", INPUT_SIZE))
+    checkpoint = Checkpoint(db_id)
+    checkpoint.save({"entity_count": 10}, force=True)
+    # all earlier runs were killed with their worker process
+    lease = TaskLease(db_id)
+    lease._write({"owner": "killed", "expires": time() - 1, "deliveries": lease.max_deliveries})
+
+    result = background_task.apply(args=(db_id,))
+    assert isinstance(result.result, TooManyDeliveries)
+    assert not checkpoint.path.exists()
+    assert not lease.path.exists()
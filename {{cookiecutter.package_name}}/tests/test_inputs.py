@@ -0,0 +1,74 @@
+"""Incremental parsing of input files."""
+
+from json import dumps
+
+import pytest
+
+
+def chunked(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_iter_text_lines_only_splits_on_newlines(chunk_size):
+    from {{cookiecutter.package_name}}.inputs import iter_text_lines
+
+    text = "a\u2028b\r\nc\x0cd\x1ce\x85f\ng"
+    lines = list(iter_text_lines(chunked(text.encode("utf-8"), chunk_size)))
+    assert lines == ["a\u2028b\r\n", "c\x0cd\x1ce\x85f\n", "g"]
+
+
+def test_parse_json_lines_with_unicode_line_separators():
+    from {{cookiecutter.package_name}}.inputs import parse_json_lines
+
+    documents = [{"ID": "a", "text": "line\u2028separator"}, {"ID": "b", "text": "page\x0cbreak"}]
+    data = "\n".join(dumps(document, ensure_ascii=False) for document in documents).encode("utf-8")
+    assert list(parse_json_lines(chunked(data, 4))) == documents
+
+
+@pytest.mark.parametrize(
+    "url, content_type, expected",
+    [
+        ("http://example.com/entities.json", "text/csv", "csv"),
+        ("http://example.com/entities.csv", "application/json", "json lines"),
+        ("http://example.com/entities.csv", "text/plain", "csv"),
+        ("file:///tmp/entities.jsonl", "", "json lines"),
+    ],
+)
+def test_input_format_prefers_content_type(url, content_type, expected):
+    from {{cookiecutter.package_name}}.inputs import input_format
+
+    assert input_format(url, content_type) == expected
+
+
+def test_failed_download_leaves_no_partial_file(app_context, monkeypatch):
+    from {{cookiecutter.package_name}} import inputs
+
+    class FailingResponse:
+        status_code = 200
+        headers = {"Content-Type": "text/csv", "ETag": '"v1"'}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            pass
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size):
+            yield b"ID,href\n"
+            raise ConnectionError("connection lost")
+
+    class Session:
+        def get(self, url, **kwargs):
+            return FailingResponse()
+
+    monkeypatch.setattr(inputs, "get_session", Session)
+    cache_folder = inputs.input_cache_folder()
+    cache_folder.mkdir(parents=True, exist_ok=True)
+    cached_files = set(cache_folder.iterdir())
+    with pytest.raises(ConnectionError):
+        inputs.fetch_input_file("http://example.com/entities.csv")
+    assert set(cache_folder.iterdir()) == cached_files
@@ -0,0 +1,61 @@
+"""Task outcomes and the aggregation of the per-process metrics files."""
+
+import subprocess
+import sys
+from json import dumps
+from os import getpid
+from socket import gethostname
+
+from celery.exceptions import Ignore, SoftTimeLimitExceeded
+
+
+def test_task_outcome(app_context):
+    from {{cookiecutter.package_name}}.cancellation import TaskCancelled
+    from {{cookiecutter.package_name}}.instrumentation import task_outcome
+
+    assert task_outcome(None) == "success"
+    assert task_outcome(Ignore()) == "ignored"
+    assert task_outcome(TaskCancelled("cancelled")) == "cancelled"
+    assert task_outcome(SoftTimeLimitExceeded()) == "timeout"
+    assert task_outcome(KeyError("missing")) == "failure"
+
+
+def test_files_of_dead_processes_are_merged(app_context):
+    from {{cookiecutter.package_name}}.instrumentation import MetricsRegistry, StageTiming
+
+    registry = MetricsRegistry()
+    folder = registry.metrics_folder()
+    folder.mkdir(parents=True, exist_ok=True)
+    for path in folder.iterdir():
+        path.unlink()
+
+    # a worker process that was recycled after running two tasks
+    dead_process = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True)
+    dead_pid = int(dead_process.stdout)
+    dead_values = {"stages": {"compute": {"count": 2, "seconds": 1.5, "bytes": 0}}, "outcomes": {"success": 2}}
+    (folder / f"{gethostname()}-{dead_pid}.json").write_text(dumps(dead_values))
+
+    stage = StageTiming("compute")
+    stage.duration = 0.5
+    registry.record([stage], "failure")
+
+    for _ in range(2):  # merging the files does not change the totals
+        totals = registry.collect()
+        assert totals["outcomes"] == {"success": 2, "failure": 1}
+        assert totals["stages"]["compute"]["count"] == 3
+        assert totals["stages"]["compute"]["seconds"] == 2.0
+    assert sorted(path.name for path in folder.glob("*.json")) == sorted(
+        ["finished.json", f"{gethostname()}-{getpid()}.json"]
+    )
+    assert 'runs_total{outcome="failure"} 1' in registry.exposition()
+
+
+def test_other_processes_are_never_checked_on_windows(app_context, monkeypatch):
+    from {{cookiecutter.package_name}} import instrumentation
+
+    def kill(pid, signal):
+        raise AssertionError("os.kill terminates the process on windows")
+
+    monkeypatch.setattr(instrumentation, "os_name", "nt")
+    monkeypatch.setattr(instrumentation, "kill", kill)
+    assert instrumentation._process_alive(1)
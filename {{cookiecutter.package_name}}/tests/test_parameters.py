@@ -0,0 +1,93 @@
+"""Out-of-band task parameters are deleted when the task finishes or expires."""
+
+from json import loads
+from typing import Any, Dict, List
+
+import pytest
+
+from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+
+def create_task(task_name: str, parameters: Dict[str, Any]) -> ProcessingTask:
+    from {{cookiecutter.package_name}}.parameters import encode_parameters
+
+    db_task = ProcessingTask(task_name=task_name, parameters=encode_parameters(parameters, inline_limit=16))
+    db_task.save(commit=True)
+    return db_task
+
+
+def external_paths(db_task: ProcessingTask) -> List[Any]:
+    from {{cookiecutter.package_name}}.parameters import EXTERNAL_KEY, parameter_folder
+
+    external = loads(db_task.parameters)[EXTERNAL_KEY]
+    return [parameter_folder() / reference["key"] for reference in external.values()]
+
+
+def test_background_task_deletes_parameters(app_context):
+    from {{cookiecutter.package_name}}.plugin_code import background_task, create_task_chain
+
+    db_task = create_task(background_task.name, {"example_value": "x" * 100})
+    paths = external_paths(db_task)
+    assert paths and all(path.exists() for path in paths)
+
+    create_task_chain(db_task.id).apply_async()
+
+    assert ProcessingTask.get_by_id(id_=db_task.id).task_status == "SUCCESS"
+    assert not any(path.exists() for path in paths)
+
+
+def test_shard_tasks_load_parameters(app_context, monkeypatch):
+    from {{cookiecutter.package_name}} import parallel_tasks
+
+    messages: List[Dict[str, Any]] = []
+    signature = parallel_tasks.shard_task.s
+
+    def recording_signature(*args, **kwargs):
+        messages.append(kwargs)
+        return signature(*args, **kwargs)
+
+    monkeypatch.setattr(parallel_tasks.shard_task, "s", recording_signature)
+
+    example_value = "abcdefghij" * 10
+    db_task = create_task(parallel_tasks.split_task.name, {"example_value": example_value, "shard_size": 30})
+    paths = external_paths(db_task)
+
+    parallel_tasks.create_parallel_task_chain(db_task.id).apply_async()
+
+    db_task = ProcessingTask.get_by_id(id_=db_task.id)
+    assert db_task.task_status == "SUCCESS", db_task.task_log
+    # the shard tasks only receive the db id and their shard, not the parameters
+    assert [set(message) for message in messages] == [{"db_id", "index", "shard"}] * 4
+    assert not any(path.exists() for path in paths)
+
+
+def test_delete_expired_parameters(app_context):
+    from {{cookiecutter.package_name}}.parameters import delete_expired_parameters
+    from {{cookiecutter.package_name}}.plugin_code import background_task
+
+    paths = external_paths(create_task(background_task.name, {"example_value": "x" * 100}))
+    modified = max(path.stat().st_mtime for path in paths)
+
+    assert delete_expired_parameters(max_age=60, clock=lambda: modified + 30) == 0
+    assert all(path.exists() for path in paths)
+    assert delete_expired_parameters(max_age=60, clock=lambda: modified + 61) >= len(paths)
+    assert not any(path.exists() for path in paths)
+
+
+def test_failed_shard_deletes_parameters(app_context, monkeypatch):
+    from {{cookiecutter.package_name}} import computation, parallel_tasks
+
+    def failing_shard(task_parameters, shard, cancellation):
+        raise ValueError("shard failed")
+
+    monkeypatch.setattr(computation, "compute_shard", failing_shard)
+
+    db_task = create_task(parallel_tasks.split_task.name, {"example_value": "abcdefghij" * 10, "shard_size": 30})
+    paths = external_paths(db_task)
+
+    with pytest.raises(ValueError):  # eager chains raise the error of the failed task
+        parallel_tasks.create_parallel_task_chain(db_task.id).apply_async()
+
+    # the chord callback (merge_task) never ran, the errback cleaned up
+    assert ProcessingTask.get_by_id(id_=db_task.id).task_status == "FAILURE"
+    assert not any(path.exists() for path in paths)
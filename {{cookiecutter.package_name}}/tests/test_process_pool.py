@@ -0,0 +1,86 @@
+"""Process pools in daemonic (celery prefork) worker processes."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from time import monotonic, sleep
+
+import pytest
+
+
+def sleep_for(seconds: float) -> float:
+    sleep(seconds)
+    return seconds
+
+
+class CancelledAfter:
+    """Stand-in for the CancellationToken of a task cancelled after a while."""
+
+    def __init__(self, seconds: float) -> None:
+        self.deadline = monotonic() + seconds
+
+    def raise_if_cancelled(self):
+        from {{cookiecutter.package_name}}.cancellation import TaskCancelled
+
+        if monotonic() > self.deadline:
+            raise TaskCancelled("cancelled")
+
+
+def cancelled_worker(results):
+    """Run a pool in a daemonic process like a celery prefork worker task."""
+    from {{cookiecutter.package_name}}.process_pool import process_pool
+
+    start = monotonic()
+    try:
+        with process_pool(max_workers=2, cancellation=CancelledAfter(0.5)) as pool:
+            assert pool.map(sleep_for, [0.01, 0.01]) == [0.01, 0.01]
+            pool.map(sleep_for, [60] * 4)
+    except Exception as error:
+        outcome = type(error).__name__
+    else:
+        outcome = "finished"
+    results.put((multiprocessing.current_process().daemon, outcome, monotonic() - start))
+    # the pool processes were terminated and joined
+    results.put(len(multiprocessing.active_children()))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="celery prefork workers fork")
+def test_cancel_pool_in_daemonic_worker(app_context, monkeypatch):
+    from {{cookiecutter.package_name}} import process_pool
+
+    monkeypatch.setattr(process_pool, "PROCESS_POOL_POLL_INTERVAL", 0.1)
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    worker = context.Process(target=cancelled_worker, args=(results,), daemon=True)
+    worker.start()
+    try:
+        daemon, outcome, duration = results.get(timeout=30)
+        assert daemon
+        assert outcome == "TaskCancelled"
+        assert duration < 30  # the running calls were not awaited
+        assert results.get(timeout=10) == 0
+    finally:
+        worker.join(10)
+        if worker.is_alive():
+            worker.terminate()
+    assert worker.exitcode == 0
+
+
+def test_missing_private_attributes_raise_a_clear_error(app_context, monkeypatch):
+    from {{cookiecutter.package_name}} import process_pool
+
+    class NewProcess:
+        daemon = True
+
+    monkeypatch.setattr(process_pool.multiprocessing, "current_process", NewProcess)
+    with pytest.raises(RuntimeError, match="_config"):
+        with process_pool._allow_child_processes():
+            pass
+
+    class NewExecutor(ProcessPoolExecutor):
+        def __init__(self) -> None:
+            pass
+
+    if hasattr(ProcessPoolExecutor, "terminate_workers"):
+        return  # public api since python 3.14
+    with pytest.raises(RuntimeError, match="_processes"):
+        process_pool._terminate_processes(NewExecutor())
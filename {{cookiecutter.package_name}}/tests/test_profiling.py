@@ -0,0 +1,45 @@
+"""Profiles are persisted for finished and failed task runs only."""
+
+from typing import List, Optional
+
+import pytest
+from celery.exceptions import Retry
+
+
+class Failed(Exception):
+    pass
+
+
+def run_profiled(error: Optional[Exception] = None):
+    from {{cookiecutter.package_name}}.profiling import task_profiler
+
+    with task_profiler(1, "cprofile"):
+        sum(range(1000))
+        if error is not None:
+            raise error
+
+
+@pytest.fixture
+def persisted(app_context, monkeypatch) -> List[str]:
+    from {{cookiecutter.package_name}} import profiling
+
+    names: List[str] = []
+    monkeypatch.setattr(profiling, "_persist_cprofile", lambda db_id, profiler, name: names.append(name))
+    return names
+
+
+def test_finished_and_failed_runs_are_profiled(persisted):
+    run_profiled()
+    with pytest.raises(Failed):
+        run_profiled(Failed())
+    assert persisted == ["profile", "profile"]
+
+
+def test_cancelled_and_retried_runs_are_not_profiled(persisted):
+    from {{cookiecutter.package_name}}.cancellation import TaskCancelled
+
+    with pytest.raises(TaskCancelled):
+        run_profiled(TaskCancelled("cancelled"))
+    with pytest.raises(Retry):
+        run_profiled(Retry())
+    assert persisted == []
@@ -0,0 +1,79 @@
+"""Progress reports are coalesced into a bounded number of DB writes."""
+
+import pytest
+
+CALLS = 1_000_000
+
+
+class CountingSession:
+    """Stand-in for DB.session counting the executed statements."""
+
+    def __init__(self) -> None:
+        self.executed = 0
+        self.commits = 0
+
+    def execute(self, statement):
+        self.executed += 1
+
+    def commit(self):
+        self.commits += 1
+
+
+class CountingDB:
+    def __init__(self) -> None:
+        self.session = CountingSession()
+
+
+class FakeClock:
+    """Advances by tick seconds on every call."""
+
+    def __init__(self, tick: float) -> None:
+        self.now = 0.0
+        self.tick = tick
+
+    def __call__(self) -> float:
+        self.now += self.tick
+        return self.now
+
+
+@pytest.mark.parametrize("total", [CALLS, 0])
+def test_writes_are_bounded(app_context, monkeypatch, total):
+    from {{cookiecutter.package_name}} import progress
+
+    db = CountingDB()
+    monkeypatch.setattr(progress, "DB", db)
+    # 1 ms per report => the reports span 1000 seconds
+    clock = FakeClock(tick=0.001)
+
+    with progress.ProgressReporter(1, interval=5, step=5, clock=clock) as reporter:
+        for done in range(1, CALLS + 1):
+            reporter.report_progress(done, total, "processing items")
+
+    duration = clock.now
+    # one write per interval, one per step (with a known total)
+    # and the final write
+    max_writes = duration / 5 + (100 / 5 if total else 0) + 1
+    assert db.session.executed == reporter.writes == db.session.commits
+    assert 0 < reporter.writes <= max_writes
+
+
+def test_task_log_keeps_only_the_last_progress(app_context):
+    from qhana_plugin_runner.db.db import DB
+    from qhana_plugin_runner.db.models.tasks import ProcessingTask
+
+    from {{cookiecutter.package_name}}.progress import ProgressReporter
+
+    db_task = ProcessingTask(task_name="progress-test", task_log="Task started.")
+    db_task.save(commit=True)
+
+    with ProgressReporter(db_task.id, interval=0, step=0) as reporter:
+        for done in range(1, 101):
+            reporter.report_progress(done, 100, "processing items")
+            if done == 50:
+                # written by another process while the task runs
+                other_task = DB.session.get(ProcessingTask, db_task.id)
+                other_task.add_task_log_entry("Other entry.", commit=True)
+
+    DB.session.refresh(db_task)
+    assert reporter.writes == 100
+    assert db_task.task_log == "Task started.\nProgress: 100/100 (100.0%) processing items\nOther entry."
@@ -0,0 +1,87 @@
+"""Keys, expiry and eviction of the result cache and its use by ProcessView."""
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_key_changes_with_the_plugin_version(app_context):
+    from {{cookiecutter.package_name}}.result_cache import result_cache_key
+
+    arguments = {"example_value": "x", "shard_size": 10}
+    key = result_cache_key("hello@v0-1-0", arguments)
+    # the key does not depend on the order of the arguments
+    assert result_cache_key("hello@v0-1-0", {"shard_size": 10, "example_value": "x"}) == key
+    assert result_cache_key("hello@v0-2-0", arguments) != key
+    assert result_cache_key("hello@v0-1-0", {**arguments, "shard_size": 11}) != key
+
+
+def test_entries_expire_after_the_ttl(app_context):
+    from {{cookiecutter.package_name}}.result_cache import ResultCache
+
+    clock = FakeClock()
+    cache = ResultCache(max_entries=10, ttl=60, clock=clock)
+    cache.put("a", 1)
+
+    clock.now = 60
+    assert cache.get("a") == 1
+    clock.now = 60.5
+    assert cache.get("a") is None
+    # expired entries are removed
+    clock.now = 0
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entries_are_evicted(app_context):
+    from {{cookiecutter.package_name}}.result_cache import ResultCache
+
+    cache = ResultCache(max_entries=2, ttl=60, clock=FakeClock())
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used entry
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_disabled_cache_stores_nothing(app_context):
+    from {{cookiecutter.package_name}}.result_cache import ResultCache
+
+    cache = ResultCache(max_entries=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_process_view_reuses_the_cached_task(app_context, monkeypatch):
+    from flask import url_for
+
+    from {{cookiecutter.package_name}} import plugin_code
+    from {{cookiecutter.package_name}}.api import PLUGIN_BLP
+    from {{cookiecutter.package_name}}.plugin import {{cookiecutter.base_classname}}
+
+    monkeypatch.setattr(plugin_code, "RESULT_CACHE_ENABLED", True)
+    plugin_code.RESULT_CACHE.clear()
+    client = app_context.test_client()
+    with app_context.test_request_context():
+        process_url = url_for(f"{PLUGIN_BLP.name}.ProcessView")
+
+    def start_task(**kwargs) -> str:
+        response = client.post(process_url, data={"example_value": "cached"}, **kwargs)
+        assert response.status_code == 303
+        return response.headers["Location"]
+
+    task_url = start_task()
+    # identical parameters link to the earlier task
+    assert start_task() == task_url
+    # bypassing the cache starts a new task
+    assert start_task(query_string={"no-cache": "true"}) != task_url
+    assert start_task(headers={"Cache-Control": "no-cache"}) != task_url
+    # a new plugin version starts a new task
+    monkeypatch.setattr({{cookiecutter.base_classname}}, "version", "999.0.0")
+    assert start_task() != task_url